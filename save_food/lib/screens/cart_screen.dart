@@ -110,7 +110,7 @@ class _CartScreenState extends State<CartScreen> {
     final desc = d['description'] ?? '';
     final category = d['category'] ?? 'edible';
     final foodType = d['food_type'] ?? '';
-    final imageUrl = d['image_url'];
+    final imageUrl = d['image_urls']?['card'] ?? d['image_url'];
     final donorName = d['donor_name'] ?? 'Anonymous';
     final isSold = d['is_sold'] == true;
 
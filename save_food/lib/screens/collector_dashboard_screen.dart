@@ -1,3 +1,5 @@
+import 'dart:async';
+
 import 'package:flutter/material.dart';
 import 'package:flutter/services.dart';
 import 'package:google_fonts/google_fonts.dart';
@@ -19,6 +21,7 @@ class _CollectorDashboardScreenState extends State<CollectorDashboardScreen> {
   Map<String, dynamic>? _collector;
   List<Map<String, dynamic>> _assignments = [];
   bool _loading = true;
+  StreamSubscription<Map<String, dynamic>>? _events;
 
   // Filter: 0 = All, 1 = Waiting, 2 = Collected, 3 = Delivered
   int _filter = 0;
@@ -35,6 +38,25 @@ class _CollectorDashboardScreenState extends State<CollectorDashboardScreen> {
       ),
     );
     _loadData();
+    _listenForChanges();
+  }
+
+  @override
+  void dispose() {
+    _events?.cancel();
+    super.dispose();
+  }
+
+  /// Reload when the server pushes a change instead of polling.
+  void _listenForChanges() {
+    _events = ApiService.buyRequestEvents().listen(
+      (_) => _loadData(),
+      onDone: () => Future.delayed(const Duration(seconds: 5), () {
+        if (mounted) _listenForChanges();
+      }),
+      onError: (_) {},
+      cancelOnError: false,
+    );
   }
 
   Future<void> _loadData() async {
@@ -456,9 +478,12 @@ class _CollectorDashboardScreenState extends State<CollectorDashboardScreen> {
   // ── Assignment card ────────────────────────────────────────────────
   Widget _assignmentCard(Map<String, dynamic> req) {
     final reqId = req['id'] as int;
-    final donTitle = req['donation_title'] ?? 'Untitled';
-    final donImage = req['donation_image_url'];
-    final donorName = req['donor_name'] ?? 'Unknown';
+    // List rows carry the donation once, nested; detail responses also flatten it.
+    final donation = req['donation_data'] as Map<String, dynamic>? ?? const {};
+    final donTitle = donation['title'] ?? req['donation_title'] ?? 'Untitled';
+    final donImage = (donation['image_urls'] ?? req['donation_image_urls'])?['thumbnail'] ??
+        req['donation_image_url'];
+    final donorName = donation['donor_name'] ?? req['donor_name'] ?? 'Unknown';
     final requesterName = req['requester_name'] ?? 'Unknown';
     final requesterPhone = req['requester_phone'] ?? '';
     final requesterAddress = req['requester_address'] ?? '';
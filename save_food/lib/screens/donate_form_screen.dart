@@ -325,7 +325,8 @@ class _DonateFormScreenState extends State<DonateFormScreen> {
       );
 
       if (!mounted) return;
-      if (result['statusCode'] == 201) {
+      // 200 when a retried request found the donation already made.
+      if (result['statusCode'] == 201 || result['statusCode'] == 200) {
         ScaffoldMessenger.of(context).showSnackBar(
           SnackBar(
             content: const Text('Food donated successfully! 🎉'),
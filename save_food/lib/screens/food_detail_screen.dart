@@ -1,4 +1,5 @@
 import 'package:flutter/material.dart';
+import 'package:geolocator/geolocator.dart';
 import 'package:google_fonts/google_fonts.dart';
 import '../theme/app_theme.dart';
 import '../services/cart_service.dart';
@@ -22,7 +23,10 @@ class _FoodDetailScreenState extends State<FoodDetailScreen> {
   bool _requestSent = false;
   String _requestStatus = ''; // pending, accepted, rejected
 
-  Map<String, dynamic> get d => widget.donation;
+  Map<String, dynamic>? _detail;
+
+  // List payloads are slim; the full record arrives from the detail endpoint.
+  Map<String, dynamic> get d => _detail ?? widget.donation;
 
   @override
   void initState() {
@@ -47,8 +51,14 @@ class _FoodDetailScreenState extends State<FoodDetailScreen> {
       }
     } catch (_) {}
 
+    Map<String, dynamic>? detail;
+    try {
+      detail = await ApiService.getDonation(d['id']);
+    } catch (_) {}
+
     if (mounted) {
       setState(() {
+        _detail = detail;
         _isOwn = userId != null && donorId != null && userId == donorId;
         _inCart = inCart;
         _requestSent = requestSent;
@@ -81,7 +91,16 @@ class _FoodDetailScreenState extends State<FoodDetailScreen> {
 
   Future<void> _sendBuyRequest() async {
     try {
-      final res = await ApiService.sendBuyRequest(donationId: d['id']);
+      // Best-effort drop-off point so the collector's route can include it.
+      Position? pos;
+      try {
+        pos = await Geolocator.getLastKnownPosition();
+      } catch (_) {}
+      final res = await ApiService.sendBuyRequest(
+        donationId: d['id'],
+        dropoffLatitude: pos?.latitude,
+        dropoffLongitude: pos?.longitude,
+      );
       if (res['statusCode'] == 201) {
         if (mounted) {
           setState(() {
@@ -126,7 +145,7 @@ class _FoodDetailScreenState extends State<FoodDetailScreen> {
     final desc = d['description'] ?? '';
     final category = d['category'] ?? 'edible';
     final foodType = d['food_type'] ?? '';
-    final imageUrl = d['image_url'];
+    final imageUrl = d['image_urls']?['full'] ?? d['image_url'];
     final donorName = d['donor_name'] ?? 'Anonymous';
     final address = d['address'] ?? '';
     final isSold = d['is_sold'] == true;
@@ -23,7 +23,9 @@ class _HomeScreenState extends State<HomeScreen> {
 
   // ── Data ─────────────────────────────────────────────────────────────
   Map<String, dynamic>? _user;
-  List<Map<String, dynamic>> _allDonations = [];
+  // Each section asks the server for its own filter and pages on scroll.
+  final _todayFeed = _DonationFeed();
+  final _organicFeed = _DonationFeed();
   List<Map<String, dynamic>> _myDonations = [];
   int _cartCount = 0;
 
@@ -36,6 +38,10 @@ class _HomeScreenState extends State<HomeScreen> {
   int _organicSoldFilter = 0; // 0=All, 1=Available, 2=Sold
   final _organicSoldLabels = ['All', 'Available', 'Sold'];
 
+  // ── Search ───────────────────────────────────────────────────────────
+  // Server-side results for the search bar; null when not searching.
+  List<Map<String, dynamic>>? _searchResults;
+
   // ── Expiry countdown ─────────────────────────────────────────────────
   Timer? _expiryTimer;
   Duration _expiryRemaining = Duration.zero;
@@ -69,15 +75,85 @@ class _HomeScreenState extends State<HomeScreen> {
   }
 
   Future<void> _loadDonations() async {
+    await Future.wait([
+      _reloadFeed(_todayFeed, _todayFilters),
+      _reloadFeed(_organicFeed, _organicFilters),
+      _loadExpiringItem(),
+      _loadMyDonations(),
+    ]);
+  }
+
+  Future<void> _loadMyDonations() async {
     try {
-      final all = await ApiService.getDonations();
       final my = await ApiService.getMyDonations();
       if (mounted) {
-        setState(() {
-          _allDonations = all.cast<Map<String, dynamic>>();
-          _myDonations = my.cast<Map<String, dynamic>>();
-        });
-        _findExpiringItem();
+        setState(() => _myDonations = my.cast<Map<String, dynamic>>());
+      }
+    } catch (_) {}
+  }
+
+  Map<String, String> get _todayFilters => {
+    if (_todayFilter != 0) 'food_type': _todayTypes[_todayFilter],
+  };
+
+  Map<String, String> get _organicFilters => {
+    'food_type': 'organic',
+    if (_organicSoldFilter == 1) 'is_sold': 'false',
+    if (_organicSoldFilter == 2) 'is_sold': 'true',
+  };
+
+  /// Start [feed] over from the first page with [filters].
+  Future<void> _reloadFeed(
+    _DonationFeed feed,
+    Map<String, String> filters,
+  ) async {
+    final generation = ++feed.generation;
+    feed.filters = filters;
+    feed.loading = true;
+    try {
+      final page = await ApiService.getDonations(filters: filters);
+      if (!mounted || generation != feed.generation) return;
+      setState(() {
+        feed.items = page.results;
+        feed.cursor = page.nextCursor;
+      });
+    } catch (_) {
+    } finally {
+      if (generation == feed.generation) feed.loading = false;
+    }
+  }
+
+  /// Append the next page of [feed]; a no-op on the last page or mid-load.
+  Future<void> _loadMore(_DonationFeed feed) async {
+    final cursor = feed.cursor;
+    if (cursor == null || feed.loading) return;
+    final generation = feed.generation;
+    feed.loading = true;
+    try {
+      final page = await ApiService.getDonations(
+        filters: feed.filters,
+        cursor: cursor,
+      );
+      if (!mounted || generation != feed.generation) return;
+      setState(() {
+        feed.items = [...feed.items, ...page.results];
+        feed.cursor = page.nextCursor;
+      });
+    } catch (_) {
+    } finally {
+      if (generation == feed.generation) feed.loading = false;
+    }
+  }
+
+  Future<void> _search(String query) async {
+    if (query.trim().isEmpty) {
+      setState(() => _searchResults = null);
+      return;
+    }
+    try {
+      final results = await ApiService.searchDonations(query);
+      if (mounted) {
+        setState(() => _searchResults = results.cast<Map<String, dynamic>>());
       }
     } catch (_) {}
   }
@@ -91,54 +167,58 @@ class _HomeScreenState extends State<HomeScreen> {
   int? get _currentUserId => _user?['id'];
 
   /// Donations by OTHER users only.
-  List<Map<String, dynamic>> get _othersDonations {
-    if (_currentUserId == null) return _allDonations;
-    return _allDonations.where((d) => d['donor'] != _currentUserId).toList();
+  List<Map<String, dynamic>> _othersOnly(List<Map<String, dynamic>> list) {
+    if (_currentUserId == null) return list;
+    return list.where((d) => d['donor'] != _currentUserId).toList();
   }
 
-  /// "Today options" – filtered by food type toggle.
+  /// "Today options" – search results when searching, otherwise the feed
+  /// for the selected food type.
   List<Map<String, dynamic>> get _todayDonations {
-    final base = _othersDonations;
-    if (_todayFilter == 0) return base;
+    final results = _searchResults;
+    if (results == null) return _othersOnly(_todayFeed.items);
+    if (_todayFilter == 0) return _othersOnly(results);
     final type = _todayTypes[_todayFilter];
-    return base.where((d) => d['food_type'] == type).toList();
+    return _othersOnly(results.where((d) => d['food_type'] == type).toList());
   }
 
   /// Organic items from other users, with sold filter.
-  List<Map<String, dynamic>> get _organicDonations {
-    var list = _othersDonations
-        .where((d) => d['food_type'] == 'organic')
-        .toList();
-    if (_organicSoldFilter == 1) {
-      list = list.where((d) => d['is_sold'] != true).toList();
-    } else if (_organicSoldFilter == 2) {
-      list = list.where((d) => d['is_sold'] == true).toList();
-    }
-    return list;
+  List<Map<String, dynamic>> get _organicDonations =>
+      _othersOnly(_organicFeed.items);
+
+  void _setTodayFilter(int i) {
+    setState(() => _todayFilter = i);
+    _reloadFeed(_todayFeed, _todayFilters);
+  }
+
+  void _setOrganicSoldFilter(int i) {
+    setState(() => _organicSoldFilter = i);
+    _reloadFeed(_organicFeed, _organicFilters);
   }
 
   // ── Best launch: packed item closest to expiry ───────────────────────
-  void _findExpiringItem() {
+  Future<void> _loadExpiringItem() async {
+    try {
+      final page = await ApiService.getDonations(
+        filters: {'food_type': 'packed', 'is_sold': 'false'},
+        pageSize: 50,
+      );
+      if (mounted) _findExpiringItem(page.results);
+    } catch (_) {}
+  }
+
+  void _findExpiringItem(List<Map<String, dynamic>> packed) {
     _expiryTimer?.cancel();
     final now = DateTime.now();
     Map<String, dynamic>? best;
     Duration? bestDiff;
 
-    for (final d in _othersDonations) {
-      if (d['food_type'] != 'packed') continue;
-      if (d['is_sold'] == true) continue;
-      final exp = d['expiry_date'];
+    for (final d in _othersOnly(packed)) {
+      // The server computes expires_at and already leaves expired items out.
+      final exp = d['expires_at'];
       if (exp == null) continue;
       try {
-        final expDate = DateTime.parse(exp);
-        final expEnd = DateTime(
-          expDate.year,
-          expDate.month,
-          expDate.day,
-          23,
-          59,
-          59,
-        );
+        final expEnd = DateTime.parse(exp).toLocal();
         final diff = expEnd.difference(now);
         if (diff.isNegative) continue; // already expired
         if (best == null || diff < bestDiff!) {
@@ -256,7 +336,12 @@ class _HomeScreenState extends State<HomeScreen> {
                   _buildTodayToggle(),
                   const SizedBox(height: 16),
                   ..._todayDonations.map(_buildDonationCard),
-                  if (_todayDonations.isEmpty)
+                  if (_searchResults == null && _todayFeed.cursor != null)
+                    _PageLoader(
+                      key: ValueKey('today ${_todayFeed.cursor}'),
+                      onVisible: () => _loadMore(_todayFeed),
+                    )
+                  else if (_todayDonations.isEmpty)
                     _emptyHint('No donations in this category yet'),
 
                   // ── Best Launch of the Day ───────────────────
@@ -274,7 +359,12 @@ class _HomeScreenState extends State<HomeScreen> {
                   _buildOrganicToggle(),
                   const SizedBox(height: 12),
                   ..._organicDonations.map(_buildDonationCard),
-                  if (_organicDonations.isEmpty)
+                  if (_organicFeed.cursor != null)
+                    _PageLoader(
+                      key: ValueKey('organic ${_organicFeed.cursor}'),
+                      onVisible: () => _loadMore(_organicFeed),
+                    )
+                  else if (_organicDonations.isEmpty)
                     _emptyHint('No organic donations yet'),
 
                   // ── My Donations ─────────────────────────────
@@ -422,6 +512,11 @@ class _HomeScreenState extends State<HomeScreen> {
                 const SizedBox(width: 8),
                 Expanded(
                   child: TextField(
+                    textInputAction: TextInputAction.search,
+                    onSubmitted: _search,
+                    onChanged: (value) {
+                      if (value.isEmpty) _search(value);
+                    },
                     style: GoogleFonts.poppins(
                       color: Colors.black87,
                       fontSize: 14,
@@ -491,7 +586,7 @@ class _HomeScreenState extends State<HomeScreen> {
         children: List.generate(_todayLabels.length, (i) {
           final active = _todayFilter == i;
           return GestureDetector(
-            onTap: () => setState(() => _todayFilter = i),
+            onTap: () => _setTodayFilter(i),
             child: AnimatedContainer(
               duration: const Duration(milliseconds: 200),
               margin: const EdgeInsets.only(right: 10),
@@ -529,7 +624,7 @@ class _HomeScreenState extends State<HomeScreen> {
         children: List.generate(_organicSoldLabels.length, (i) {
           final active = _organicSoldFilter == i;
           return GestureDetector(
-            onTap: () => setState(() => _organicSoldFilter = i),
+            onTap: () => _setOrganicSoldFilter(i),
             child: AnimatedContainer(
               duration: const Duration(milliseconds: 200),
               margin: const EdgeInsets.only(right: 10),
@@ -562,7 +657,7 @@ class _HomeScreenState extends State<HomeScreen> {
     final desc = d['description'] ?? '';
     final category = d['category'] ?? 'edible';
     final foodType = d['food_type'] ?? '';
-    final imageUrl = d['image_url'];
+    final imageUrl = d['image_urls']?['card'] ?? d['image_url'];
     final donorName = d['donor_name'] ?? 'Anonymous';
     final isSold = d['is_sold'] == true;
 
@@ -673,7 +768,7 @@ class _HomeScreenState extends State<HomeScreen> {
   Widget _buildExpiryCard() {
     final d = _expiringItem!;
     final title = d['title'] ?? 'Packed Food';
-    final imageUrl = d['image_url'];
+    final imageUrl = d['image_urls']?['card'] ?? d['image_url'];
     final donorName = d['donor_name'] ?? 'Anonymous';
     final expiry = d['expiry_date'] ?? '';
 
@@ -959,7 +1054,7 @@ class _HomeScreenState extends State<HomeScreen> {
           Row(
             children: [
               _statCard(
-                '${_allDonations.length}',
+                '${_todayFeed.items.length}${_todayFeed.cursor != null ? '+' : ''}',
                 'Meals\nShared',
                 Icons.volunteer_activism,
               ),
@@ -971,7 +1066,7 @@ class _HomeScreenState extends State<HomeScreen> {
               ),
               const SizedBox(width: 12),
               _statCard(
-                '${_othersDonations.where((d) => d['is_sold'] != true).length}',
+                '${_othersOnly(_todayFeed.items).where((d) => d['is_sold'] != true).length}',
                 'Available\nNow',
                 Icons.local_offer_outlined,
               ),
@@ -1300,3 +1395,39 @@ class _HomeScreenState extends State<HomeScreen> {
     );
   }
 }
+
+/// A server-filtered donation list loaded a page at a time.
+class _DonationFeed {
+  Map<String, String> filters = const {};
+  List<Map<String, dynamic>> items = [];
+  String? cursor;
+  bool loading = false;
+  // Bumped on reload so pages for an old filter are dropped.
+  int generation = 0;
+}
+
+/// Spinner at the end of a section; asks for the next page once it is
+/// scrolled into (or near) view. Key it by cursor so each page asks once.
+class _PageLoader extends StatefulWidget {
+  final VoidCallback onVisible;
+
+  const _PageLoader({super.key, required this.onVisible});
+
+  @override
+  State<_PageLoader> createState() => _PageLoaderState();
+}
+
+class _PageLoaderState extends State<_PageLoader> {
+  @override
+  void initState() {
+    super.initState();
+    // ListView only builds children near the viewport, so this runs on scroll.
+    WidgetsBinding.instance.addPostFrameCallback((_) => widget.onVisible());
+  }
+
+  @override
+  Widget build(BuildContext context) => const Padding(
+    padding: EdgeInsets.symmetric(vertical: 20),
+    child: Center(child: CircularProgressIndicator(strokeWidth: 2)),
+  );
+}
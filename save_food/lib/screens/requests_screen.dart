@@ -1,3 +1,5 @@
+import 'dart:async';
+
 import 'package:flutter/material.dart';
 import 'package:google_fonts/google_fonts.dart';
 
@@ -21,20 +23,35 @@ class _RequestsScreenState extends State<RequestsScreen>
   List<Map<String, dynamic>> _sent = [];
   List<Map<String, dynamic>> _received = [];
   bool _loading = true;
+  StreamSubscription<Map<String, dynamic>>? _events;
 
   @override
   void initState() {
     super.initState();
     _tabCtrl = TabController(length: 2, vsync: this);
     _load();
+    _listenForChanges();
   }
 
   @override
   void dispose() {
+    _events?.cancel();
     _tabCtrl.dispose();
     super.dispose();
   }
 
+  /// Reload when the server pushes a change instead of polling.
+  void _listenForChanges() {
+    _events = ApiService.buyRequestEvents().listen(
+      (_) => _load(),
+      onDone: () => Future.delayed(const Duration(seconds: 5), () {
+        if (mounted) _listenForChanges();
+      }),
+      onError: (_) {},
+      cancelOnError: false,
+    );
+  }
+
   Future<void> _load() async {
     setState(() => _loading = true);
     try {
@@ -78,6 +95,8 @@ class _RequestsScreenState extends State<RequestsScreen>
             behavior: SnackBarBehavior.floating,
           ),
         );
+        // Answered elsewhere (another device or a double tap): show the current state.
+        if (res['statusCode'] == 409) _load();
       }
     } catch (_) {}
   }
@@ -144,9 +163,12 @@ class _RequestsScreenState extends State<RequestsScreen>
   }
 
   Widget _sentCard(Map<String, dynamic> req) {
-    final donTitle = req['donation_title'] ?? 'Untitled';
-    final donImage = req['donation_image_url'];
-    final donorName = req['donor_name'] ?? 'Unknown';
+    // List rows carry the donation once, nested; detail responses also flatten it.
+    final donation = req['donation_data'] as Map<String, dynamic>? ?? const {};
+    final donTitle = donation['title'] ?? req['donation_title'] ?? 'Untitled';
+    final donImage = (donation['image_urls'] ?? req['donation_image_urls'])?['thumbnail'] ??
+        req['donation_image_url'];
+    final donorName = donation['donor_name'] ?? req['donor_name'] ?? 'Unknown';
     final status = req['status'] ?? 'pending';
     final createdAt = req['created_at'] ?? '';
     final donationData = req['donation_data'] as Map<String, dynamic>?;
@@ -371,8 +393,11 @@ class _RequestsScreenState extends State<RequestsScreen>
     final requesterPhone = req['requester_phone'] ?? '';
     final requesterAddress = req['requester_address'] ?? '';
     final requesterDistrict = req['requester_district'] ?? '';
-    final donTitle = req['donation_title'] ?? 'Untitled';
-    final donImage = req['donation_image_url'];
+    // List rows carry the donation once, nested; detail responses also flatten it.
+    final donation = req['donation_data'] as Map<String, dynamic>? ?? const {};
+    final donTitle = donation['title'] ?? req['donation_title'] ?? 'Untitled';
+    final donImage = (donation['image_urls'] ?? req['donation_image_urls'])?['thumbnail'] ??
+        req['donation_image_url'];
     final status = req['status'] ?? 'pending';
     final createdAt = req['created_at'] ?? '';
     final donationData = req['donation_data'] as Map<String, dynamic>?;
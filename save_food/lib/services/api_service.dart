@@ -16,6 +16,27 @@ class ApiService {
     };
   }
 
+  // Last ETag and body per GET URL, so unchanged lists come back as 304.
+  static final Map<String, MapEntry<String, String>> _etagCache = {};
+
+  /// GET with `If-None-Match`; returns the status and (possibly cached) body.
+  static Future<http.Response> _conditionalGet(Uri uri) async {
+    final headers = await _authHeaders();
+    final key = '${headers['Authorization'] ?? ''} $uri';
+    final cached = _etagCache[key];
+    if (cached != null) headers['If-None-Match'] = cached.key;
+
+    final res = await http.get(uri, headers: headers);
+    if (res.statusCode == 304 && cached != null) {
+      return http.Response(cached.value, 200, headers: res.headers);
+    }
+    final etag = res.headers['etag'];
+    if (res.statusCode == 200 && etag != null) {
+      _etagCache[key] = MapEntry(etag, res.body);
+    }
+    return res;
+  }
+
   static Future<String?> _getToken() async {
     final prefs = await SharedPreferences.getInstance();
     return prefs.getString('token');
@@ -79,7 +100,17 @@ class ApiService {
 
   // ─── Food Donations ─────────────────────────────────────────────────
 
-  /// Upload a food donation (multipart form).
+  // Resumable photo uploads: failed chunks and the final request are retried
+  // this many times, resuming from the server's offset each time.
+  static const int _uploadAttempts = 5;
+  static const int _defaultChunkSize = 256 * 1024;
+
+  /// Upload a food donation.
+  ///
+  /// The photo goes up in chunks through a resumable upload session, so a
+  /// dropped connection costs at most one chunk rather than the whole
+  /// image. The donation then refers to the finished upload; repeating
+  /// that request returns the same donation instead of a duplicate.
   static Future<Map<String, dynamic>> donateFood({
     required File imageFile,
     required String title,
@@ -95,56 +126,183 @@ class ApiService {
     required bool isSafe,
   }) async {
     final token = await _getToken();
-    final uri = Uri.parse('$baseUrl/donate/');
+    final auth = {'Authorization': 'Token $token'};
+
+    final String uploadId;
+    try {
+      uploadId = await _uploadResumable(imageFile, auth);
+    } on _UploadRejected catch (e) {
+      return {'statusCode': e.statusCode, 'detail': e.message};
+    }
+
+    final fields = {
+      'upload': uploadId,
+      'title': title,
+      'description': description,
+      'food_type': foodType,
+      'category': category,
+      'latitude': latitude.toString(),
+      'longitude': longitude.toString(),
+      'address': address,
+      'is_safe': isSafe.toString(),
+      'gemini_analysis': jsonEncode(geminiAnalysis),
+      if (expiryDate != null) 'expiry_date': expiryDate,
+      if (safetyHours != null) 'safety_hours': safetyHours.toString(),
+    };
+
+    final res = await _withRetries(
+      () => http.post(Uri.parse('$baseUrl/donate/'), headers: auth, body: fields),
+    );
+    final data = jsonDecode(res.body) as Map<String, dynamic>;
+    return {'statusCode': res.statusCode, ...data};
+  }
+
+  /// Send [file] through a resumable upload session; returns the upload id.
+  static Future<String> _uploadResumable(
+    File file,
+    Map<String, String> auth,
+  ) async {
+    final size = await file.length();
+    // Opening a session is not idempotent (a retry after a lost response
+    // opens a second one), so unlike the calls below it is not retried.
+    final created = await http.post(
+      Uri.parse('$baseUrl/uploads/'),
+      headers: {...auth, 'Content-Type': 'application/json'},
+      body: jsonEncode({
+        'filename': file.path.split(Platform.pathSeparator).last,
+        'size': size,
+      }),
+    );
+    var state = _uploadState(created, 201);
+    final uri = Uri.parse('$baseUrl/uploads/${state['id']}/');
+    final chunkSize = state['chunk_size'] as int? ?? _defaultChunkSize;
 
-    final request = http.MultipartRequest('POST', uri);
-    request.headers['Authorization'] = 'Token $token';
+    final source = await file.open();
+    try {
+      var offset = state['offset'] as int;
+      var failures = 0;
+      while (offset < size) {
+        final end = (offset + chunkSize < size ? offset + chunkSize : size) - 1;
+        await source.setPosition(offset);
+        final chunk = await source.read(end - offset + 1);
+        try {
+          final res = await http.put(uri, headers: {
+            ...auth,
+            'Content-Type': 'application/octet-stream',
+            'Content-Range': 'bytes $offset-$end/$size',
+          }, body: chunk);
+          // 409 means the server is elsewhere (e.g. a lost response): resync.
+          state = _uploadState(res, 200, alsoOk: 409);
+          offset = state['offset'] as int;
+          failures = 0;
+        } on http.ClientException {
+          if (++failures >= _uploadAttempts) rethrow;
+          await Future.delayed(Duration(seconds: 1 << failures));
+          try {
+            final res = await http.get(uri, headers: auth);
+            offset = _uploadState(res, 200)['offset'] as int;
+          } on http.ClientException {
+            // Still offline; retry the same chunk.
+          }
+        }
+      }
+    } finally {
+      await source.close();
+    }
 
-    request.files.add(
-      await http.MultipartFile.fromPath('image', imageFile.path),
+    final finalized = await _withRetries(
+      () => http.post(Uri.parse('${uri}finalize/'), headers: auth),
     );
+    return _uploadState(finalized, 200)['id'] as String;
+  }
 
-    request.fields['title'] = title;
-    request.fields['description'] = description;
-    request.fields['food_type'] = foodType;
-    request.fields['category'] = category;
-    request.fields['latitude'] = latitude.toString();
-    request.fields['longitude'] = longitude.toString();
-    request.fields['address'] = address;
-    request.fields['is_safe'] = isSafe.toString();
-    request.fields['gemini_analysis'] = jsonEncode(geminiAnalysis);
-
-    if (expiryDate != null) {
-      request.fields['expiry_date'] = expiryDate;
+  static Map<String, dynamic> _uploadState(
+    http.Response res,
+    int expected, {
+    int? alsoOk,
+  }) {
+    final data = jsonDecode(res.body) as Map<String, dynamic>;
+    if (res.statusCode != expected && res.statusCode != alsoOk) {
+      throw _UploadRejected(res.statusCode, data['error']?.toString() ?? 'Upload failed');
     }
-    if (safetyHours != null) {
-      request.fields['safety_hours'] = safetyHours.toString();
+    return data;
+  }
+
+  /// Run an idempotent request, retrying network failures with backoff.
+  static Future<http.Response> _withRetries(
+    Future<http.Response> Function() send,
+  ) async {
+    for (var attempt = 1;; attempt++) {
+      try {
+        return await send();
+      } on http.ClientException {
+        if (attempt >= _uploadAttempts) rethrow;
+        await Future.delayed(Duration(seconds: 1 << attempt));
+      }
     }
+  }
 
-    final streamed = await request.send();
-    final body = await streamed.stream.bytesToString();
-    final data = jsonDecode(body) as Map<String, dynamic>;
-    return {'statusCode': streamed.statusCode, ...data};
+  /// One page of safe donations (public feed).
+  ///
+  /// [filters] maps to the server-side query filters (`food_type`,
+  /// `category`, `is_sold`, `district`, `expiry_after`, `expiry_before`);
+  /// pass the previous page's [DonationPage.nextCursor] as [cursor] to
+  /// load more.
+  static Future<DonationPage> getDonations({
+    Map<String, String> filters = const {},
+    String? cursor,
+    int pageSize = 20,
+  }) async {
+    final uri = Uri.parse('$baseUrl/donations/').replace(queryParameters: {
+      ...filters,
+      'page_size': pageSize.toString(),
+      if (cursor != null) 'cursor': cursor,
+    });
+    final res = await _conditionalGet(uri);
+    if (res.statusCode == 200) {
+      final data = jsonDecode(res.body) as Map<String, dynamic>;
+      return DonationPage(
+        (data['results'] as List<dynamic>).cast<Map<String, dynamic>>(),
+        data['next_cursor'] as String?,
+      );
+    }
+    return const DonationPage([], null);
   }
 
-  /// All safe donations (public feed).
-  static Future<List<dynamic>> getDonations() async {
-    final res = await http.get(
-      Uri.parse('$baseUrl/donations/'),
-      headers: await _authHeaders(),
-    );
+  /// Safe donations matching [query], best match first.
+  ///
+  /// Every word matches as a prefix; [filters] takes the same keys as
+  /// [getDonations].
+  static Future<List<dynamic>> searchDonations(
+    String query, {
+    Map<String, String> filters = const {},
+    int limit = 50,
+  }) async {
+    final uri = Uri.parse('$baseUrl/donations/search/').replace(queryParameters: {
+      ...filters,
+      'q': query,
+      'limit': limit.toString(),
+    });
+    final res = await http.get(uri, headers: await _authHeaders());
     if (res.statusCode == 200) {
-      return jsonDecode(res.body) as List<dynamic>;
+      final data = jsonDecode(res.body) as Map<String, dynamic>;
+      return data['results'] as List<dynamic>;
     }
     return [];
   }
 
+  /// Full detail of a single donation, including the safety analysis.
+  static Future<Map<String, dynamic>?> getDonation(int id) async {
+    final res = await _conditionalGet(Uri.parse('$baseUrl/donations/$id/'));
+    if (res.statusCode == 200) {
+      return jsonDecode(res.body) as Map<String, dynamic>;
+    }
+    return null;
+  }
+
   /// Current user's donations.
   static Future<List<dynamic>> getMyDonations() async {
-    final res = await http.get(
-      Uri.parse('$baseUrl/my-donations/'),
-      headers: await _authHeaders(),
-    );
+    final res = await _conditionalGet(Uri.parse('$baseUrl/my-donations/'));
     if (res.statusCode == 200) {
       return jsonDecode(res.body) as List<dynamic>;
     }
@@ -157,11 +315,20 @@ class ApiService {
   static Future<Map<String, dynamic>> sendBuyRequest({
     required int donationId,
     String message = '',
+    double? dropoffLatitude,
+    double? dropoffLongitude,
   }) async {
     final res = await http.post(
       Uri.parse('$baseUrl/buy-request/'),
       headers: await _authHeaders(),
-      body: jsonEncode({'donation': donationId, 'message': message}),
+      body: jsonEncode({
+        'donation': donationId,
+        'message': message,
+        if (dropoffLatitude != null && dropoffLongitude != null) ...{
+          'dropoff_latitude': dropoffLatitude,
+          'dropoff_longitude': dropoffLongitude,
+        },
+      }),
     );
     final data = jsonDecode(res.body) as Map<String, dynamic>;
     return {'statusCode': res.statusCode, ...data};
@@ -178,10 +345,7 @@ class ApiService {
 
   /// Get all buy requests sent by the current user.
   static Future<List<dynamic>> getSentRequests() async {
-    final res = await http.get(
-      Uri.parse('$baseUrl/buy-requests/sent/'),
-      headers: await _authHeaders(),
-    );
+    final res = await _conditionalGet(Uri.parse('$baseUrl/buy-requests/sent/'));
     if (res.statusCode == 200) {
       return jsonDecode(res.body) as List<dynamic>;
     }
@@ -190,10 +354,7 @@ class ApiService {
 
   /// Get all buy requests received for the current user's donations.
   static Future<List<dynamic>> getReceivedRequests() async {
-    final res = await http.get(
-      Uri.parse('$baseUrl/buy-requests/received/'),
-      headers: await _authHeaders(),
-    );
+    final res = await _conditionalGet(Uri.parse('$baseUrl/buy-requests/received/'));
     if (res.statusCode == 200) {
       return jsonDecode(res.body) as List<dynamic>;
     }
@@ -239,16 +400,30 @@ class ApiService {
 
   /// Get assigned requests for the logged-in collector.
   static Future<List<dynamic>> getCollectorDashboard() async {
-    final res = await http.get(
-      Uri.parse('$baseUrl/collector/dashboard/'),
-      headers: await _authHeaders(),
-    );
+    final res = await _conditionalGet(Uri.parse('$baseUrl/collector/dashboard/'));
     if (res.statusCode == 200) {
       return jsonDecode(res.body) as List<dynamic>;
     }
     return [];
   }
 
+  /// Planned pickup/drop-off tour for the collector, starting at [lat]/[lng].
+  static Future<Map<String, dynamic>?> getCollectorRoute({
+    double? lat,
+    double? lng,
+  }) async {
+    final uri = Uri.parse('$baseUrl/collector/route/').replace(
+      queryParameters: lat != null && lng != null
+          ? {'lat': '$lat', 'lng': '$lng'}
+          : null,
+    );
+    final res = await http.get(uri, headers: await _authHeaders());
+    if (res.statusCode == 200) {
+      return jsonDecode(res.body) as Map<String, dynamic>;
+    }
+    return null;
+  }
+
   /// Verify OTP for a buy request (collector).
   static Future<Map<String, dynamic>> verifyCollectorOTP({
     required int requestId,
@@ -277,7 +452,43 @@ class ApiService {
     return jsonDecode(raw) as Map<String, dynamic>;
   }
 
+  // ─── Real-time events ───────────────────────────────────────────────
+
+  /// Buy-request change events pushed by the server (`/api/events/`, SSE).
+  ///
+  /// Each event is a compact map (`id`, `status`, `delivery_status`, ...).
+  /// The stream ends when the connection drops; callers should re-fetch
+  /// their lists and listen again.
+  static Stream<Map<String, dynamic>> buyRequestEvents() async* {
+    final client = http.Client();
+    try {
+      final request = http.Request('GET', Uri.parse('$baseUrl/events/'));
+      request.headers.addAll(await _authHeaders());
+      request.headers['Accept'] = 'text/event-stream';
+      final response = await client.send(request);
+      if (response.statusCode != 200) return;
+
+      final data = StringBuffer();
+      await for (final line in response.stream
+          .transform(utf8.decoder)
+          .transform(const LineSplitter())) {
+        if (line.startsWith('data:')) {
+          data.write(line.substring(5).trim());
+        } else if (line.isEmpty && data.isNotEmpty) {
+          yield jsonDecode(data.toString()) as Map<String, dynamic>;
+          data.clear();
+        }
+      }
+    } finally {
+      client.close();
+    }
+  }
+
   static Future<void> logout() async {
+    try {
+      await http.post(Uri.parse('$baseUrl/logout/'), headers: await _authHeaders());
+    } catch (_) {}
+    _etagCache.clear();
     final prefs = await SharedPreferences.getInstance();
     await prefs.remove('token');
     await prefs.remove('user');
@@ -285,3 +496,18 @@ class ApiService {
     await prefs.remove('isCollector');
   }
 }
+
+/// A page of the donation feed; [nextCursor] is null on the last page.
+class DonationPage {
+  final List<Map<String, dynamic>> results;
+  final String? nextCursor;
+
+  const DonationPage(this.results, this.nextCursor);
+}
+
+class _UploadRejected implements Exception {
+  final int statusCode;
+  final String message;
+
+  _UploadRejected(this.statusCode, this.message);
+}
@@ -1,6 +1,7 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
-from .models import CustomUser, FoodDonation, BuyRequest, FoodWasteCollector
+from .events import notify_buy_request
+from .models import CustomUser, FoodDonation, BuyRequest, FoodWasteCollector, Job
 
 
 @admin.register(CustomUser)
@@ -26,10 +27,12 @@ class FoodDonationAdmin(admin.ModelAdmin):
 
 @admin.register(FoodWasteCollector)
 class FoodWasteCollectorAdmin(admin.ModelAdmin):
-    list_display = ('user', 'employee_id', 'vehicle_number', 'zone', 'is_active', 'created_at')
-    list_filter = ('is_active', 'zone')
+    list_display = ('user', 'employee_id', 'vehicle_number', 'district', 'zone',
+                    'active_load', 'is_active', 'created_at')
+    list_filter = ('is_active', 'district', 'zone')
     search_fields = ('user__full_name', 'employee_id', 'vehicle_number')
     raw_id_fields = ('user',)
+    readonly_fields = ('active_load',)
 
     def save_model(self, request, obj, form, change):
         """Ensure the linked user has user_type = 'collector' for API identification."""
@@ -48,3 +51,15 @@ class BuyRequestAdmin(admin.ModelAdmin):
     raw_id_fields = ('requester', 'donation', 'assigned_collector')
     readonly_fields = ('sender_otp', 'receiver_otp', 'created_at', 'updated_at')
     list_editable = ('assigned_collector',)
+
+    def save_model(self, request, obj, form, change):
+        """Push the change (e.g. a new collector assignment) to everyone involved."""
+        super().save_model(request, obj, form, change)
+        notify_buy_request(obj)
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'name', 'status', 'attempts', 'max_attempts', 'run_after', 'updated_at')
+    list_filter = ('status', 'name')
+    readonly_fields = ('created_at', 'updated_at')
@@ -0,0 +1,326 @@
+"""Server-side food safety analysis of donation photos.
+
+The model is reached through a pluggable ``AnalysisClient``; ``GeminiClient``
+calls the Gemini API and ``StubClient`` answers locally for tests and
+offline development. Results are cached in ``FoodAnalysis`` under a hash of
+the image bytes and food type, so a retaken or re-submitted photo never pays
+for a second model call. Concurrent lookups are funnelled through a
+``Batcher`` that collects requests for a short window, collapses duplicates
+and hands the rest to the client in one batch.
+"""
+import base64
+import hashlib
+import json
+import re
+import threading
+import urllib.error
+import urllib.request
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+# Bump when the prompt changes so cached results are not reused.
+PROMPT_VERSION = 1
+
+_COMMON_PROMPT = '''
+You are a food safety analyst AI for a zero-waste food donation app called DEMETRA.
+Analyse the image provided and return **only** a valid JSON object.
+Do NOT include markdown fences, backticks, or any text outside the JSON object.
+
+The JSON must have these exact fields:
+- "is_food": true if the image contains food or a food product, false otherwise (boolean)
+- "title": a short descriptive name for the item (string, or null if not food)
+- "description": a 1-2 sentence description (string, or null if not food)
+- "detected_items": list of items visible in the image (list of strings)
+- "freshness": one of "fresh", "slightly_old", "spoiled", or null if not food (string)
+- "is_safe": whether this food is safe to donate — set false if not food (boolean)
+- "category": one of "edible", "recyclable", "rejected" (string)
+- "reason": brief reason for the decision (string)
+
+IMPORTANT: If the image does NOT show food (e.g. a person, object, scene, non-food item), set:
+  is_food=false, is_safe=false, category="rejected",
+  reason="Image does not contain a food item."
+'''
+
+_FOOD_TYPE_PROMPTS = {
+    'packed': '''
+Additional rules for PACKED food:
+- Try to read any expiry/best-before date visible on the packaging using OCR.
+- Add field "expiry_date" (string, format YYYY-MM-DD) if detected, otherwise null.
+- Add field "expiry_detected" (boolean) – true if you could read an expiry date.
+- If the expiry date has passed, set is_safe=false, category="rejected".
+- If no expiry date is visible, set "expiry_detected": false.
+- Add field "safety_hours": null (not applicable for packed food).
+''',
+    'homecooked': '''
+Additional rules for HOME-COOKED food:
+- There won't be an expiry date label.
+- Add field "expiry_date": null.
+- Add field "expiry_detected": null.
+- Estimate how many hours this food can remain safe for consumption based on what you see.
+- Add field "safety_hours" (integer, typically 2-12 hours depending on the food type).
+- If the food appears spoiled, set is_safe=false, category="rejected".
+''',
+    'organic': '''
+Additional rules for ORGANIC / RAW food (fruits, vegetables, raw produce):
+- Add field "expiry_date": null.
+- Add field "expiry_detected": null.
+- Add field "safety_hours": null.
+- Carefully inspect for signs of rot, mold, excessive browning, or insect damage.
+- If the organic food appears bad/spoiled/rotten, set is_safe=false and category="rejected".
+- If it appears edible, set category="edible". If only usable for composting/recycling, set category="recyclable".
+''',
+}
+
+PARSE_ERROR_RESULT = {
+    'is_food': False,
+    'is_safe': False,
+    'category': 'rejected',
+    'title': None,
+    'description': None,
+    'detected_items': [],
+    'freshness': None,
+    'expiry_date': None,
+    'expiry_detected': False,
+    'safety_hours': None,
+    'reason': 'Could not analyse the image. Please retake the photo '
+              'with better lighting and try again.',
+    'parse_error': True,
+}
+
+
+class AnalysisError(Exception):
+    """The analysis backend could not be reached or returned an error."""
+
+
+def build_prompt(food_type):
+    return _COMMON_PROMPT + _FOOD_TYPE_PROMPTS.get(food_type, _FOOD_TYPE_PROMPTS['organic'])
+
+
+def extract_json(text):
+    """Pull the JSON object out of a model reply, tolerating fences and stray text."""
+    cleaned = re.sub(r'<think>[\s\S]*?</think>', '', text).strip()
+    fence = re.search(r'```(?:json)?\s*([\s\S]*?)\s*```', cleaned)
+    braces = re.search(r'\{[\s\S]*\}', cleaned)
+    for candidate in (cleaned, fence and fence.group(1), braces and braces.group(0)):
+        if not candidate:
+            continue
+        try:
+            decoded = json.loads(candidate)
+        except ValueError:
+            continue
+        if isinstance(decoded, dict):
+            return decoded
+    return dict(PARSE_ERROR_RESULT)
+
+
+def content_hash(image_bytes, food_type):
+    digest = hashlib.sha256(image_bytes)
+    digest.update(f'|{food_type}|v{PROMPT_VERSION}'.encode())
+    return digest.hexdigest()
+
+
+# ── Clients ──────────────────────────────────────────────────────────
+
+class AnalysisClient:
+    """Interface for analysis backends."""
+
+    def analyse_batch(self, items):
+        """Analyse ``[(image_bytes, food_type), ...]`` and return one dict per item."""
+        raise NotImplementedError
+
+
+class StubClient(AnalysisClient):
+    """Deterministic local answers; never touches the network."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def analyse_batch(self, items):
+        self.calls += len(items)
+        return [{
+            'is_food': True,
+            'title': 'Food item',
+            'description': 'Analysed by the local stub client.',
+            'detected_items': [],
+            'freshness': 'fresh',
+            'is_safe': True,
+            'category': 'edible',
+            'reason': 'Stub analysis.',
+            'expiry_date': None,
+            'expiry_detected': False if food_type == 'packed' else None,
+            'safety_hours': 6 if food_type == 'homecooked' else None,
+        } for _, food_type in items]
+
+
+class GeminiClient(AnalysisClient):
+    """Calls the Gemini ``generateContent`` API, one HTTP request per image in parallel."""
+
+    endpoint = 'https://generativelanguage.googleapis.com/v1beta/models/{model}:generateContent'
+
+    def __init__(self):
+        self.api_key = settings.GEMINI_API_KEY
+        self.model = getattr(settings, 'GEMINI_MODEL', 'gemini-2.5-flash')
+        self.timeout = getattr(settings, 'FOOD_ANALYSIS_TIMEOUT', 30)
+        self._pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix='gemini')
+
+    def analyse_batch(self, items):
+        return list(self._pool.map(lambda item: self._analyse(*item), items))
+
+    def _analyse(self, image_bytes, food_type):
+        if not self.api_key:
+            raise AnalysisError('GEMINI_API_KEY is not configured.')
+        body = json.dumps({
+            'contents': [{'parts': [
+                {'text': build_prompt(food_type)},
+                {'inline_data': {
+                    'mime_type': 'image/jpeg',
+                    'data': base64.b64encode(image_bytes).decode(),
+                }},
+            ]}],
+            'generationConfig': {
+                'temperature': 0.1,
+                'maxOutputTokens': 1024,
+                'response_mime_type': 'application/json',
+            },
+        }).encode()
+        request = urllib.request.Request(
+            self.endpoint.format(model=self.model) + f'?key={self.api_key}',
+            data=body, headers={'Content-Type': 'application/json'},
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                data = json.load(response)
+        except (urllib.error.URLError, TimeoutError, ValueError) as exc:
+            raise AnalysisError(f'Gemini request failed: {exc}') from exc
+        try:
+            text = data['candidates'][0]['content']['parts'][0]['text']
+        except (KeyError, IndexError, TypeError):
+            return dict(PARSE_ERROR_RESULT)
+        return extract_json(text)
+
+
+# ── Batching ─────────────────────────────────────────────────────────
+
+class Batcher:
+    """Collects concurrent analysis requests and dispatches them together.
+
+    The first request in an idle period opens a window of ``window``
+    seconds (closed early once ``max_batch`` distinct images are waiting).
+    Requests for an image already waiting in the batch share its future.
+    """
+
+    def __init__(self, client, window=0.025, max_batch=8):
+        self.client = client
+        self.window = window
+        self.max_batch = max_batch
+        self._lock = threading.Lock()
+        self._full = threading.Event()
+        self._pending = {}   # hash -> (future, image_bytes, food_type)
+        self._dispatching = False
+
+    def submit(self, key, image_bytes, food_type):
+        with self._lock:
+            if key in self._pending:
+                return self._pending[key][0]
+            future = Future()
+            self._pending[key] = (future, image_bytes, food_type)
+            if len(self._pending) >= self.max_batch:
+                self._full.set()
+            if not self._dispatching:
+                self._dispatching = True
+                threading.Thread(target=self._dispatch, daemon=True).start()
+            return future
+
+    def _dispatch(self):
+        self._full.wait(self.window)
+        with self._lock:
+            batch, self._pending = self._pending, {}
+            self._full.clear()
+            self._dispatching = False
+        entries = list(batch.values())
+        try:
+            results = self.client.analyse_batch([(data, ft) for _, data, ft in entries])
+        except Exception as exc:
+            for future, _, _ in entries:
+                future.set_exception(exc)
+            return
+        for (future, _, _), result in zip(entries, results):
+            future.set_result(result)
+
+
+_batcher = None
+_batcher_lock = threading.Lock()
+
+
+def get_batcher():
+    global _batcher
+    with _batcher_lock:
+        if _batcher is None:
+            client = import_string(settings.FOOD_ANALYSIS_CLIENT)()
+            _batcher = Batcher(
+                client,
+                window=getattr(settings, 'FOOD_ANALYSIS_BATCH_WINDOW', 0.025),
+                max_batch=getattr(settings, 'FOOD_ANALYSIS_MAX_BATCH', 8),
+            )
+        return _batcher
+
+
+def reset_batcher():
+    """Drop the shared batcher so the next call re-reads settings."""
+    global _batcher
+    with _batcher_lock:
+        _batcher = None
+
+
+# ── Public API ───────────────────────────────────────────────────────
+
+def read_upload(upload):
+    upload.seek(0)
+    data = b''.join(upload.chunks())
+    upload.seek(0)
+    return data
+
+
+def analyse_image(image_bytes, food_type):
+    """Return the analysis for an image, from cache when possible.
+
+    Returns ``(result, cached)``. Raises ``AnalysisError`` when the backend fails.
+    """
+    return analyse_images([(image_bytes, food_type)])[0]
+
+
+def analyse_images(items):
+    """``analyse_image`` for ``[(image_bytes, food_type), ...]``, in order.
+
+    One cache query covers the whole batch. The misses go to the batcher
+    together, so a client sees them as one batch.
+    """
+    from .models import FoodAnalysis
+
+    keys = [content_hash(image_bytes, food_type) for image_bytes, food_type in items]
+    hits = dict(FoodAnalysis.objects.filter(content_hash__in=set(keys))
+                .values_list('content_hash', 'result'))
+    batcher = get_batcher()
+    futures = {}
+    for key, (image_bytes, food_type) in zip(keys, items):
+        if key not in hits and key not in futures:
+            futures[key] = batcher.submit(key, image_bytes, food_type)
+
+    timeout = getattr(settings, 'FOOD_ANALYSIS_TIMEOUT', 30) * 2
+    fresh = {}
+    for key, future in futures.items():
+        try:
+            fresh[key] = future.result(timeout=timeout)
+        except AnalysisError:
+            raise
+        except Exception as exc:
+            raise AnalysisError(str(exc)) from exc
+
+    food_types = dict(zip(keys, (food_type for _, food_type in items)))
+    FoodAnalysis.objects.bulk_create([
+        FoodAnalysis(content_hash=key, food_type=food_types[key], result=result)
+        for key, result in fresh.items() if not result.get('parse_error')
+    ], ignore_conflicts=True)
+    return [(hits[key], True) if key in hits else (fresh[key], False) for key in keys]
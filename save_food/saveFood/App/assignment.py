@@ -0,0 +1,116 @@
+"""Automatic assignment of accepted buy requests to collectors.
+
+Each collector keeps a denormalised ``active_load`` (accepted, undelivered
+requests), refreshed from ``signals.py`` whenever an assigned request
+changes. Choosing a collector reads the ``ASSIGN_CANDIDATES`` least-loaded
+active collectors of the donation's district straight off a partial
+``(district, active_load)`` index, so the lookup never scans the whole
+collector table. Those candidates are scored by distance to the pickup plus
+a per-request load penalty, with a bonus when their zone matches the
+donation. Districts with no active collector fall back to the least-loaded
+collectors overall.
+"""
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from . import geo
+from .events import notify_buy_request
+from .tasks import task
+
+ASSIGN_CANDIDATES = 10
+# One more open request weighs as much as this many extra kilometres.
+LOAD_PENALTY_KM = 5.0
+ZONE_BONUS_KM = 3.0
+
+
+def collector_point(collector):
+    if collector.latitude is not None and collector.longitude is not None:
+        return collector.latitude, collector.longitude
+    return geo.DISTRICT_CENTRES.get(collector.district)
+
+
+def zone_matches(collector, donation):
+    zone = collector.zone.strip().lower()
+    if not zone:
+        return False
+    return zone == donation.donor.pin_code or zone in (donation.address or '').lower()
+
+
+def score(collector, donation):
+    """Lower is better: travel to the pickup plus load, minus a zone bonus."""
+    point = collector_point(collector)
+    if point is None:
+        distance = 0.0
+    else:
+        distance = geo.haversine_km(point[0], point[1], donation.latitude, donation.longitude)
+    bonus = ZONE_BONUS_KM if zone_matches(collector, donation) else 0.0
+    return distance + LOAD_PENALTY_KM * collector.active_load - bonus
+
+
+def candidates(district):
+    from .models import FoodWasteCollector
+
+    active = FoodWasteCollector.objects.filter(is_active=True).order_by('active_load', 'id')
+    local = list(active.filter(district=district)[:ASSIGN_CANDIDATES])
+    return local or list(active[:ASSIGN_CANDIDATES])
+
+
+def choose_collector(donation):
+    """Best collector for ``donation``, or ``None`` when nobody is active."""
+    pool = candidates(donation.donor.district)
+    if not pool:
+        return None
+    return min(pool, key=lambda collector: (score(collector, donation), collector.id))
+
+
+def assign_collector(buy_request_id):
+    """Assign a collector to one accepted, unassigned request; returns it or ``None``."""
+    from .models import BuyRequest, ChangeLog, FoodWasteCollector, known_audience
+
+    with transaction.atomic():
+        buy_request = BuyRequest.objects.select_related('donation__donor').filter(
+            pk=buy_request_id, status='accepted', assigned_collector__isnull=True,
+        ).exclude(delivery_status='delivered').first()
+        if buy_request is None:
+            return None
+        collector = choose_collector(buy_request.donation)
+        if collector is None:
+            return None
+        now = timezone.now()
+        # Conditional so a concurrent manual assignment is never overwritten.
+        claimed = BuyRequest.objects.filter(
+            pk=buy_request.pk, assigned_collector__isnull=True,
+        ).update(assigned_collector=collector, updated_at=now)
+        if not claimed:
+            return None
+        buy_request.assigned_collector, buy_request.updated_at = collector, now
+        ChangeLog.record('buy_request', [buy_request.pk],
+                         current={buy_request.pk: known_audience(buy_request)})
+        FoodWasteCollector.refresh_load([collector.pk])
+        notify_buy_request(buy_request)
+    return collector
+
+
+@task
+def auto_assign_collector(buy_request_id):
+    assign_collector(buy_request_id)
+
+
+def enabled():
+    return getattr(settings, 'AUTO_ASSIGN_COLLECTORS', True)
+
+
+def assign_pending(limit=None):
+    """Assign collectors to accepted requests still waiting for one, oldest first.
+
+    Returns ``(assigned, skipped)``.
+    """
+    from .models import BuyRequest
+
+    pending = BuyRequest.objects.filter(
+        status='accepted', assigned_collector__isnull=True,
+    ).exclude(delivery_status='delivered').order_by('created_at', 'id')
+    ids = list(pending.values_list('id', flat=True)[:limit])
+    assigned = sum(1 for pk in ids if assign_collector(pk) is not None)
+    return assigned, len(ids) - assigned
@@ -0,0 +1,146 @@
+"""Token authentication with a two-tier cache.
+
+``CachedTokenAuthentication`` behaves like DRF's ``TokenAuthentication`` but
+loads the token, its user and the user's collector profile in one query and
+keeps the result in an in-process LRU for ``AUTH_CACHE_TTL`` seconds. When
+``AUTH_CACHE_ALIAS`` names a Django cache, entries are also shared through
+it, so other workers skip the database too. Entries are keyed by a hash of
+the token, never the token itself.
+
+``signals.py`` invalidates entries when a token is deleted (logout) and when
+a user or collector is saved (password change, deactivation). Other
+processes' LRUs only learn of this when their entry expires, so the TTL
+bounds how long a revoked token can keep working there.
+"""
+import copy
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.translation import gettext_lazy as _
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import AuthenticationFailed
+
+
+def _cache_key(key):
+    return 'auth-token:' + hashlib.sha256(key.encode()).hexdigest()
+
+
+def _clone(user, token):
+    """Per-request copies, so a view mutating ``request.user`` cannot leak into the cache."""
+    user = copy.copy(user)
+    collector = getattr(user, 'collector_profile', None)
+    if collector is not None:
+        user.collector_profile = copy.copy(collector)
+    token = copy.copy(token)
+    token.user = user
+    return user, token
+
+
+class TokenCache:
+    """Thread-safe LRU of ``token key -> (user, token)`` with a TTL, plus an optional shared tier."""
+
+    def __init__(self, max_size=None, ttl=None, alias=None):
+        self.max_size = max_size or getattr(settings, 'AUTH_CACHE_SIZE', 10_000)
+        self.ttl = ttl if ttl is not None else getattr(settings, 'AUTH_CACHE_TTL', 60)
+        alias = alias if alias is not None else getattr(settings, 'AUTH_CACHE_ALIAS', None)
+        self.shared = caches[alias] if alias else None
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # cache key -> (expires_at, user, token)
+
+    def get(self, key):
+        cache_key = _cache_key(key)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(cache_key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._entries.move_to_end(cache_key)
+                    return _clone(entry[1], entry[2])
+                del self._entries[cache_key]
+        if self.shared is not None:
+            pair = self.shared.get(cache_key)
+            if pair is not None:
+                self._store(cache_key, *pair)
+                return _clone(*pair)
+        return None
+
+    def set(self, key, user, token):
+        cache_key = _cache_key(key)
+        self._store(cache_key, user, token)
+        if self.shared is not None:
+            self.shared.set(cache_key, (user, token), self.ttl)
+
+    def _store(self, cache_key, user, token):
+        user, token = _clone(user, token)
+        with self._lock:
+            self._entries[cache_key] = (time.monotonic() + self.ttl, user, token)
+            self._entries.move_to_end(cache_key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        cache_key = _cache_key(key)
+        with self._lock:
+            self._entries.pop(cache_key, None)
+        if self.shared is not None:
+            self.shared.delete(cache_key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+_token_cache = None
+_token_cache_lock = threading.Lock()
+
+
+def get_token_cache():
+    global _token_cache
+    with _token_cache_lock:
+        if _token_cache is None:
+            _token_cache = TokenCache()
+        return _token_cache
+
+
+def reset_token_cache():
+    global _token_cache
+    with _token_cache_lock:
+        _token_cache = None
+
+
+def invalidate_token(key):
+    get_token_cache().delete(key)
+
+
+def invalidate_user(user_id):
+    """Drop cached entries for ``user_id``'s token; DRF gives each user at most one."""
+    for key in Token.objects.filter(user_id=user_id).values_list('key', flat=True):
+        invalidate_token(key)
+
+
+def collector_for(user):
+    """The user's collector profile, or ``None``.
+
+    Free after ``CachedTokenAuthentication``, which loads it with the user.
+    """
+    return getattr(user, 'collector_profile', None)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    def authenticate_credentials(self, key):
+        token_cache = get_token_cache()
+        cached = token_cache.get(key)
+        if cached is not None:
+            return cached
+        token = Token.objects.select_related('user__collector_profile').filter(key=key).first()
+        if token is None:
+            raise AuthenticationFailed(_('Invalid token.'))
+        if not token.user.is_active:
+            raise AuthenticationFailed(_('User inactive or deleted.'))
+        token_cache.set(key, token.user, token)
+        return token.user, token
@@ -0,0 +1,243 @@
+"""Shared helpers for the ``bench_*`` and ``seed_load`` management commands."""
+import itertools
+import os
+import random
+import shutil
+import tempfile
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.db import connection
+from django.utils import timezone
+
+from .geo import DISTRICT_CENTRES
+
+SAMPLE_ANALYSIS = {
+    'is_food': True,
+    'title': 'Vegetable biryani',
+    'description': 'A large tray of vegetable biryani with raita, freshly cooked.',
+    'detected_items': ['rice', 'carrot', 'peas', 'raita', 'fried onion'],
+    'freshness': 'fresh',
+    'is_safe': True,
+    'category': 'edible',
+    'reason': 'Food looks freshly prepared with no visible signs of spoilage.',
+    'expiry_date': None,
+    'expiry_detected': None,
+    'safety_hours': 6,
+}
+MEALS = [
+    'biryani', 'sambar rice', 'chapati and curry', 'parotta', 'appam and stew', 'puttu',
+    'idli', 'dosa', 'avial', 'fish curry meals', 'chicken curry', 'veg meals', 'payasam',
+    'pulao', 'upma', 'bread', 'cake', 'bananas', 'mangoes', 'jackfruit', 'tapioca',
+    'biscuits', 'milk packets', 'noodles', 'sandwiches',
+]
+
+
+def random_point(rng, district=None, spread_km=15):
+    """A ``(district, lat, lng)`` scattered around a district centre."""
+    district = district or rng.choice(list(DISTRICT_CENTRES))
+    lat, lng = DISTRICT_CENTRES[district]
+    sigma = spread_km / 111.0
+    return district, rng.gauss(lat, sigma), rng.gauss(lng, sigma)
+
+
+def make_rng(seed):
+    return random.Random(seed)
+
+
+@contextmanager
+def isolated_database(on_disk=False):
+    """Run a benchmark against a throwaway copy of the schema.
+
+    Uses the test-database machinery under a name private to this run, so
+    synthetic rows never touch the configured database and a concurrent
+    test run keeps its own test database. SQLite gets a memory database,
+    or with ``on_disk`` a file in a temporary directory so that several
+    threads can share it; other backends get a uniquely suffixed name.
+    """
+    old_name = connection.settings_dict['NAME']
+    test_settings = connection.settings_dict.setdefault('TEST', {})
+    old_test_name = test_settings.get('NAME')
+    tmpdir = None
+    if connection.vendor != 'sqlite':
+        test_settings['NAME'] = f'test_{old_name}_bench_{uuid.uuid4().hex[:12]}'
+    elif on_disk:
+        tmpdir = tempfile.mkdtemp(prefix='savefood-bench-')
+        test_settings['NAME'] = os.path.join(tmpdir, 'bench.sqlite3')
+    else:
+        test_settings['NAME'] = ':memory:'
+    try:
+        # The name is ours alone, so clobbering can only hit a leftover of this run.
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            yield
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+    finally:
+        test_settings['NAME'] = old_test_name
+        if tmpdir:
+            shutil.rmtree(tmpdir, ignore_errors=True)
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of a non-empty list of numbers."""
+    ordered = sorted(samples)
+    index = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def time_calls(func, args_list):
+    """Call ``func(*args)`` for each entry and return per-call milliseconds."""
+    samples = []
+    for args in args_list:
+        start = time.perf_counter()
+        func(*args)
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+# Shares of the synthetic population, roughly matching production.
+SEED_USERS_PER_DONATION = 0.1
+SEED_COLLECTORS_PER_DONATION = 1 / 5000
+SEED_REQUESTED_SHARE = 0.4       # donations that receive any buy request
+SEED_ACCEPTED_SHARE = 0.5        # of those, donations whose request was accepted
+SEED_EXPIRED_SHARE = 0.1         # packed food whose printed date has passed
+
+
+def seed_load(rng, donations, batch_size=5000, log=None):
+    """Bulk-insert a realistic population sized by ``donations`` into the current database.
+
+    Users are citizens, restaurants and organizations spread over the
+    districts, with a skewed number of donations per donor (a few busy
+    restaurants, many occasional donors). Donations sit around their
+    donor's district centre; some receive buy requests from citizens in
+    the same district, and accepted ones get a collector from that
+    district. Safe to run repeatedly: each run appends new rows.
+    Returns the number of rows created per model.
+    """
+    from .models import BuyRequest, ChangeLog, CustomUser, FoodDonation, FoodWasteCollector
+
+    start = time.perf_counter()
+    first = CustomUser.objects.filter(username__startswith='load-').count()
+    serial = itertools.count(first)
+    password = make_password('load-pass')
+    districts = list(DISTRICT_CENTRES)
+
+    def users(count, user_type, batch):
+        made = []
+        for _ in range(count):
+            n = next(serial)
+            district = rng.choice(districts)
+            made.append(CustomUser(
+                username=f'load-{n}', password=password, full_name=f'Load User {n}',
+                phone=f'6{n:09d}', pin_code=f'{680000 + rng.randrange(10000)}',
+                district=district, full_address=f'House {rng.randint(1, 400)}, {district.title()}',
+                user_type=user_type,
+            ))
+            if len(made) >= batch:
+                yield from CustomUser.objects.bulk_create(made)
+                made = []
+        yield from CustomUser.objects.bulk_create(made)
+
+    population = max(50, int(donations * SEED_USERS_PER_DONATION))
+    citizens = list(users(int(population * 0.7), 'citizen', batch_size))
+    businesses = list(users(int(population * 0.2), 'restaurant', batch_size))
+    businesses += users(population - len(citizens) - len(businesses), 'organization', batch_size)
+
+    per_district = max(1, round(donations * SEED_COLLECTORS_PER_DONATION / len(districts)))
+    collector_users = list(users(per_district * len(districts), 'collector', batch_size))
+    collectors = FoodWasteCollector.objects.bulk_create([
+        FoodWasteCollector(
+            user=user, employee_id=f'LOAD{user.username[5:]}', district=districts[i % len(districts)],
+            vehicle_number=f'KL-{rng.randint(1, 99):02d}-{rng.randint(1000, 9999)}',
+            latitude=DISTRICT_CENTRES[districts[i % len(districts)]][0],
+            longitude=DISTRICT_CENTRES[districts[i % len(districts)]][1],
+        )
+        for i, user in enumerate(collector_users)
+    ])
+    if log:
+        log(f'  {len(citizens) + len(businesses) + len(collector_users)} users, '
+            f'{len(collectors)} collectors')
+
+    # Skewed: donor k gets a share proportional to 1 / sqrt(k + 1), so the busiest
+    # donor posts about 1 / (2 * sqrt(donors)) of everything.
+    donors = businesses + rng.sample(citizens, len(citizens) // 5)
+    rng.shuffle(donors)
+    donor_weights = list(itertools.accumulate((k + 1) ** -0.5 for k in range(len(donors))))
+    citizens_by_district, collectors_by_district = {}, {}
+    for user in citizens:
+        citizens_by_district.setdefault(user.district, []).append(user)
+    for collector in collectors:
+        collectors_by_district.setdefault(collector.district, []).append(collector)
+
+    today = timezone.localdate()
+    created = {'donations': 0, 'buy_requests': 0}
+    while created['donations'] < donations:
+        batch = []
+        for _ in range(min(batch_size, donations - created['donations'])):
+            donor = rng.choices(donors, cum_weights=donor_weights)[0]
+            _, lat, lng = random_point(rng, donor.district, spread_km=8)
+            food_type = rng.choices(['homecooked', 'packed', 'organic'], [6, 3, 1])[0]
+            donation = FoodDonation(
+                donor=donor, title=f'{rng.choice(MEALS).capitalize()} for {rng.randint(2, 40)}',
+                description='Freshly prepared, please bring your own containers.',
+                food_type=food_type, image='food_donations/load.jpg',
+                renditions={name: f'food_donations/renditions/load_{name}.webp'
+                            for name in ('thumbnail', 'card', 'full')},
+                latitude=lat, longitude=lng, address=f'Near {donor.full_address}',
+                gemini_analysis=SAMPLE_ANALYSIS,
+                category=rng.choices(['edible', 'recyclable'], [9, 1])[0],
+            )
+            if food_type == 'packed':
+                expired = rng.random() < SEED_EXPIRED_SHARE
+                donation.expiry_date = today + timedelta(
+                    days=-rng.randint(1, 30) if expired else rng.randint(1, 60))
+            elif food_type == 'homecooked':
+                donation.safety_hours = rng.randint(2, 12)
+            donation.set_derived_fields()
+            batch.append(donation)
+
+        requests = []
+        for donation in batch:
+            neighbours = citizens_by_district.get(donation.donor.district) or citizens
+            if rng.random() >= SEED_REQUESTED_SHARE:
+                continue
+            asked = [user for user in rng.sample(neighbours, min(len(neighbours), 3))
+                     if user.pk != donation.donor_id][:rng.randint(1, 3)]
+            if not asked:
+                continue
+            winner = rng.randrange(len(asked)) if rng.random() < SEED_ACCEPTED_SHARE else None
+            for i, requester in enumerate(asked):
+                request = BuyRequest(donation=donation, requester=requester,
+                                     message='Can pick up this evening.')
+                if winner is not None:
+                    request.status = 'accepted' if i == winner else 'rejected'
+                if i == winner:
+                    donation.is_sold = True
+                    request.sender_otp = f'{rng.randint(100000, 999999)}'
+                    request.receiver_otp = f'{rng.randint(100000, 999999)}'
+                    request.delivery_status = rng.choices(
+                        ['waiting', 'collected', 'delivered'], [2, 1, 3])[0]
+                    request.assigned_collector = rng.choice(
+                        collectors_by_district.get(donation.donor.district) or collectors)
+                requests.append(request)
+
+        FoodDonation.objects.bulk_create(batch)
+        BuyRequest.objects.bulk_create(requests)  # picks up the donations' new primary keys
+        ChangeLog.record('donation', [d.pk for d in batch])
+        ChangeLog.record('buy_request', [r.pk for r in requests])
+        created['donations'] += len(batch)
+        created['buy_requests'] += len(requests)
+        if log:
+            log(f'  {created["donations"]}/{donations} donations '
+                f'({time.perf_counter() - start:.0f}s)')
+
+    FoodWasteCollector.refresh_load([c.pk for c in collectors])
+    return {
+        'users': len(citizens) + len(businesses) + len(collector_users),
+        'collectors': len(collectors),
+        **created,
+    }
@@ -0,0 +1,65 @@
+"""Conditional GET and response caching for list endpoints.
+
+Each list view describes its current state with a cheap *version*: for
+example ``max(updated_at)`` plus ``count()`` over the rows it would return.
+The version is hashed with the user, host and query string into an ETag.
+A client that already holds that ETag gets ``304 Not Modified``. Any other
+client gets a serialized payload cached under the same ETag, so an
+unchanged list is serialized at most once per ``API_CACHE_TIMEOUT``.
+
+There is deliberately no ``Last-Modified`` / ``If-Modified-Since``: the
+newest ``updated_at`` of a list does not move forward when a row leaves
+it (deleted, sold, filtered out), so only the ETag is trustworthy.
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Max
+from rest_framework import status
+from rest_framework.response import Response
+
+
+def queryset_version(queryset, *related_timestamps):
+    """``(count, max(updated_at), ...)`` for ``queryset`` in a single aggregate query.
+
+    ``related_timestamps`` name extra ``updated_at`` lookups (e.g.
+    ``donation__updated_at``) whose rows are embedded in the payload.
+    """
+    aggregates = {'count': Count('id'), 'updated_at': Max('updated_at')}
+    for i, lookup in enumerate(related_timestamps):
+        aggregates[f'related_{i}'] = Max(lookup)
+    values = queryset.order_by().aggregate(**aggregates)
+    return tuple(values[key] for key in aggregates)
+
+
+def make_etag(request, scope, version):
+    user = request.user.pk if request.user.is_authenticated else 'anon'
+    raw = '|'.join([
+        scope, str(user), request.get_host(), request.get_full_path(), repr(version),
+    ])
+    return '"%s"' % hashlib.sha1(raw.encode()).hexdigest()
+
+
+def _not_modified(request, etag):
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    if if_none_match is None:
+        return False
+    tags = {tag.strip().removeprefix('W/') for tag in if_none_match.split(',')}
+    return etag in tags or '*' in tags
+
+
+def cached_response(request, scope, version, render):
+    """Return a 304, a cached payload, or ``render()``'s fresh payload for ``version``."""
+    etag = make_etag(request, scope, version)
+    headers = {'ETag': etag, 'Cache-Control': 'private, no-cache'}
+
+    if _not_modified(request, etag):
+        return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    key = f'api-response:{etag}'
+    data = cache.get(key)
+    if data is None:
+        data = render()
+        cache.set(key, data, getattr(settings, 'API_CACHE_TIMEOUT', 300))
+    return Response(data, headers=headers)
@@ -0,0 +1,258 @@
+"""Real-time change events for buy requests.
+
+Views publish compact events on named channels: ``user:<id>`` for requesters
+and donors, ``collector:<id>`` for collectors. ``event_stream_view`` relays
+them to connected clients as Server-Sent Events. The broker is pluggable
+through ``EVENT_BROKER``:
+
+* ``InProcessBroker`` only reaches subscribers in the publishing process,
+  which suits tests and a single process that also runs its tasks eagerly.
+* ``DatabaseBroker`` (the default) writes each event to the ``Event``
+  table. Every process with subscribers polls it, so events published by
+  ``run_workers`` (collector assignment, expiry) or another ASGI worker
+  still reach the stream. Delivery lags by up to ``EVENT_POLL_INTERVAL``.
+"""
+import asyncio
+import logging
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+
+class Broker:
+    """Interface for event brokers."""
+
+    def publish(self, channel, event):
+        raise NotImplementedError
+
+    def publish_many(self, messages):
+        """Publish ``(channel, event)`` pairs; brokers may batch them."""
+        for channel, event in messages:
+            self.publish(channel, event)
+
+    def subscribe(self, channels):
+        """Return a ``Subscription`` for ``channels``; call from the event loop."""
+        raise NotImplementedError
+
+    def unsubscribe(self, subscription):
+        """Stop delivering to ``subscription``; called by ``Subscription.close()``."""
+        raise NotImplementedError
+
+
+class Subscription:
+    def __init__(self, broker, channels, max_queue=100):
+        self.broker = broker
+        self.channels = channels
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=max_queue)
+
+    def deliver(self, event):
+        """Thread-safe hand-off into the subscriber's loop; drops events for slow readers.
+
+        A subscriber whose loop has closed without calling ``close()`` (a
+        dropped connection, a stopped worker) is unsubscribed here.
+        """
+        def put():
+            if not self.queue.full():
+                self.queue.put_nowait(event)
+        try:
+            self.loop.call_soon_threadsafe(put)
+        except RuntimeError:
+            logger.debug('Dropping subscription to %s: its event loop is closed', self.channels)
+            self.close()
+
+    async def get(self, timeout=None):
+        return await asyncio.wait_for(self.queue.get(), timeout)
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class InProcessBroker(Broker):
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = {}  # channel -> set of Subscription
+
+    def publish(self, channel, event):
+        with self._lock:
+            targets = list(self._subscribers.get(channel, ()))
+        for subscription in targets:
+            subscription.deliver(event)
+
+    def subscribe(self, channels):
+        subscription = Subscription(self, channels)
+        with self._lock:
+            for channel in channels:
+                self._subscribers.setdefault(channel, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            for channel in subscription.channels:
+                subscribers = self._subscribers.get(channel)
+                if subscribers:
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        del self._subscribers[channel]
+
+
+class DatabaseBroker(InProcessBroker):
+    """Relays events between processes through the ``Event`` table.
+
+    ``publish_many()`` inserts its events in one statement. The first ``subscribe()`` in a process
+    starts a daemon thread that calls ``poll()`` every
+    ``EVENT_POLL_INTERVAL`` seconds and hands new rows to the local
+    subscribers.
+    """
+    # Rows are re-read for this long, so one whose transaction committed after
+    # a later row's is still delivered once (sequence order is not commit order).
+    late_commit_window = timedelta(seconds=10)
+    # Rows older than this are purged by the pollers.
+    retention = timedelta(minutes=10)
+
+    def __init__(self):
+        super().__init__()
+        self._poller = None
+        self._since = None
+        self._floor = None  # nothing published before this is delivered
+        self._seen = {}  # seq -> created_at, for rows inside the window
+        self._purged_at = None
+
+    def publish(self, channel, event):
+        self.publish_many([(channel, event)])
+
+    def publish_many(self, messages):
+        from .models import Event
+
+        Event.objects.bulk_create([Event(channel=channel, payload=event)
+                                   for channel, event in messages])
+
+    def subscribe(self, channels):
+        subscription = super().subscribe(channels)
+        self._start_poller()
+        return subscription
+
+    def _start_poller(self):
+        with self._lock:
+            if self._poller is not None:
+                return
+            self._since = self._floor = timezone.now()
+            self._poller = threading.Thread(target=self._run, name='event-poller', daemon=True)
+        self._poller.start()
+
+    def _run(self):
+        interval = getattr(settings, 'EVENT_POLL_INTERVAL', 1.0)
+        while True:
+            close_old_connections()
+            try:
+                self.poll()
+            except Exception:
+                logger.exception('Polling for events failed')
+            time.sleep(interval)
+
+    def poll(self):
+        """Deliver rows published since the last poll; returns how many."""
+        from .models import Event
+
+        now = timezone.now()
+        with self._lock:
+            idle = not self._subscribers
+        since, self._since = self._since, now
+        if idle:
+            self._floor = now
+            self._seen.clear()
+            return 0
+
+        start = max(since - self.late_commit_window, self._floor)
+        rows = (Event.objects.filter(created_at__gte=start)
+                .order_by('seq').values_list('seq', 'channel', 'payload', 'created_at'))
+        delivered = 0
+        for seq, channel, payload, created_at in rows:
+            if seq in self._seen:
+                continue
+            self._seen[seq] = created_at
+            super().publish(channel, payload)
+            delivered += 1
+        horizon = now - self.late_commit_window
+        self._seen = {seq: at for seq, at in self._seen.items() if at >= horizon}
+
+        if self._purged_at is None or now - self._purged_at > self.retention / 10:
+            Event.objects.filter(created_at__lt=now - self.retention).delete()
+            self._purged_at = now
+        return delivered
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    global _broker
+    with _broker_lock:
+        if _broker is None:
+            _broker = import_string(
+                getattr(settings, 'EVENT_BROKER', 'App.events.DatabaseBroker')
+            )()
+        return _broker
+
+
+def reset_broker():
+    global _broker
+    with _broker_lock:
+        _broker = None
+
+
+def user_channel(user_id):
+    return f'user:{user_id}'
+
+
+def collector_channel(collector_id):
+    return f'collector:{collector_id}'
+
+
+def buy_request_event(buy_request):
+    return {
+        'type': 'buy_request',
+        'id': buy_request.id,
+        'donation': buy_request.donation_id,
+        'status': buy_request.status,
+        'delivery_status': buy_request.delivery_status,
+        'updated_at': buy_request.updated_at.isoformat(),
+    }
+
+
+def notify_buy_request(buy_request, donor_id=None):
+    """Tell the requester, the donor and any assigned collector about a change.
+
+    Publishing waits for the surrounding transaction to commit.
+    """
+    donor_ids = None if donor_id is None else {buy_request.donation_id: donor_id}
+    notify_buy_requests([buy_request], donor_ids)
+
+
+def notify_buy_requests(buy_requests, donor_ids=None):
+    """``notify_buy_request`` for several requests, published as one batch.
+
+    ``donor_ids`` maps donation ids to donor ids for requests whose
+    donation is not loaded.
+    """
+    donor_ids = donor_ids or {}
+    messages = []
+    for buy_request in buy_requests:
+        donor_id = donor_ids.get(buy_request.donation_id)
+        if donor_id is None:
+            donor_id = buy_request.donation.donor_id
+        event = buy_request_event(buy_request)
+        channels = {user_channel(buy_request.requester_id), user_channel(donor_id)}
+        if buy_request.assigned_collector_id:
+            channels.add(collector_channel(buy_request.assigned_collector_id))
+        messages.extend((channel, event) for channel in channels)
+    if messages:
+        transaction.on_commit(lambda: get_broker().publish_many(messages))
@@ -0,0 +1,56 @@
+"""Sweeping expired donations out of the live tables.
+
+Feed queries already hide rows whose ``expires_at`` has passed, so nothing
+waits on the sweeper for correctness. The sweeper makes that state explicit:
+it flags the rows ``is_expired`` (which drops them from the partial feed
+index) and rejects the buy requests still pending on them, notifying the
+requesters. It works in fixed-size batches, each in its own short
+transaction, so a large backlog never holds a long write lock.
+"""
+from django.db import transaction
+from django.utils import timezone
+
+from .events import notify_buy_requests
+
+SWEEP_BATCH_SIZE = 500
+
+
+def sweep_batch(now, batch_size=SWEEP_BATCH_SIZE):
+    """Expire one batch; returns ``(donations, requests)`` changed."""
+    from .models import BuyRequest, ChangeLog, FoodDonation
+
+    with transaction.atomic():
+        batch = list(
+            FoodDonation.objects.filter(is_expired=False, expires_at__lte=now)
+            .order_by('expires_at').values_list('id', 'donor_id')[:batch_size]
+        )
+        if not batch:
+            return 0, 0
+        donors = dict(batch)
+        FoodDonation.objects.filter(pk__in=donors).update(is_expired=True, updated_at=now)
+        pending = list(
+            BuyRequest.objects.filter(donation_id__in=donors, status='pending').order_by()
+            .only('id', 'requester_id', 'donation_id', 'assigned_collector_id', 'delivery_status')
+        )
+        if pending:
+            BuyRequest.objects.filter(pk__in=[br.pk for br in pending]).update(
+                status='rejected', updated_at=now,
+            )
+        ChangeLog.record('donation', list(donors))
+        ChangeLog.record('buy_request', [br.pk for br in pending])
+        for br in pending:
+            br.status, br.updated_at = 'rejected', now
+        notify_buy_requests(pending, donors)
+    return len(batch), len(pending)
+
+
+def sweep(batch_size=SWEEP_BATCH_SIZE, now=None):
+    """Expire every donation past ``expires_at``; returns ``(donations, requests)``."""
+    now = now or timezone.now()
+    donations = requests = 0
+    while True:
+        expired, rejected = sweep_batch(now, batch_size)
+        if not expired:
+            return donations, requests
+        donations += expired
+        requests += rejected
@@ -0,0 +1,94 @@
+from datetime import date, datetime, time, timedelta
+from zoneinfo import ZoneInfo
+
+from django.conf import settings
+from django.db.models import Q
+from rest_framework.exceptions import ValidationError
+
+from .models import DISTRICT_CHOICES, FOOD_TYPE_CHOICES, FOOD_CATEGORY_CHOICES
+
+
+def _choice(params, name, choices):
+    value = params.get(name)
+    if value is None:
+        return None
+    if value not in {c[0] for c in choices}:
+        raise ValidationError({name: f"'{value}' is not a valid choice."})
+    return value
+
+
+def _boolean(params, name):
+    value = params.get(name)
+    if value is None:
+        return None
+    lowered = value.lower()
+    if lowered in ('true', '1', 'yes'):
+        return True
+    if lowered in ('false', '0', 'no'):
+        return False
+    raise ValidationError({name: 'Must be true or false.'})
+
+
+def _date(params, name):
+    value = params.get(name)
+    if value is None:
+        return None
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise ValidationError({name: 'Must be a date in YYYY-MM-DD format.'})
+
+
+def filter_donations(queryset, params):
+    """Apply the donation feed query-string filters to ``queryset``.
+
+    Supported parameters: ``food_type``, ``category``, ``is_sold``,
+    ``district`` (the donor's district), ``expiry_after`` and
+    ``expiry_before`` (``YYYY-MM-DD``). ``expiry_after`` keeps donations
+    with no printed expiry date; ``expiry_before`` only matches dated items.
+    """
+    food_type = _choice(params, 'food_type', FOOD_TYPE_CHOICES)
+    if food_type:
+        queryset = queryset.filter(food_type=food_type)
+
+    category = _choice(params, 'category', FOOD_CATEGORY_CHOICES)
+    if category:
+        queryset = queryset.filter(category=category)
+
+    district = _choice(params, 'district', DISTRICT_CHOICES)
+    if district:
+        queryset = queryset.filter(donor__district=district)
+
+    is_sold = _boolean(params, 'is_sold')
+    if is_sold is not None:
+        queryset = queryset.filter(is_sold=is_sold)
+
+    expiry_after = _date(params, 'expiry_after')
+    if expiry_after:
+        queryset = queryset.filter(
+            Q(expiry_date__isnull=True) | Q(expiry_date__gte=expiry_after)
+        )
+
+    expiry_before = _date(params, 'expiry_before')
+    if expiry_before:
+        queryset = queryset.filter(expiry_date__lte=expiry_before)
+
+    return queryset
+
+
+def report_window(params):
+    """Parse the reporting filters shared by the exports.
+
+    ``since`` and ``until`` are inclusive ``YYYY-MM-DD`` dates in
+    ``LOCAL_TIME_ZONE``; ``district`` is a district choice. Returns
+    ``(start, end, district)`` with aware datetimes bounding ``[start, end)``;
+    missing filters are ``None``.
+    """
+    local = ZoneInfo(getattr(settings, 'LOCAL_TIME_ZONE', settings.TIME_ZONE))
+    since = _date(params, 'since')
+    until = _date(params, 'until')
+    if since and until and since > until:
+        raise ValidationError({'until': 'Must not be before since.'})
+    start = datetime.combine(since, time.min, tzinfo=local) if since else None
+    end = datetime.combine(until + timedelta(days=1), time.min, tzinfo=local) if until else None
+    return start, end, _choice(params, 'district', DISTRICT_CHOICES)
@@ -0,0 +1,141 @@
+"""Geohash cell indexing and great-circle distance helpers.
+
+Donations store an integer geohash: 26 longitude bits interleaved with 26
+latitude bits, longitude first, as in the standard base32 geohash. A cell at
+``level`` bits is a prefix of that integer, so every point inside the cell
+falls in one contiguous integer range. Radius searches turn into a handful
+of indexed range scans followed by exact haversine filtering, which works on
+any database without spatial extensions.
+"""
+import math
+
+EARTH_RADIUS_KM = 6371.0088
+GEOHASH_BITS = 52
+_AXIS_BITS = GEOHASH_BITS // 2
+_KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+# Approximate district headquarters, used as a fallback location for a district.
+DISTRICT_CENTRES = {
+    'thiruvananthapuram': (8.5241, 76.9366),
+    'kollam': (8.8932, 76.6141),
+    'pathanamthitta': (9.2648, 76.7870),
+    'alappuzha': (9.4981, 76.3388),
+    'kottayam': (9.5916, 76.5222),
+    'idukki': (9.8497, 76.9681),
+    'ernakulam': (9.9816, 76.2999),
+    'thrissur': (10.5276, 76.2144),
+    'palakkad': (10.7867, 76.6548),
+    'malappuram': (11.0732, 76.0740),
+    'kozhikode': (11.2588, 75.7804),
+    'wayanad': (11.6854, 76.1320),
+    'kannur': (11.8745, 75.3704),
+    'kasaragod': (12.4996, 74.9869),
+}
+
+
+def _axis_index(value, low, high, bits):
+    span = high - low
+    index = int((value - low) / span * (1 << bits))
+    return min(max(index, 0), (1 << bits) - 1)
+
+
+def _interleave(lng_index, lat_index, bits):
+    code = 0
+    for bit in range(bits - 1, -1, -1):
+        code = (code << 1) | ((lng_index >> bit) & 1)
+        code = (code << 1) | ((lat_index >> bit) & 1)
+    return code
+
+
+def encode(latitude, longitude):
+    """Return the full-precision integer geohash of a point."""
+    return _interleave(
+        _axis_index(longitude, -180.0, 180.0, _AXIS_BITS),
+        _axis_index(latitude, -90.0, 90.0, _AXIS_BITS),
+        _AXIS_BITS,
+    )
+
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    """Great-circle distance between two points in kilometres."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lng2 - lng1)
+    a = (math.sin(d_phi / 2) ** 2
+         + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def bounding_box(latitude, longitude, radius_km):
+    """Return ``(min_lat, max_lat, min_lng, max_lng)`` enclosing the circle."""
+    d_lat = radius_km / _KM_PER_DEGREE
+    cos_lat = math.cos(math.radians(latitude))
+    if cos_lat < 1e-6 or radius_km / (_KM_PER_DEGREE * cos_lat) >= 180:
+        d_lng = 180.0
+    else:
+        d_lng = radius_km / (_KM_PER_DEGREE * cos_lat)
+    return (
+        max(latitude - d_lat, -90.0), min(latitude + d_lat, 90.0),
+        longitude - d_lng, longitude + d_lng,
+    )
+
+
+def _cover_level(min_lat, max_lat, radius_km):
+    """Finest per-axis bit depth whose cells are at least ``radius_km`` wide."""
+    widest_lat = max(abs(min_lat), abs(max_lat))
+    width_factor = _KM_PER_DEGREE * math.cos(math.radians(min(widest_lat, 89.9)))
+    for bits in range(_AXIS_BITS, 0, -1):
+        cells = 1 << bits
+        lat_km = 180.0 / cells * _KM_PER_DEGREE
+        lng_km = 360.0 / cells * width_factor
+        if lat_km >= radius_km and lng_km >= radius_km:
+            return bits
+    return 1
+
+
+def covering_ranges(latitude, longitude, radius_km):
+    """Return merged ``[low, high)`` geohash ranges covering a search circle.
+
+    Cells are chosen at least as wide as the radius, so the bounding box
+    spans at most 3x3 cells and the query needs no more than nine range
+    scans regardless of how many donations exist.
+    """
+    min_lat, max_lat, min_lng, max_lng = bounding_box(latitude, longitude, radius_km)
+    bits = _cover_level(min_lat, max_lat, radius_km)
+    cells = 1 << bits
+    shift = GEOHASH_BITS - 2 * bits
+
+    lat_lo = _axis_index(min_lat, -90.0, 90.0, bits)
+    lat_hi = _axis_index(max_lat, -90.0, 90.0, bits)
+    lng_lo = int(math.floor((min_lng + 180.0) / 360.0 * cells))
+    lng_hi = int(math.floor((max_lng + 180.0) / 360.0 * cells))
+
+    prefixes = {
+        _interleave(lng % cells, lat, bits)
+        for lat in range(lat_lo, lat_hi + 1)
+        for lng in range(lng_lo, min(lng_hi, lng_lo + cells - 1) + 1)
+    }
+
+    ranges = []
+    for prefix in sorted(prefixes):
+        low, high = prefix << shift, (prefix + 1) << shift
+        if ranges and ranges[-1][1] == low:
+            ranges[-1][1] = high
+        else:
+            ranges.append([low, high])
+    return [tuple(r) for r in ranges]
+
+
+def rank_by_distance(points, latitude, longitude, radius_km, limit=None):
+    """Exact refinement of index candidates.
+
+    ``points`` is an iterable of ``(key, lat, lng)``; returns
+    ``[(key, distance_km), ...]`` within ``radius_km``, nearest first.
+    """
+    ranked = []
+    for key, lat, lng in points:
+        distance = haversine_km(latitude, longitude, lat, lng)
+        if distance <= radius_km:
+            ranked.append((key, distance))
+    ranked.sort(key=lambda item: item[1])
+    return ranked[:limit] if limit is not None else ranked
@@ -0,0 +1,97 @@
+"""Downscaled renditions of donation photos.
+
+Every upload is re-encoded once into a fixed set of sizes so feed cards and
+request lists never download the raw camera image. Storage is content
+addressed (see ``media.py``), so a photo that was already uploaded reuses
+the renditions made for it the first time instead of decoding it again.
+"""
+import io
+import logging
+import os
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.utils import timezone
+from PIL import Image, ImageOps, UnidentifiedImageError, features
+
+from .media import content_digest, retain
+from .tasks import task
+
+logger = logging.getLogger(__name__)
+
+# name -> longest edge in pixels
+RENDITIONS = {
+    'thumbnail': 160,
+    'card': 480,
+    'full': 1280,
+}
+
+
+def _encode(image):
+    """Encode as WebP when Pillow supports it, otherwise as progressive JPEG."""
+    buffer = io.BytesIO()
+    if features.check('webp'):
+        image.save(buffer, 'WEBP', quality=80, method=4)
+        return buffer.getvalue(), 'webp'
+    image.save(buffer, 'JPEG', quality=80, optimize=True, progressive=True)
+    return buffer.getvalue(), 'jpg'
+
+
+def build_renditions(image_name):
+    """Write every rendition of ``image_name`` to storage.
+
+    Returns ``{rendition: storage_name}``, or ``{}`` when the source cannot
+    be decoded.
+    """
+    try:
+        with default_storage.open(image_name, 'rb') as source:
+            original = Image.open(source)
+            original.load()
+    except (OSError, UnidentifiedImageError):
+        logger.warning('Cannot decode %s; skipping renditions', image_name)
+        return {}
+
+    original = ImageOps.exif_transpose(original).convert('RGB')
+    stem = os.path.splitext(os.path.basename(image_name))[0]
+    names = {}
+    for rendition, edge in RENDITIONS.items():
+        image = original.copy()
+        image.thumbnail((edge, edge), Image.LANCZOS)
+        data, ext = _encode(image)
+        path = os.path.join('food_donations', 'renditions', f'{stem}_{rendition}.{ext}')
+        names[rendition] = default_storage.save(path, ContentFile(data))
+    return names
+
+
+@task
+def generate_donation_renditions(donation_id, reuse=True):
+    from .models import ChangeLog, FoodDonation
+
+    donation = FoodDonation.objects.filter(pk=donation_id).only('image', 'renditions').first()
+    if donation is None or not donation.image:
+        return
+    renditions = _existing_renditions(donation) if reuse else {}
+    if renditions:
+        retain(renditions.values())
+    else:
+        renditions = build_renditions(donation.image.name)
+    if renditions:
+        FoodDonation.objects.filter(pk=donation_id).update(
+            renditions=renditions, updated_at=timezone.now(),
+        )
+        ChangeLog.record('donation', [donation_id])
+        for name in donation.renditions.values():  # every save or retain added a reference
+            default_storage.delete(name)
+
+
+def _existing_renditions(donation):
+    """Complete renditions of another donation with the same image bytes, or ``{}``."""
+    from .models import FoodDonation
+
+    if content_digest(donation.image.name) is None:
+        return {}
+    for renditions in (FoodDonation.objects.filter(image=donation.image.name)
+                       .exclude(pk=donation.pk).values_list('renditions', flat=True)[:5]):
+        if set(renditions) == set(RENDITIONS):
+            return renditions
+    return {}
@@ -0,0 +1,358 @@
+"""Concurrent end-to-end load test of the donation lifecycle.
+
+Each *flow* walks one donation through the whole app the way the mobile
+clients do:
+
+1. a donor posts a photo (``/api/donate/``),
+2. several requesters ask for it at once (``/api/buy-request/``),
+3. the donor accepts one of them; with ``race`` the donor double-taps two
+   requests at once, and one accept must lose with ``409``,
+4. the requester reads the receiver OTP and the assigned collector from
+   ``/api/buy-requests/sent/``, polling until a collector is assigned,
+5. that collector verifies the sender OTP, then the receiver OTP.
+
+``run()`` drives ``concurrency`` asyncio workers, each running flows back to
+back. Calls go through a transport: ``InProcessTransport`` uses DRF's test
+client in worker threads (sync views run concurrently, as under a threaded
+server), and ``HTTPTransport`` talks to a running server. Both are blocking,
+so workers call them through ``asyncio.to_thread``.
+
+``Recorder`` keeps per-step latencies and outcomes. ``409`` counts as
+contention and ``429`` as throttling, not as errors.
+"""
+import asyncio
+import http.client
+import io
+import json
+import threading
+import time
+import uuid
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode, urlsplit
+
+from django.contrib.auth.hashers import make_password
+from PIL import Image
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from .bench import MEALS, percentile, random_point
+from .geo import DISTRICT_CENTRES
+
+STEPS = ['donate', 'request', 'accept', 'poll', 'collect', 'deliver']
+
+
+class FlowError(Exception):
+    """A step got a response the flow cannot continue from."""
+
+
+class InProcessTransport:
+    """Calls the app in this process through DRF's test client."""
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def request(self, method, path, token, data=None, files=None):
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            client = self._local.client = APIClient()
+        headers = {'HTTP_AUTHORIZATION': f'Token {token}'}
+        if method == 'GET':
+            response = client.get(path, data, **headers)
+        elif files:
+            payload = dict(data or {})
+            for name, (filename, content, content_type) in files.items():
+                upload = io.BytesIO(content)
+                upload.name = filename
+                payload[name] = upload
+            response = client.post(path, payload, format='multipart', **headers)
+        else:
+            response = client.post(path, data or {}, format='json', **headers)
+        body = response.json() if response.get('Content-Type', '').startswith(
+            'application/json') else None
+        return response.status_code, body
+
+
+def encode_multipart(fields, files):
+    boundary = uuid.uuid4().hex
+    parts = []
+    for name, value in fields.items():
+        parts.append(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n'
+                     f'{value}\r\n'.encode())
+    for name, (filename, content, content_type) in files.items():
+        parts.append(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"; '
+                     f'filename="{filename}"\r\nContent-Type: {content_type}\r\n\r\n'.encode())
+        parts.append(content + b'\r\n')
+    parts.append(f'--{boundary}--\r\n'.encode())
+    return b''.join(parts), f'multipart/form-data; boundary={boundary}'
+
+
+class HTTPTransport:
+    """Calls a running server, keeping one persistent connection per thread."""
+
+    def __init__(self, base_url, timeout=30):
+        url = urlsplit(base_url)
+        self.scheme, self.netloc, self.prefix = url.scheme, url.netloc, url.path.rstrip('/')
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            factory = (http.client.HTTPSConnection if self.scheme == 'https'
+                       else http.client.HTTPConnection)
+            connection = self._local.connection = factory(self.netloc, timeout=self.timeout)
+        return connection
+
+    def request(self, method, path, token, data=None, files=None):
+        headers = {'Authorization': f'Token {token}', 'Accept': 'application/json'}
+        url, body = self.prefix + path, None
+        if method == 'GET':
+            if data:
+                url += '?' + urlencode(data)
+        elif files:
+            body, headers['Content-Type'] = encode_multipart(data or {}, files)
+        else:
+            body = json.dumps(data or {}).encode()
+            headers['Content-Type'] = 'application/json'
+        for attempt in (1, 2):
+            connection = self._connection()
+            try:
+                connection.request(method, url, body=body, headers=headers)
+                response = connection.getresponse()
+                raw = response.read()
+                break
+            except (http.client.HTTPException, ConnectionError):
+                # The server closed an idle keep-alive connection; reconnect once.
+                connection.close()
+                self._local.connection = None
+                if attempt == 2:
+                    raise
+        content_type = response.getheader('Content-Type', '')
+        return response.status, json.loads(raw) if content_type.startswith(
+            'application/json') else None
+
+
+class Recorder:
+    """Per-step latencies and outcome counts; only touched from the event loop thread."""
+
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.outcomes = defaultdict(Counter)
+        self.flow_latencies = []
+        self.flows = Counter()
+        self.failures = Counter()
+
+    def record(self, step, status, seconds):
+        self.latencies[step].append(seconds * 1000)
+        if status is None:
+            outcome = 'exception'
+        elif status < 400:
+            outcome = 'ok'
+        elif status == 409:
+            outcome = 'conflict'
+        elif status == 429:
+            outcome = 'throttled'
+        else:
+            outcome = 'error'
+        self.outcomes[step][outcome] += 1
+
+    def summary(self, elapsed):
+        """Rows for the report: one per step, then the whole flow."""
+        requests = sum(len(samples) for samples in self.latencies.values())
+        rows = []
+        for step in STEPS:
+            samples = self.latencies.get(step)
+            if not samples:
+                continue
+            outcomes = self.outcomes[step]
+            rows.append({
+                'step': step, 'calls': len(samples),
+                'p50': percentile(samples, 50), 'p95': percentile(samples, 95),
+                'p99': percentile(samples, 99),
+                'errors': outcomes['error'] + outcomes['exception'],
+                'conflicts': outcomes['conflict'], 'throttled': outcomes['throttled'],
+            })
+        return {
+            'elapsed': elapsed,
+            'completed': self.flows['completed'],
+            'failed': self.flows['failed'],
+            'flows_per_second': self.flows['completed'] / elapsed if elapsed else 0.0,
+            'requests_per_second': requests / elapsed if elapsed else 0.0,
+            'flow_p50': percentile(self.flow_latencies, 50) if self.flow_latencies else 0.0,
+            'flow_p95': percentile(self.flow_latencies, 95) if self.flow_latencies else 0.0,
+            'flow_p99': percentile(self.flow_latencies, 99) if self.flow_latencies else 0.0,
+            'steps': rows,
+            'failures': dict(self.failures.most_common(5)),
+        }
+
+
+class Cast:
+    """The users a run plays: donors, requesters and collectors with their tokens."""
+
+    def __init__(self, donors, requesters, collectors):
+        self.donors = donors          # [(token, district)]
+        self.requesters = requesters  # {district: [(token, user id)]}
+        self.collectors = collectors  # {full name: token}
+
+
+def create_cast(donors, requesters, districts=None, collectors_per_district=2):
+    """Create flow users and tokens in the current database, under a fresh ``flow-`` prefix.
+
+    Each kind of user is spread round-robin over ``districts``.
+    """
+    from .models import CustomUser, FoodWasteCollector
+
+    run = uuid.uuid4().hex[:8]
+    password = make_password(None)
+    districts = districts or list(DISTRICT_CENTRES)
+    serial = iter(range(10 ** 4))
+
+    def make(kind, count, user_type='citizen'):
+        users = []
+        for i in range(count):
+            n = next(serial)
+            users.append(CustomUser(
+                username=f'flow-{run}-{kind}{i}', password=password,
+                full_name=f'Flow {kind.title()} {run}-{i}',
+                phone=f'5{int(run, 16) % 10 ** 5:05d}{n:04d}', pin_code='680001',
+                district=districts[i % len(districts)], user_type=user_type,
+            ))
+        users = CustomUser.objects.bulk_create(users)
+        tokens = Token.objects.bulk_create([
+            Token(key=Token.generate_key(), user=user) for user in users
+        ])
+        return list(zip(users, tokens))
+
+    donor_rows = make('donor', donors, 'restaurant')
+    requester_rows = make('requester', requesters)
+    collector_rows = make('collector', collectors_per_district * len(districts), 'collector')
+    FoodWasteCollector.objects.bulk_create([
+        FoodWasteCollector(user=user, employee_id=f'F{run}{i:04d}'[:20], district=user.district,
+                           latitude=DISTRICT_CENTRES[user.district][0],
+                           longitude=DISTRICT_CENTRES[user.district][1])
+        for i, (user, _) in enumerate(collector_rows)
+    ])
+    by_district = defaultdict(list)
+    for user, token in requester_rows:
+        by_district[user.district].append((token.key, user.id))
+    return Cast(
+        donors=[(token.key, user.district) for user, token in donor_rows],
+        requesters=dict(by_district),
+        collectors={user.full_name: token.key for user, token in collector_rows},
+    )
+
+
+def photo(rng, size=(320, 240)):
+    """A small JPEG with a random colour, so analysis results are not all cache hits."""
+    buffer = io.BytesIO()
+    colour = tuple(rng.randrange(256) for _ in range(3))
+    Image.new('RGB', size, colour).save(buffer, 'JPEG', quality=80)
+    return buffer.getvalue()
+
+
+class FlowRunner:
+    def __init__(self, transport, cast, rng, recorder, requesters_per_flow=3, race=True,
+                 poll_interval=0.05, poll_timeout=10.0):
+        self.transport = transport
+        self.cast = cast
+        self.rng = rng
+        self.recorder = recorder
+        self.requesters_per_flow = requesters_per_flow
+        self.race = race
+        self.poll_interval = poll_interval
+        self.poll_timeout = poll_timeout
+
+    async def call(self, step, method, path, token, data=None, files=None, expect=(200, 201)):
+        start = time.perf_counter()
+        try:
+            status, body = await asyncio.to_thread(
+                self.transport.request, method, path, token, data, files,
+            )
+        except Exception as exc:
+            self.recorder.record(step, None, time.perf_counter() - start)
+            raise FlowError(f'{step}: {type(exc).__name__}') from exc
+        self.recorder.record(step, status, time.perf_counter() - start)
+        if status not in expect:
+            raise FlowError(f'{step}: HTTP {status}')
+        return status, body
+
+    async def flow(self):
+        rng = self.rng
+        donor, district = rng.choice(self.cast.donors)
+        _, lat, lng = random_point(rng, district, spread_km=5)
+        _, body = await self.call('donate', 'POST', '/api/donate/', donor, data={
+            'title': f'{rng.choice(MEALS).capitalize()} for {rng.randint(2, 30)}',
+            'food_type': 'homecooked', 'safety_hours': 6,
+            'latitude': f'{lat:.6f}', 'longitude': f'{lng:.6f}',
+        }, files={'image': ('food.jpg', photo(rng), 'image/jpeg')}, expect=(201,))
+        donation_id = body['donation']['id']
+
+        neighbours = self.cast.requesters[district]
+        asked = rng.sample(neighbours, min(self.requesters_per_flow, len(neighbours)))
+        sent = await asyncio.gather(*(
+            self.call('request', 'POST', '/api/buy-request/', token,
+                      data={'donation': donation_id}, expect=(201,))
+            for token, _ in asked
+        ))
+        request_ids = [body['request']['id'] for _, body in sent]
+        owners = {request_id: token for request_id, (token, _) in zip(request_ids, asked)}
+
+        # Two taps on different requests at once: exactly one may win.
+        contenders = request_ids[:2] if self.race else request_ids[:1]
+        answers = await asyncio.gather(*(
+            self.call('accept', 'POST', f'/api/buy-requests/{pk}/respond/', donor,
+                      data={'action': 'accept'}, expect=(200, 409))
+            for pk in contenders
+        ))
+        winners = [body['request'] for status, body in answers if status == 200]
+        if len(winners) != 1:
+            raise FlowError(f'accept: {len(winners)} winners')
+        accepted = winners[0]
+
+        requester = owners[accepted['id']]
+        deadline = time.monotonic() + self.poll_timeout
+        while True:
+            _, rows = await self.call('poll', 'GET', '/api/buy-requests/sent/', requester)
+            row = next((r for r in rows if r['id'] == accepted['id']), None)
+            if row and row['collector_name']:
+                break
+            if time.monotonic() > deadline:
+                raise FlowError('poll: no collector assigned')
+            await asyncio.sleep(self.poll_interval)
+        collector = self.cast.collectors.get(row['collector_name'])
+        if collector is None:
+            raise FlowError('poll: assigned to a collector outside this run')
+
+        path = f'/api/collector/verify-otp/{accepted["id"]}/'
+        await self.call('collect', 'POST', path, collector, data={'otp': accepted['sender_otp']})
+        await self.call('deliver', 'POST', path, collector, data={'otp': row['receiver_otp']})
+
+    async def worker(self, remaining, deadline):
+        while remaining[0] > 0 and time.monotonic() < deadline:
+            remaining[0] -= 1
+            start = time.perf_counter()
+            try:
+                await self.flow()
+            except FlowError as exc:
+                self.recorder.flows['failed'] += 1
+                self.recorder.failures[str(exc)] += 1
+            else:
+                self.recorder.flows['completed'] += 1
+                self.recorder.flow_latencies.append((time.perf_counter() - start) * 1000)
+
+
+async def run(runner, concurrency, flows, duration=None):
+    """Run ``flows`` flows (or until ``duration`` seconds pass) on ``concurrency`` workers."""
+    loop = asyncio.get_running_loop()
+    # Each worker may have several calls in flight (the parallel buy requests).
+    executor = ThreadPoolExecutor(max_workers=concurrency * (runner.requesters_per_flow + 1))
+    loop.set_default_executor(executor)
+    remaining = [flows]
+    deadline = time.monotonic() + (duration or float('inf'))
+    start = time.perf_counter()
+    try:
+        await asyncio.gather(*(runner.worker(remaining, deadline) for _ in range(concurrency)))
+    finally:
+        executor.shutdown(wait=True)
+    return runner.recorder.summary(time.perf_counter() - start)
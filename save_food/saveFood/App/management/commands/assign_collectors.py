@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from App.assignment import assign_pending
+from App.models import FoodWasteCollector
+
+
+class Command(BaseCommand):
+    help = ('Assign collectors to accepted requests that do not have one yet. '
+            'Run periodically (e.g. from cron) as a sweep behind the on-accept job.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=None,
+                            help='Assign at most this many requests.')
+        parser.add_argument('--recount', action='store_true',
+                            help='Recompute every collector load first.')
+
+    def handle(self, *args, **options):
+        if options['recount']:
+            FoodWasteCollector.refresh_load(
+                list(FoodWasteCollector.objects.values_list('id', flat=True))
+            )
+        assigned, skipped = assign_pending(options['limit'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Assigned {assigned} request(s); {skipped} left without an active collector.'
+        ))
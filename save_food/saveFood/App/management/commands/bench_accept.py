@@ -0,0 +1,93 @@
+import logging
+import threading
+import time
+from collections import Counter
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from App.bench import isolated_database, percentile
+from App.models import BuyRequest, CustomUser, FoodDonation
+
+
+class Command(BaseCommand):
+    help = ('Race several accepts for the same donation from parallel threads and '
+            'check that exactly one wins, reporting latency and queries per accept.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--donations', type=int, default=50)
+        parser.add_argument('--contenders', type=int, default=8,
+                            help='Concurrent accepts per donation.')
+
+    def handle(self, *args, **options):
+        contenders = options['contenders']
+        # Losing accepts are expected 409s; keep them out of the report.
+        logging.getLogger('django.request').setLevel(logging.ERROR)
+        with isolated_database(on_disk=True):
+            donor, rounds = self.seed(options['donations'], contenders)
+            outcomes, latencies, winner_queries = Counter(), [], []
+            lock = threading.Lock()
+
+            def accept(buy_request_id, barrier):
+                client = APIClient()
+                client.force_authenticate(donor)
+                barrier.wait()
+                try:
+                    with CaptureQueriesContext(connection) as ctx:
+                        start = time.perf_counter()
+                        response = client.post(f'/api/buy-requests/{buy_request_id}/respond/',
+                                               {'action': 'accept'})
+                        elapsed = (time.perf_counter() - start) * 1000
+                finally:
+                    connection.close()
+                with lock:
+                    outcomes[response.status_code] += 1
+                    latencies.append(elapsed)
+                    if response.status_code == 200:
+                        winner_queries.append(len(ctx.captured_queries))
+
+            for request_ids in rounds:
+                barrier = threading.Barrier(len(request_ids))
+                threads = [threading.Thread(target=accept, args=(pk, barrier)) for pk in request_ids]
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+
+            winners = Counter(BuyRequest.objects.filter(status='accepted')
+                              .values_list('donation_id', flat=True))
+            donations = len(rounds)
+            self.stdout.write(f'{donations} donations x {contenders} concurrent accepts')
+            self.stdout.write(f'responses: {dict(sorted(outcomes.items()))}')
+            self.stdout.write(f'accepted per donation: {dict(Counter(winners.values()))}')
+            self.stdout.write(
+                f'latency ms p50 {percentile(latencies, 50):.1f}  p95 {percentile(latencies, 95):.1f}  '
+                f'queries per winning accept {percentile(winner_queries, 50)}'
+            )
+            pending = BuyRequest.objects.filter(status='pending').count()
+            if len(winners) != donations or set(winners.values()) != {1} or pending:
+                raise CommandError('Expected exactly one accepted request per donation.')
+            self.stdout.write(self.style.SUCCESS('Exactly one winner per donation.'))
+
+    def seed(self, donations, contenders):
+        donor = CustomUser.objects.create(
+            username='bench-donor', full_name='Bench Donor', phone='0000000000',
+            pin_code='682001', district='ernakulam',
+        )
+        requesters = CustomUser.objects.bulk_create([
+            CustomUser(username=f'bench-r{i}', full_name=f'Requester {i}', phone=f'1{i:09d}',
+                       pin_code='682001', district='ernakulam')
+            for i in range(contenders)
+        ])
+        rounds = []
+        for i in range(donations):
+            donation = FoodDonation.objects.create(
+                donor=donor, title=f'Meal {i}', food_type='homecooked',
+                image='food_donations/bench.jpg', latitude=9.98, longitude=76.3,
+            )
+            rounds.append([
+                BuyRequest.objects.create(requester=r, donation=donation).id for r in requesters
+            ])
+        return donor, rounds
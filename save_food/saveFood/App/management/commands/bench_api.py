@@ -0,0 +1,175 @@
+import json
+import statistics
+import time
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from django.test import override_settings
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from App import authentication, search
+from App.metrics import QueryRecorder
+from App.bench import MEALS, isolated_database, make_rng, percentile, random_point, seed_load
+from App.models import BuyRequest, CustomUser, FoodDonation, FoodWasteCollector
+
+
+class Command(BaseCommand):
+    help = ('Benchmark the main API endpoints end to end on synthetic data (see seed_load) '
+            'in a throwaway database, reporting p50/p95/p99 latency, queries and payload '
+            'size. --save writes the results; --baseline fails on regressions against them.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000],
+                            help='Donation counts to measure at; rows accumulate between sizes.')
+        parser.add_argument('--requests', type=int, default=200, help='Calls per endpoint.')
+        parser.add_argument('--warm', action='store_true',
+                            help='Keep the response cache between calls (default: clear it, '
+                                 'so every call serializes).')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--save', help='Write results as JSON to this file.')
+        parser.add_argument('--baseline', help='JSON results from an earlier --save to compare to.')
+        parser.add_argument('--tolerance', type=float, default=25.0,
+                            help='Allowed p95 slowdown against the baseline, in percent.')
+
+    def handle(self, *args, **options):
+        rng = make_rng(options['seed'])
+        results = {}
+        settings = override_settings(ALLOWED_HOSTS=['testserver'], METRICS_SLOW_REQUEST_MS=None)
+        with isolated_database(on_disk=True), settings:
+            search.reset_backend()
+            authentication.reset_token_cache()
+            total = 0
+            for size in sorted(options['sizes']):
+                start = time.perf_counter()
+                seed_load(rng, size - total)
+                total = size
+                self.stderr.write(f'  seeded {size} donations in {time.perf_counter() - start:.1f}s')
+                results[str(size)] = self.measure(rng, options)
+                self.report(size, results[str(size)])
+            authentication.reset_token_cache()
+
+        if options['save']:
+            with open(options['save'], 'w') as out:
+                json.dump(results, out, indent=2, sort_keys=True)
+        if options['baseline']:
+            self.compare(results, options['baseline'], options['tolerance'])
+
+    def actors(self):
+        """Tokens for a typical and the busiest user in each role."""
+        def typical_and_busiest(rows):
+            rows = sorted(rows, key=lambda row: row[1])
+            return rows[len(rows) // 2][0], rows[-1][0]
+
+        donors = FoodDonation.objects.values_list('donor').annotate(n=Count('id'))
+        requesters = BuyRequest.objects.values_list('requester').annotate(n=Count('id'))
+        collectors = BuyRequest.objects.filter(status='accepted').values_list(
+            'assigned_collector__user').annotate(n=Count('id'))
+        ids = {}
+        ids['donor'], ids['busiest donor'] = typical_and_busiest(donors)
+        ids['requester'], _ = typical_and_busiest(requesters)
+        ids['collector'], ids['busiest collector'] = typical_and_busiest(collectors)
+        tokens = {}
+        for role, user_id in ids.items():
+            token, _ = Token.objects.get_or_create(user_id=user_id)
+            tokens[role] = token.key
+        return tokens
+
+    def endpoints(self, rng):
+        """``name -> (role or None, callable returning (path, params))``."""
+        def feed():
+            params = rng.choice([{}, {'district': random_point(rng)[0]},
+                                 {'food_type': 'homecooked'}, {'page_size': 100}])
+            return '/api/donations/', params
+
+        def nearby():
+            _, lat, lng = random_point(rng)
+            return '/api/donations/nearby/', {'lat': lat, 'lng': lng, 'radius_km': 5}
+
+        def found():
+            return '/api/donations/search/', {'q': rng.choice(MEALS)}
+
+        def fixed(path):
+            return lambda: (path, {})
+
+        return {
+            'donations': (None, feed),
+            'donations nearby': (None, nearby),
+            'donations search': (None, found),
+            'my donations': ('donor', fixed('/api/my-donations/')),
+            'my donations (busiest)': ('busiest donor', fixed('/api/my-donations/')),
+            'received requests': ('donor', fixed('/api/buy-requests/received/')),
+            'received requests (busiest)': ('busiest donor', fixed('/api/buy-requests/received/')),
+            'sent requests': ('requester', fixed('/api/buy-requests/sent/')),
+            'collector dashboard': ('collector', fixed('/api/collector/dashboard/')),
+            'collector dashboard (busiest)': ('busiest collector',
+                                              fixed('/api/collector/dashboard/')),
+        }
+
+    def measure(self, rng, options):
+        tokens = self.actors()
+        measured = {}
+        for name, (role, make_call) in self.endpoints(rng).items():
+            client = APIClient()
+            if role:
+                client.credentials(HTTP_AUTHORIZATION=f'Token {tokens[role]}')
+            calls = [make_call() for _ in range(options['requests'])]
+
+            def call(path, params):
+                if not options['warm']:
+                    cache.clear()
+                response = client.get(path, params)
+                if response.status_code != 200:
+                    raise CommandError(f'{name}: {path} returned {response.status_code}')
+                return response
+
+            call(*calls[0])  # warm the token cache and connection
+            queries = QueryRecorder()
+            with connection.execute_wrapper(queries):
+                call(*calls[0])
+            samples, sizes = [], []
+            for path, params in calls:
+                start = time.perf_counter()
+                response = call(path, params)
+                samples.append((time.perf_counter() - start) * 1000)
+                sizes.append(len(response.content))
+            measured[name] = {
+                'p50': percentile(samples, 50),
+                'p95': percentile(samples, 95),
+                'p99': percentile(samples, 99),
+                'queries': queries.count,
+                'bytes': int(statistics.median(sizes)),
+            }
+        return measured
+
+    def report(self, size, measured):
+        self.stdout.write(f'\n{size} donations, {FoodDonation.objects.live().count()} live, '
+                          f'{BuyRequest.objects.count()} buy requests, '
+                          f'{FoodWasteCollector.objects.count()} collectors, '
+                          f'{CustomUser.objects.count()} users')
+        self.stdout.write(f'{"endpoint":<31} {"p50 ms":>8} {"p95 ms":>8} {"p99 ms":>8} '
+                          f'{"queries":>8} {"bytes":>10}')
+        for name, row in measured.items():
+            self.stdout.write(f'{name:<31} {row["p50"]:>8.2f} {row["p95"]:>8.2f} '
+                              f'{row["p99"]:>8.2f} {row["queries"]:>8} {row["bytes"]:>10}')
+
+    def compare(self, results, path, tolerance):
+        with open(path) as f:
+            baseline = json.load(f)
+        regressions = []
+        for size, measured in results.items():
+            for name, row in measured.items():
+                before = baseline.get(size, {}).get(name)
+                if before is None:
+                    continue
+                if row['queries'] > before['queries']:
+                    regressions.append(f'{name} @ {size}: {before["queries"]} -> '
+                                       f'{row["queries"]} queries')
+                if row['p95'] > before['p95'] * (1 + tolerance / 100):
+                    regressions.append(f'{name} @ {size}: p95 {before["p95"]:.2f} -> '
+                                       f'{row["p95"]:.2f} ms')
+        if regressions:
+            raise CommandError('Regressions against the baseline:\n  ' + '\n  '.join(regressions))
+        self.stdout.write(self.style.SUCCESS(f'No regressions against {path}.'))
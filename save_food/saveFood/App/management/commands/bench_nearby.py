@@ -0,0 +1,96 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from App import geo
+from App.bench import isolated_database, make_rng, percentile, random_point, time_calls
+from App.models import CustomUser, FoodDonation
+
+TILE_ROWS = 10_000
+
+
+class Command(BaseCommand):
+    help = ('Benchmark /api/donations/nearby/ lookups on synthetic donations '
+            'in a throwaway database, comparing the geohash index to a full scan.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+',
+                            default=[10_000, 100_000, 1_000_000])
+        parser.add_argument('--queries', type=int, default=200)
+        parser.add_argument('--radius-km', type=float, default=5.0)
+        parser.add_argument('--scan-limit', type=int, default=100_000,
+                            help='Skip the full-scan baseline above this many rows.')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument(
+            '--layout', choices=['kerala', 'tiled'], default='kerala',
+            help="'kerala' packs every row around the district centres, so local "
+                 "density grows with the table; 'tiled' adds 1x1 degree tiles of "
+                 "TILE_ROWS rows each, keeping density fixed as the table grows.")
+
+    def handle(self, *args, **options):
+        rng = make_rng(options['seed'])
+        radius = options['radius_km']
+        self.point = random_point if options['layout'] == 'kerala' else self.tiled_point
+
+        with isolated_database():
+            donor = CustomUser.objects.create(
+                username='bench', full_name='Bench Donor', phone='0000000000',
+                pin_code='000000', district='ernakulam',
+            )
+            total = 0
+            self.stdout.write(
+                f'{"rows":>10} {"index p50":>10} {"index p95":>10} '
+                f'{"candidates":>11} {"results":>8} {"scan p50":>10}'
+            )
+            for size in sorted(options['sizes']):
+                total = self.grow(donor, rng, total, size)
+                self.tiles = max(1, total // TILE_ROWS)
+                probes = [self.point(rng)[1:] for _ in range(options['queries'])]
+
+                candidates, results = [], []
+
+                def indexed(lat, lng):
+                    rows = list(FoodDonation.objects.near(lat, lng, radius)
+                                .values_list('id', 'latitude', 'longitude'))
+                    candidates.append(len(rows))
+                    results.append(len(geo.rank_by_distance(rows, lat, lng, radius)))
+
+                def scan(lat, lng):
+                    rows = FoodDonation.objects.values_list('id', 'latitude', 'longitude')
+                    geo.rank_by_distance(rows, lat, lng, radius)
+
+                samples = time_calls(indexed, probes)
+                scan_p50 = '-'
+                if size <= options['scan_limit']:
+                    scan_p50 = f'{percentile(time_calls(scan, probes[:20]), 50):.2f}'
+                self.stdout.write(
+                    f'{size:>10} {percentile(samples, 50):>10.2f} '
+                    f'{percentile(samples, 95):>10.2f} '
+                    f'{sum(candidates) / len(candidates):>11.1f} '
+                    f'{sum(results) / len(results):>8.1f} {scan_p50:>10}'
+                )
+        self.stdout.write('Latencies in ms; candidates = rows read per lookup, '
+                          'results = rows inside the radius.')
+
+    def tiled_point(self, rng):
+        tile = rng.randrange(self.tiles)
+        lat = -60 + (tile // 60) * 2 + rng.random()
+        lng = -120 + (tile % 60) * 2 + rng.random()
+        return None, lat, lng
+
+    def grow(self, donor, rng, current, target, batch_size=5000):
+        start = time.perf_counter()
+        while current < target:
+            batch = []
+            for offset in range(min(batch_size, target - current)):
+                self.tiles = (current + offset) // TILE_ROWS + 1
+                _, lat, lng = self.point(rng)
+                batch.append(FoodDonation(
+                    donor=donor, title='Synthetic meal', food_type='homecooked',
+                    image='food_donations/bench.jpg', latitude=lat, longitude=lng,
+                    geohash=geo.encode(lat, lng),
+                ))
+            FoodDonation.objects.bulk_create(batch)
+            current += len(batch)
+        self.stderr.write(f'  seeded {target} rows in {time.perf_counter() - start:.1f}s')
+        return current
@@ -0,0 +1,69 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from App import routing
+from App.bench import make_rng, random_point
+
+
+class Command(BaseCommand):
+    help = ('Benchmark the collector route planner on synthetic tours, comparing '
+            'request order, the greedy tour and the 2-opt improved tour.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--stops', type=int, nargs='+', default=[10, 100, 1000])
+        parser.add_argument('--time-budget', type=float, default=None,
+                            help='Cap on 2-opt seconds; unlimited by default.')
+        parser.add_argument('--district', default='ernakulam')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = make_rng(options['seed'])
+        self.stdout.write(
+            f'{"stops":>6} {"matrix ms":>10} {"greedy ms":>10} {"2-opt ms":>10} '
+            f'{"request km":>11} {"greedy km":>10} {"2-opt km":>9}'
+        )
+        for count in options['stops']:
+            stops = self.make_stops(rng, count, options['district'])
+            _, lat, lng = random_point(rng, options['district'])
+            points = [(s.latitude, s.longitude) for s in stops] + [(lat, lng)]
+            index = {s.key: k for k, s in enumerate(stops)}
+            before = [index.get(s.after) for s in stops] + [None]
+            origin = len(stops)
+
+            start = time.perf_counter()
+            dist = routing.distance_matrix(points)
+            matrix_ms = (time.perf_counter() - start) * 1000
+
+            start = time.perf_counter()
+            greedy = routing.nearest_neighbour(dist, before, origin)
+            greedy_ms = (time.perf_counter() - start) * 1000
+
+            budget = options['time_budget']
+            start = time.perf_counter()
+            improved = routing.two_opt(
+                list(greedy), dist, before, fixed_start=True,
+                deadline=start + budget if budget is not None else None,
+            )
+            two_opt_ms = (time.perf_counter() - start) * 1000
+
+            # What a collector gets today: each request picked up then dropped, oldest first.
+            naive = [origin] + list(range(len(stops)))
+            self.stdout.write(
+                f'{count:>6} {matrix_ms:>10.1f} {greedy_ms:>10.1f} {two_opt_ms:>10.1f} '
+                f'{routing.path_length(naive, dist):>11.1f} '
+                f'{routing.path_length(greedy, dist):>10.1f} '
+                f'{routing.path_length(improved, dist):>9.1f}'
+            )
+
+    @staticmethod
+    def make_stops(rng, count, district):
+        """``count`` stops as pickup/drop-off pairs, in request order."""
+        stops = []
+        for i in range(count // 2):
+            pickup = ('pickup', i)
+            stops.append(routing.Stop(pickup, *random_point(rng, district)[1:]))
+            stops.append(routing.Stop(('dropoff', i), *random_point(rng, district)[1:], after=pickup))
+        if count % 2:
+            stops.append(routing.Stop(('dropoff', count // 2), *random_point(rng, district)[1:]))
+        return stops
@@ -0,0 +1,129 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+from rest_framework.test import APIRequestFactory
+
+from App import geo, search, views
+from App.bench import isolated_database, make_rng, percentile, random_point, time_calls
+from App.models import CustomUser, FoodDonation
+
+DISHES = [
+    'biryani', 'sambar', 'rice', 'chapati', 'parotta', 'appam', 'puttu', 'idli', 'dosa',
+    'avial', 'thoran', 'payasam', 'curry', 'fish', 'chicken', 'mutton', 'egg', 'paneer',
+    'dal', 'pulao', 'upma', 'vada', 'bread', 'cake', 'banana', 'mango', 'jackfruit',
+    'tapioca', 'kappa', 'pickle', 'curd', 'milk', 'biscuits', 'noodles', 'sandwich',
+]
+WORDS = [
+    'fresh', 'homemade', 'leftover', 'packed', 'spicy', 'sweet', 'veg', 'meals', 'lunch',
+    'dinner', 'breakfast', 'party', 'wedding', 'function', 'extra', 'portions', 'serves',
+    'people', 'cooked', 'today', 'morning', 'evening', 'kitchen', 'hostel', 'canteen',
+    'bakery', 'restaurant', 'hotel', 'catering', 'boxes', 'plates', 'kg', 'litres',
+] + DISHES
+STREETS = ['MG Road', 'Market Road', 'Beach Road', 'Temple Road', 'Station Road',
+           'Church Street', 'Bypass', 'Junction', 'Nagar', 'Colony']
+# Each rare dish lands in roughly one title per thousand.
+RARE = [
+    'unniyappam', 'kozhukatta', 'pathiri', 'neyyappam', 'kinnathappam', 'pazhampori',
+    'elanji', 'sukhiyan', 'achappam', 'kuzhalappam', 'ottada', 'kalathappam', 'mandi',
+    'alfaham', 'kallummakaya', 'erachi', 'chemmeen', 'karimeen', 'pidi', 'kumbilappam',
+]
+RARE_SHARE = 0.02
+QUERIES = {
+    'common': ['biryani', 'chick', 'fish curry', 'fresh veg meals', 'jackfr', 'beach',
+               'wedding biryani', 'pay', 'hostel lunch', 'kappa fish'],
+    'rare': ['unniyappam', 'kozhuk', 'karimeen fry', 'chemmeen curry', 'elanji sweet',
+             'alfaham chicken', 'pidi', 'sukhiyan', 'mandi rice', 'achappam'],
+}
+
+
+class Command(BaseCommand):
+    help = ('Benchmark /api/donations/search/ on a synthetic corpus in a throwaway '
+            'database, comparing the full-text index to LIKE scans.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 500_000])
+        parser.add_argument('--queries', type=int, default=100)
+        parser.add_argument('--scan-limit', type=int, default=100_000,
+                            help='Skip the LIKE baseline above this many rows.')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = make_rng(options['seed'])
+        # Zipf-like word frequencies, so common words match far more rows than rare ones.
+        self.weights = [1 / (rank + 1) for rank in range(len(WORDS))]
+        factory = APIRequestFactory()
+
+        with isolated_database(), override_settings(ALLOWED_HOSTS=['testserver']):
+            search.reset_backend()
+            backend = type(search.get_backend()).__name__
+            like_backend = search.LikeBackend()
+            donor = CustomUser.objects.create(
+                username='bench', full_name='Bench Donor', phone='0000000000',
+                pin_code='000000', district='ernakulam',
+            )
+            self.stdout.write(f'backend: {backend}')
+            self.stdout.write(
+                f'{"rows":>8} {"queries":>8} {"rank p50":>9} {"rank p95":>9} {"api p50":>8} '
+                f'{"api p95":>8} {"geo p50":>8} {"like p50":>9} {"like p95":>9} {"matches":>8}'
+            )
+            feed = FoodDonation.objects.live().filter(is_safe=True)
+
+            def first_page(backend, query):
+                list(backend.rank(feed, search.terms(query)).values_list('id', 'score')[:21])
+
+            def api(query, **extra):
+                request = factory.get('/api/donations/search/', {'q': query, **extra})
+                views.donation_search_view(request).render()
+
+            def nearby(query):
+                _, lat, lng = random_point(rng, 'ernakulam')
+                api(query, lat=lat, lng=lng, radius_km=5)
+
+            total = 0
+            for size in sorted(options['sizes']):
+                total = self.grow(donor, rng, total, size)
+                for kind, queries in QUERIES.items():
+                    probes = [(rng.choice(queries),) for _ in range(options['queries'])]
+                    rank_ms = time_calls(lambda q: first_page(search.get_backend(), q), probes)
+                    api_ms = time_calls(api, probes)
+                    geo_ms = time_calls(nearby, probes)
+                    like = ('-', '-')
+                    if size <= options['scan_limit']:
+                        like_ms = time_calls(lambda q: first_page(like_backend, q), probes[:20])
+                        like = (f'{percentile(like_ms, 50):.2f}', f'{percentile(like_ms, 95):.2f}')
+                    matches = sum(search.ranked(feed, q).count() for q in queries) / len(queries)
+                    self.stdout.write(
+                        f'{size:>8} {kind:>8} {percentile(rank_ms, 50):>9.2f} '
+                        f'{percentile(rank_ms, 95):>9.2f} {percentile(api_ms, 50):>8.2f} '
+                        f'{percentile(api_ms, 95):>8.2f} {percentile(geo_ms, 50):>8.2f} '
+                        f'{like[0]:>9} {like[1]:>9} {matches:>8.0f}'
+                    )
+        self.stdout.write('Latencies in ms for a 20-row first page. rank = ranked ids only; '
+                          'api = full endpoint; geo = endpoint within 5 km; like = '
+                          'LIKE scan baseline; matches = mean rows matching a query.')
+
+    def title(self, rng):
+        dish = rng.choice(RARE if rng.random() < RARE_SHARE else DISHES)
+        return f'{self.text(rng, 1, 2)} {dish}'
+
+    def text(self, rng, low, high):
+        return ' '.join(rng.choices(WORDS, self.weights, k=rng.randint(low, high)))
+
+    def grow(self, donor, rng, current, target, batch_size=5000):
+        start = time.perf_counter()
+        while current < target:
+            batch = []
+            for _ in range(min(batch_size, target - current)):
+                district, lat, lng = random_point(rng)
+                batch.append(FoodDonation(
+                    donor=donor, title=self.title(rng),
+                    description=self.text(rng, 5, 20),
+                    address=f'{rng.randint(1, 300)} {rng.choice(STREETS)}, {district.title()}',
+                    food_type='homecooked', image='food_donations/bench.jpg',
+                    latitude=lat, longitude=lng, geohash=geo.encode(lat, lng),
+                ))
+            FoodDonation.objects.bulk_create(batch)
+            current += len(batch)
+        self.stderr.write(f'  seeded {target} rows in {time.perf_counter() - start:.1f}s')
+        return current
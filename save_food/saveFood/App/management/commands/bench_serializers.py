@@ -0,0 +1,76 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory
+from rest_framework.request import Request
+
+from App.bench import SAMPLE_ANALYSIS, isolated_database, make_rng, percentile, random_point
+from App.models import BuyRequest, CustomUser, FoodDonation
+from App.serializers import BuyRequestSerializer, FoodDonationSerializer
+
+
+class Command(BaseCommand):
+    help = ('Compare payload size and serialization time of the list and detail '
+            'representations of FoodDonationSerializer and BuyRequestSerializer.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=200)
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = make_rng(options['seed'])
+        with isolated_database():
+            self.seed(rng, options['rows'])
+            request = Request(RequestFactory().get('/api/'))
+            donations = list(FoodDonation.objects.with_related())
+            buy_requests = list(BuyRequest.objects.with_related())
+
+            self.stdout.write(f'{"serializer":<22} {"mode":<7} {"bytes":>10} '
+                              f'{"p50 ms":>8} {"p95 ms":>8}')
+            for serializer_class, rows in ((FoodDonationSerializer, donations),
+                                           (BuyRequestSerializer, buy_requests)):
+                sizes = {}
+                for mode in ('detail', 'list'):
+                    context = {'request': request, 'representation': mode}
+                    samples, payload = [], None
+                    for _ in range(options['repeat']):
+                        start = time.perf_counter()
+                        payload = serializer_class(rows, many=True, context=context).data
+                        samples.append((time.perf_counter() - start) * 1000)
+                    sizes[mode] = len(json.dumps(payload, default=str).encode())
+                    self.stdout.write(
+                        f'{serializer_class.__name__:<22} {mode:<7} {sizes[mode]:>10} '
+                        f'{percentile(samples, 50):>8.2f} {percentile(samples, 95):>8.2f}'
+                    )
+                self.stdout.write(
+                    f'  list payload is {100 * sizes["list"] / sizes["detail"]:.0f}% of detail'
+                )
+        self.stdout.write(f'{options["rows"]} rows, {options["repeat"]} runs per mode.')
+
+    def seed(self, rng, rows):
+        donor = CustomUser.objects.create(
+            username='bench-donor', full_name='Bench Donor', phone='0000000000',
+            pin_code='682001', district='ernakulam', full_address='MG Road, Kochi',
+        )
+        requester = CustomUser.objects.create(
+            username='bench-requester', full_name='Bench Requester', phone='0000000001',
+            pin_code='682001', district='ernakulam', full_address='Marine Drive, Kochi',
+        )
+        donations = []
+        for i in range(rows):
+            _, lat, lng = random_point(rng, 'ernakulam')
+            donations.append(FoodDonation(
+                donor=donor, title=f'Meal {i}', description='Freshly cooked meal for pickup.',
+                food_type='homecooked', image='food_donations/bench.jpg',
+                renditions={name: f'food_donations/renditions/bench_{name}.webp'
+                            for name in ('thumbnail', 'card', 'full')},
+                latitude=lat, longitude=lng, address='Near the bus stand, Kochi',
+                safety_hours=6, gemini_analysis=SAMPLE_ANALYSIS,
+            ))
+        FoodDonation.objects.bulk_create(donations)
+        BuyRequest.objects.bulk_create([
+            BuyRequest(requester=requester, donation=d, message='Can pick up by 7pm.')
+            for d in FoodDonation.objects.all()
+        ])
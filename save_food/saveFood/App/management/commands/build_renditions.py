@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from App.images import generate_donation_renditions
+from App.models import FoodDonation
+
+
+class Command(BaseCommand):
+    help = 'Generate image renditions for donations that do not have them yet.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true',
+                            help='Rebuild renditions for every donation.')
+
+    def handle(self, *args, **options):
+        donations = FoodDonation.objects.all()
+        if not options['all']:
+            donations = donations.filter(renditions={})
+        count = 0
+        for pk in donations.values_list('id', flat=True).iterator():
+            generate_donation_renditions(pk, reuse=not options['all'])
+            count += 1
+        self.stdout.write(self.style.SUCCESS(f'Processed {count} donation(s).'))
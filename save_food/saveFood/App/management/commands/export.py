@@ -0,0 +1,34 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.exceptions import ValidationError
+
+from App import exports
+
+
+class Command(BaseCommand):
+    help = ('Stream a reporting export (donations, buy_requests or collectors) as CSV or '
+            'JSON Lines, e.g. `export buy_requests --since 2025-01-01 -o funnel.csv`.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('report', choices=sorted(exports.REPORTS))
+        parser.add_argument('--format', choices=sorted(exports.FORMATS), default='csv')
+        parser.add_argument('--since', help='First day included, YYYY-MM-DD')
+        parser.add_argument('--until', help='Last day included, YYYY-MM-DD')
+        parser.add_argument('--district')
+        parser.add_argument('-o', '--output', help='File to write (default: stdout)')
+
+    def handle(self, *args, **options):
+        params = {name: options[name] for name in ('since', 'until', 'district') if options[name]}
+        try:
+            header, rows = exports.report(options['report'], params)
+        except ValidationError as exc:
+            raise CommandError(exc.detail)
+        chunks = exports.render(options['format'], header, rows)
+        if not options['output']:
+            for chunk in chunks:
+                sys.stdout.write(chunk)
+            return
+        with open(options['output'], 'w', newline='', encoding='utf-8') as out:
+            for chunk in chunks:
+                out.write(chunk)
@@ -0,0 +1,98 @@
+import asyncio
+import json
+import logging
+import shutil
+import tempfile
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test import override_settings
+
+from App import analysis, authentication, loadtest, throttling
+from App.bench import isolated_database, make_rng
+
+
+class Command(BaseCommand):
+    help = ('Drive the donate -> request -> accept -> collect -> deliver flow with many '
+            'concurrent simulated users and report throughput, tail latency and '
+            'error/contention rates. Runs in-process on a throwaway database by default; '
+            'with --url it drives a running server whose database this command can reach.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', help='Base URL of a running server, e.g. '
+                                          'http://127.0.0.1:8000. Default: in-process.')
+        parser.add_argument('--concurrency', type=int, default=16, help='Simultaneous flows.')
+        parser.add_argument('--flows', type=int, default=200)
+        parser.add_argument('--duration', type=float, help='Stop starting flows after this '
+                                                           'many seconds.')
+        parser.add_argument('--donors', type=int, default=50)
+        parser.add_argument('--requesters', type=int, default=200)
+        parser.add_argument('--per-flow', type=int, default=3,
+                            help='Requesters asking for each donation.')
+        parser.add_argument('--districts', nargs='+', default=['ernakulam', 'thrissur', 'kollam'])
+        parser.add_argument('--no-race', action='store_true',
+                            help='Accept one request per donation instead of two at once.')
+        parser.add_argument('--max-error-rate', type=float, default=0.01,
+                            help='Fail when more than this share of flows fail.')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--json', help='Also write the summary to this file.')
+
+    def handle(self, *args, **options):
+        # Losing accepts (409) and any throttled calls are expected; keep the log quiet.
+        logging.getLogger('django.request').setLevel(logging.CRITICAL)
+        if options['url']:
+            summary = self.drive(loadtest.HTTPTransport(options['url']), options)
+        else:
+            media = tempfile.mkdtemp(prefix='savefood-load-')
+            in_process = override_settings(
+                ALLOWED_HOSTS=['testserver'], MEDIA_ROOT=media, TASKS_EAGER=True,
+                FOOD_ANALYSIS_CLIENT='App.analysis.StubClient', THROTTLE_RATES={},
+                METRICS_SLOW_REQUEST_MS=None,
+            )
+            try:
+                with isolated_database(on_disk=True), in_process:
+                    for reset in (analysis.reset_batcher, authentication.reset_token_cache,
+                                  throttling.reset_store):
+                        reset()
+                    summary = self.drive(loadtest.InProcessTransport(), options)
+            finally:
+                analysis.reset_batcher()
+                shutil.rmtree(media, ignore_errors=True)
+
+        self.report(summary)
+        if options['json']:
+            with open(options['json'], 'w') as out:
+                json.dump(summary, out, indent=2)
+        flows = summary['completed'] + summary['failed']
+        if flows and summary['failed'] / flows > options['max_error_rate']:
+            raise CommandError(f'{summary["failed"]} of {flows} flows failed.')
+
+    def drive(self, transport, options):
+        if options['per_flow'] < 2 and not options['no_race']:
+            raise CommandError('Racing accepts needs --per-flow 2 or more.')
+        cast = loadtest.create_cast(options['donors'], options['requesters'],
+                                    options['districts'])
+        runner = loadtest.FlowRunner(
+            transport, cast, make_rng(options['seed']), loadtest.Recorder(),
+            requesters_per_flow=options['per_flow'], race=not options['no_race'],
+        )
+        return asyncio.run(loadtest.run(runner, options['concurrency'], options['flows'],
+                                        options['duration']))
+
+    def report(self, summary):
+        self.stdout.write(
+            f'{summary["completed"]} flows completed, {summary["failed"]} failed in '
+            f'{summary["elapsed"]:.1f}s: {summary["flows_per_second"]:.1f} flows/s, '
+            f'{summary["requests_per_second"]:.0f} requests/s'
+        )
+        self.stdout.write(f'flow latency ms p50 {summary["flow_p50"]:.0f}  '
+                          f'p95 {summary["flow_p95"]:.0f}  p99 {summary["flow_p99"]:.0f}')
+        self.stdout.write(f'{"step":<9} {"calls":>7} {"p50 ms":>8} {"p95 ms":>8} {"p99 ms":>8} '
+                          f'{"errors":>7} {"409s":>6} {"429s":>6}')
+        for row in summary['steps']:
+            self.stdout.write(
+                f'{row["step"]:<9} {row["calls"]:>7} {row["p50"]:>8.1f} {row["p95"]:>8.1f} '
+                f'{row["p99"]:>8.1f} {row["errors"]:>7} {row["conflicts"]:>6} '
+                f'{row["throttled"]:>6}'
+            )
+        for reason, count in summary['failures'].items():
+            self.stdout.write(self.style.WARNING(f'  {count} x {reason}'))
@@ -0,0 +1,54 @@
+import multiprocessing
+import signal
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connections
+
+from App import tasks
+
+
+def worker_loop(poll_interval, once):
+    # Each process opens its own database connection.
+    connections.close_all()
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    while True:
+        close_old_connections()
+        processed = tasks.run_pending(limit=100)
+        if once and not processed:
+            return
+        if not processed:
+            time.sleep(poll_interval)
+
+
+class Command(BaseCommand):
+    help = 'Run background job workers from the Job table in a pool of processes.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=multiprocessing.cpu_count())
+        parser.add_argument('--poll-interval', type=float, default=1.0,
+                            help='Seconds to sleep when the queue is empty.')
+        parser.add_argument('--once', action='store_true',
+                            help='Drain the queue and exit instead of polling forever.')
+
+    def handle(self, *args, **options):
+        connections.close_all()
+        workers = [
+            multiprocessing.Process(
+                target=worker_loop, args=(options['poll_interval'], options['once']),
+                name=f'savefood-worker-{i}',
+            )
+            for i in range(max(1, options['processes']))
+        ]
+        for worker in workers:
+            worker.start()
+        self.stdout.write(f'Started {len(workers)} worker process(es).')
+        try:
+            for worker in workers:
+                worker.join()
+        except KeyboardInterrupt:
+            self.stdout.write('Stopping workers...')
+            for worker in workers:
+                worker.terminate()
+            for worker in workers:
+                worker.join()
@@ -0,0 +1,32 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from App.bench import make_rng, seed_load
+
+
+class Command(BaseCommand):
+    help = ('Bulk-generate synthetic users, collectors, donations and buy requests in the '
+            'configured database, e.g. to try the app at 100k or 1M donations.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--donations', type=int, default=10_000)
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--force', action='store_true',
+                            help='Allow seeding when DEBUG is off.')
+
+    def handle(self, *args, **options):
+        if not settings.DEBUG and not options['force']:
+            raise CommandError('Refusing to add synthetic data with DEBUG off; pass --force.')
+        start = time.perf_counter()
+        with transaction.atomic():
+            counts = seed_load(make_rng(options['seed']), options['donations'],
+                               batch_size=options['batch_size'], log=self.stderr.write)
+        self.stdout.write(self.style.SUCCESS(
+            f'Created {counts["users"]} users, {counts["collectors"]} collectors, '
+            f'{counts["donations"]} donations and {counts["buy_requests"]} buy requests '
+            f'in {time.perf_counter() - start:.1f}s. Passwords are "load-pass".'
+        ))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from App.expiry import SWEEP_BATCH_SIZE, sweep
+
+
+class Command(BaseCommand):
+    help = ('Mark donations past their expiry as expired and reject their pending '
+            'requests. Run periodically, e.g. every few minutes from cron.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=SWEEP_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        donations, requests = sweep(options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Expired {donations} donation(s); rejected {requests} pending request(s).'
+        ))
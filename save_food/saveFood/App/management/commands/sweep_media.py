@@ -0,0 +1,23 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from App.media import sweep_orphans, sweep_unreferenced
+from App.uploads import expire_uploads
+
+
+class Command(BaseCommand):
+    help = ('Delete media files that no donation has referenced for MEDIA_GC_GRACE seconds '
+            '(including files left by rolled-back saves), and upload sessions older than '
+            'UPLOAD_EXPIRY. Run periodically, e.g. hourly from cron.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--grace', type=int, default=None,
+                            help=f'Seconds a file must have been unreferenced '
+                                 f'(default: MEDIA_GC_GRACE, {settings.MEDIA_GC_GRACE}).')
+
+    def handle(self, *args, **options):
+        uploads = expire_uploads()
+        removed = sweep_unreferenced(options['grace']) + sweep_orphans(options['grace'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Removed {removed} unreferenced file(s) and {uploads} expired upload(s).'
+        ))
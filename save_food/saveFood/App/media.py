@@ -0,0 +1,323 @@
+"""Content-addressed media storage and serving.
+
+``ContentAddressedStorage`` names every file by the SHA-256 of its bytes,
+``<directory>/<first two hex digits>/<hash>.<ext>``, keeping only the
+directory and extension of the name it was asked to save under. Saving
+bytes that are already stored writes nothing and returns the existing
+name, so a photo uploaded twice (a retried upload, a bulk upload of the
+same tray) and its renditions are stored once.
+
+Every save adds a reference to the file's ``StoredFile`` row and every
+``delete()`` drops one. Files are not unlinked inline, because a
+concurrent upload of the same bytes could be re-adding a reference.
+Instead, ``sweep_unreferenced()`` (``manage.py sweep_media``) removes files
+that have had no references for ``MEDIA_GC_GRACE`` seconds. Files from
+before this storage (random ``uuid4`` names) have no row and are deleted
+directly. A save inside a transaction that rolls back leaves a hashed file
+with no row; ``sweep_orphans()`` removes those once they are older than
+the same grace period.
+
+``serve_media`` replaces Django's debug-only ``static()`` view. A
+content-addressed name never changes meaning, so its responses are cached
+for a year as ``immutable`` with the hash as ETag. The file itself goes
+out through the front-end server when ``MEDIA_ACCEL_REDIRECT`` (nginx) or
+``MEDIA_SENDFILE_HEADER`` (Apache, lighttpd) is set. Otherwise it is sent
+with ``FileResponse``, which WSGI servers pass to ``sendfile()``. Single
+byte ranges are supported, so interrupted downloads resume.
+"""
+import hashlib
+import mimetypes
+import os
+import re
+import time
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from django.core.exceptions import SuspiciousFileOperation
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.http import FileResponse, Http404, HttpResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils._os import safe_join
+from django.utils.http import http_date, quote_etag
+from django.views.decorators.http import require_safe
+
+HASHED_NAME = re.compile(r'(?:^|/)[0-9a-f]{2}/([0-9a-f]{64})(?:\.[a-z0-9]+)?$')
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+MUTABLE_MAX_AGE = 3600
+_EXTENSION = re.compile(r'^[a-z0-9]{1,5}$')
+
+
+def content_hash(content):
+    digest = hashlib.sha256()
+    for chunk in content.chunks():
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+def hashed_name(name, digest):
+    """Where bytes with ``digest`` live when asked to be saved as ``name``."""
+    directory = os.path.dirname(name)
+    ext = os.path.splitext(name)[1][1:].lower()
+    filename = f'{digest}.{ext}' if _EXTENSION.match(ext) else digest
+    return os.path.join(directory, digest[:2], filename)
+
+
+def content_digest(name):
+    """The SHA-256 encoded in a content-addressed ``name``, or ``None``."""
+    match = HASHED_NAME.search(name)
+    return match.group(1) if match else None
+
+
+def retain(names):
+    """Add a reference to each stored file, e.g. when reusing another row's renditions."""
+    from .models import StoredFile
+
+    StoredFile.objects.filter(name__in=list(names)).update(
+        refs=F('refs') + 1, released_at=None,
+    )
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    def get_available_name(self, name, max_length=None):
+        # Names are chosen in _save from the content; identical names hold identical bytes.
+        return name
+
+    def _save(self, name, content):
+        from .models import StoredFile
+
+        name = hashed_name(name, content_hash(content))
+        with transaction.atomic():
+            added = StoredFile.objects.filter(name=name).update(
+                refs=F('refs') + 1, released_at=None,
+            )
+            if not added:
+                try:
+                    with transaction.atomic():
+                        StoredFile.objects.create(name=name, size=content.size, refs=1)
+                except IntegrityError:  # a concurrent first save of the same bytes
+                    StoredFile.objects.filter(name=name).update(
+                        refs=F('refs') + 1, released_at=None,
+                    )
+        if not self.exists(name):
+            self._write(name, content)
+        else:
+            # Reviving a file sweep_orphans() may be about to collect: a fresh mtime keeps it.
+            os.utime(self.path(name))
+        return name
+
+    def _write(self, name, content):
+        """Write via a temporary file and an atomic rename, so readers never see a partial file."""
+        full_path = self.path(name)
+        directory = os.path.dirname(full_path)
+        os.makedirs(directory, exist_ok=True)
+        if self.directory_permissions_mode is not None:
+            os.chmod(directory, self.directory_permissions_mode)
+        temp_path = os.path.join(directory, f'.{uuid.uuid4().hex}.tmp')
+        try:
+            with open(temp_path, 'wb') as out:
+                for chunk in content.chunks():
+                    out.write(chunk)
+            if self.file_permissions_mode is not None:
+                os.chmod(temp_path, self.file_permissions_mode)
+            os.replace(temp_path, full_path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    def delete(self, name):
+        from .models import StoredFile
+
+        if not name:
+            raise ValueError('The name must be given to delete().')
+        stored = StoredFile.objects.filter(name=name)
+        if not stored.exists():
+            super().delete(name)
+            return
+        with transaction.atomic():
+            stored.filter(refs__gt=0).update(refs=F('refs') - 1)
+            stored.filter(refs=0, released_at__isnull=True).update(released_at=timezone.now())
+
+    def unlink(self, name):
+        """Remove the file itself, whatever its reference count."""
+        super().delete(name)
+
+
+def sweep_unreferenced(grace=None, batch_size=500):
+    """Unlink files unreferenced for longer than ``grace`` seconds; returns how many."""
+    from django.core.files.storage import default_storage
+
+    from .models import StoredFile
+
+    grace = grace if grace is not None else getattr(settings, 'MEDIA_GC_GRACE', 3600)
+    cutoff = timezone.now() - timedelta(seconds=grace)
+    removed = 0
+    while True:
+        names = list(StoredFile.objects.filter(refs=0, released_at__lte=cutoff)
+                     .values_list('name', flat=True)[:batch_size])
+        if not names:
+            return removed
+        for name in names:
+            # The row stays locked until the file is gone: a concurrent save of the
+            # same bytes waits, then finds no row and writes the file afresh.
+            with transaction.atomic():
+                if StoredFile.objects.filter(name=name, refs=0).delete()[0]:
+                    default_storage.unlink(name)
+                    removed += 1
+
+
+def sweep_orphans(grace=None, batch_size=500):
+    """Unlink content-addressed files older than ``grace`` seconds that have no ``StoredFile`` row.
+
+    Those are left by saves whose transaction rolled back after the file
+    was written. Returns how many were removed.
+    """
+    from django.core.files.storage import default_storage
+
+    from .models import StoredFile
+
+    grace = grace if grace is not None else getattr(settings, 'MEDIA_GC_GRACE', 3600)
+    cutoff = time.time() - grace
+    root = default_storage.location
+    removed = 0
+
+    def collect(candidates):
+        known = set(StoredFile.objects.filter(name__in=list(candidates)).values_list('name', flat=True))
+        count = 0
+        for name, path in candidates.items():
+            try:
+                if name not in known and os.stat(path).st_mtime <= cutoff:
+                    os.remove(path)
+                    count += 1
+            except FileNotFoundError:
+                pass
+        return count
+
+    candidates = {}
+    for directory, _, filenames in os.walk(root):
+        for filename in filenames:
+            path = os.path.join(directory, filename)
+            name = os.path.relpath(path, root).replace(os.sep, '/')
+            if content_digest(name) is not None:
+                candidates[name] = path
+            if len(candidates) >= batch_size:
+                removed += collect(candidates)
+                candidates = {}
+    if candidates:
+        removed += collect(candidates)
+    return removed
+
+
+# ── Serving ──────────────────────────────────────────────────────
+
+_RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def parse_range(header, size):
+    """``(start, end)`` inclusive for a single-range header, ``None`` to send everything.
+
+    Raises ``ValueError`` for an unsatisfiable range. Multiple ranges are
+    answered with the whole file, which RFC 9110 allows.
+    """
+    match = _RANGE.match(header.replace(' ', '')) if header else None
+    if match is None:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:  # suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            raise ValueError('empty suffix range')
+        return max(0, size - length), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or end < start:
+        raise ValueError('range not satisfiable')
+    return start, end
+
+
+def _read_range(path, start, length, block_size=64 * 1024):
+    with open(path, 'rb') as f:
+        f.seek(start)
+        while length > 0:
+            chunk = f.read(min(block_size, length))
+            if not chunk:
+                return
+            length -= len(chunk)
+            yield chunk
+
+
+def _with_headers(response, headers):
+    for key, value in headers.items():
+        response[key] = value
+    return response
+
+
+@require_safe
+def serve_media(request, path):
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404('Not found.')
+    try:
+        stat = os.stat(full_path)
+    except OSError:
+        raise Http404('Not found.')
+    if not os.path.isfile(full_path):
+        raise Http404('Not found.')
+
+    digest = content_digest(path)
+    etag = quote_etag(digest or f'{int(stat.st_mtime)}-{stat.st_size}')
+    headers = {
+        'ETag': etag,
+        'Last-Modified': http_date(stat.st_mtime),
+        'Cache-Control': (f'public, max-age={IMMUTABLE_MAX_AGE}, immutable' if digest
+                          else f'public, max-age={MUTABLE_MAX_AGE}'),
+        'Accept-Ranges': 'bytes',
+    }
+    content_type = mimetypes.guess_type(full_path)[0] or 'application/octet-stream'
+
+    if etag in request.headers.get('If-None-Match', ''):
+        response = HttpResponse(status=304)
+        return _with_headers(response, headers)
+
+    accel_prefix = getattr(settings, 'MEDIA_ACCEL_REDIRECT', None)
+    sendfile_header = getattr(settings, 'MEDIA_SENDFILE_HEADER', None)
+    if accel_prefix or sendfile_header:
+        # The front-end server sends the bytes and handles ranges itself.
+        response = HttpResponse(content_type=content_type)
+        if accel_prefix:
+            response['X-Accel-Redirect'] = accel_prefix.rstrip('/') + '/' + path
+        else:
+            response[sendfile_header] = full_path
+        return _with_headers(response, headers)
+
+    byte_range = None
+    if request.headers.get('If-Range', etag) == etag:
+        try:
+            byte_range = parse_range(request.headers.get('Range'), stat.st_size)
+        except ValueError:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{stat.st_size}'
+            return response
+
+    start, end = byte_range or (0, stat.st_size - 1)
+    length = end - start + 1
+    if request.method == 'HEAD':
+        response = HttpResponse(content_type=content_type)
+    elif end == stat.st_size - 1:
+        # Whole file or a tail ("resume from N"): FileResponse keeps the sendfile() path.
+        f = open(full_path, 'rb')
+        f.seek(start)
+        response = FileResponse(f, content_type=content_type)
+    else:
+        response = StreamingHttpResponse(_read_range(full_path, start, length),
+                                         content_type=content_type)
+    if byte_range:
+        response.status_code = 206
+        response['Content-Range'] = f'bytes {start}-{end}/{stat.st_size}'
+    response['Content-Length'] = str(length)
+    return _with_headers(response, headers)
@@ -0,0 +1,359 @@
+"""Per-request instrumentation and a Prometheus ``/metrics`` endpoint.
+
+``MetricsMiddleware`` records, per view (the URL name) and method:
+
+* request latency and DB query count as histograms,
+* DB time, serialization time (evaluating ``serializer.data``, see
+  ``timing_serialization``), rendering time (encoding the result to JSON
+  bytes) and response bytes as counters,
+* requests by status code.
+
+Each thread writes to its own shard of plain dicts, so the request path
+takes no lock; ``/metrics`` sums the shards when scraped. Queries are
+counted by a wrapper installed on every database connection, which feeds
+the recorder of the request in the current context. That context follows
+the request into the thread where ASGI runs sync views, so queries are
+counted under ASGI as well as WSGI.
+
+Requests slower than ``METRICS_SLOW_REQUEST_MS`` are logged to the
+``App.metrics`` logger with their SQL and the ``EXPLAIN`` output of the
+``METRICS_SLOW_EXPLAIN`` slowest queries. Only SQL templates are logged,
+never parameters, which can hold tokens and OTPs.
+"""
+import logging
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import DatabaseError, connections
+from django.http import HttpResponse, HttpResponseForbidden
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+MAX_CAPTURED_QUERIES = 100
+# Never EXPLAINed: plans on some backends echo the parameters.
+SENSITIVE_TABLES = ('authtoken_token', 'django_session')
+
+# name -> (type, help, buckets or None)
+METRICS = {
+    'savefood_http_requests_total': ('counter', 'Requests by view, method and status.', None),
+    'savefood_http_request_duration_seconds': (
+        'histogram', 'Time from the outermost middleware until the response is returned.',
+        LATENCY_BUCKETS),
+    'savefood_http_db_queries': ('histogram', 'Database queries per request.', QUERY_BUCKETS),
+    'savefood_http_db_seconds_total': ('counter', 'Time spent executing database queries.', None),
+    'savefood_http_serialize_seconds_total': (
+        'counter', 'Time spent evaluating serializer.data, including queries it triggers.', None),
+    'savefood_http_render_seconds_total': (
+        'counter', 'Time spent encoding serialized data to response bytes.', None),
+    'savefood_http_response_bytes_total': ('counter', 'Response body bytes.', None),
+}
+
+
+class Registry:
+    """Per-thread shards of ``(name, labels) -> value``, summed on collection."""
+
+    def __init__(self):
+        self._local = threading.local()
+        self._shards = []
+        self._shards_lock = threading.Lock()  # only taken once per thread and on collect
+
+    def _shard(self):
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = self._local.shard = {}
+            with self._shards_lock:
+                self._shards.append(shard)
+        return shard
+
+    def inc(self, name, labels, amount=1):
+        shard = self._shard()
+        key = (name, labels)
+        shard[key] = shard.get(key, 0) + amount
+
+    def observe(self, name, labels, value):
+        """Add ``value`` to a histogram: one slot per bucket, then sum and count."""
+        shard = self._shard()
+        key = (name, labels)
+        slots = shard.get(key)
+        buckets = METRICS[name][2]
+        if slots is None:
+            slots = shard[key] = [0] * (len(buckets) + 2)
+        for i, bound in enumerate(buckets):
+            if value <= bound:
+                slots[i] += 1
+                break
+        slots[-2] += value
+        slots[-1] += 1
+
+    def collect(self):
+        """Totals over all shards: ``{(name, labels): number or slot list}``."""
+        with self._shards_lock:
+            shards = list(self._shards)
+        totals = {}
+        for shard in shards:
+            for key, value in shard.copy().items():
+                if isinstance(value, list):
+                    current = totals.setdefault(key, [0] * len(value))
+                    for i, slot in enumerate(value):
+                        current[i] += slot
+                else:
+                    totals[key] = totals.get(key, 0) + value
+        return totals
+
+    def clear(self):
+        with self._shards_lock:
+            for shard in self._shards:
+                shard.clear()
+
+
+registry = Registry()
+
+
+def _labels(**labels):
+    return tuple(sorted(labels.items()))
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels, **extra):
+    pairs = list(labels) + list(extra.items())
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{k}="{_escape(v)}"' for k, v in pairs) + '}'
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def exposition(totals=None):
+    """Prometheus text format (version 0.0.4) for the current totals."""
+    totals = registry.collect() if totals is None else totals
+    by_name = {}
+    for (name, labels), value in totals.items():
+        by_name.setdefault(name, []).append((labels, value))
+    lines = []
+    for name, (kind, help_text, buckets) in METRICS.items():
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {kind}')
+        for labels, value in sorted(by_name.get(name, [])):
+            if kind != 'histogram':
+                lines.append(f'{name}{_format_labels(labels)} {_number(value)}')
+                continue
+            cumulative = 0
+            for bound, count in zip(buckets, value):
+                cumulative += count
+                lines.append(f'{name}_bucket{_format_labels(labels, le=bound)} {cumulative}')
+            lines.append(f'{name}_bucket{_format_labels(labels, le="+Inf")} {value[-1]}')
+            lines.append(f'{name}_sum{_format_labels(labels)} {_number(value[-2])}')
+            lines.append(f'{name}_count{_format_labels(labels)} {value[-1]}')
+    return '\n'.join(lines) + '\n'
+
+
+class QueryRecorder:
+    """``execute_wrapper`` that counts and times queries, keeping the first few for the slow log."""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.captured = []  # (alias, sql, params, seconds)
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.count += 1
+            self.seconds += elapsed
+            if len(self.captured) < MAX_CAPTURED_QUERIES:
+                alias = context['connection'].alias
+                self.captured.append((alias, sql, None if many else params, elapsed))
+
+
+_request_queries = ContextVar('savefood_request_queries', default=None)
+
+
+def record_request_queries(execute, sql, params, many, context):
+    """Connection-wide ``execute_wrapper`` feeding the current request's ``QueryRecorder``."""
+    recorder = _request_queries.get()
+    if recorder is None:
+        return execute(sql, params, many, context)
+    return recorder(execute, sql, params, many, context)
+
+
+class SerializationTimer:
+    """Serialization time of one request; nested serializers are counted once."""
+
+    def __init__(self):
+        self.seconds = 0.0
+        self.depth = 0
+
+
+_request_serialization = ContextVar('savefood_request_serialization', default=None)
+
+
+@contextmanager
+def timing_serialization():
+    """Count the enclosed block towards the current request's serialization time."""
+    timer = _request_serialization.get()
+    if timer is None:
+        yield
+        return
+    timer.depth += 1
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timer.depth -= 1
+        if not timer.depth:
+            timer.seconds += time.perf_counter() - start
+
+
+def install(connection):
+    """Add ``record_request_queries`` to a new connection (see ``signals.py``).
+
+    It goes first, so ``connection.execute_wrapper()`` blocks, which pop
+    the last wrapper on exit, cannot remove it.
+    """
+    if record_request_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, record_request_queries)
+
+
+def _explain(alias, sql, params):
+    connection = connections[alias]
+    prefix = connection.ops.explain_query_prefix()
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(f'{prefix} {sql}', params)
+            return '\n'.join(' '.join(str(col) for col in row) for row in cursor.fetchall())
+    except DatabaseError as exc:
+        return f'(EXPLAIN failed: {exc})'
+
+
+def _explainable(sql):
+    return (sql.lstrip()[:6].upper() == 'SELECT'
+            and not any(table in sql for table in SENSITIVE_TABLES))
+
+
+def log_slow_request(request, view, elapsed, queries):
+    slowest = sorted(
+        (q for q in queries.captured if _explainable(q[1])),
+        key=lambda q: q[3], reverse=True,
+    )[:getattr(settings, 'METRICS_SLOW_EXPLAIN', 3)]
+    parts = [f'Slow request {request.method} {request.path} ({view}): {elapsed * 1000:.0f} ms, '
+             f'{queries.count} queries in {queries.seconds * 1000:.0f} ms']
+    for alias, sql, params, seconds in queries.captured:
+        parts.append(f'  [{seconds * 1000:.1f} ms] {sql}')
+    for alias, sql, params, seconds in slowest:
+        parts.append(f'EXPLAIN [{seconds * 1000:.1f} ms] {sql}\n{_explain(alias, sql, params)}')
+    logger.warning('\n'.join(parts))
+
+
+def _view_name(request):
+    match = getattr(request, 'resolver_match', None)
+    return match.view_name if match is not None else '<unmatched>'
+
+
+def _response_size(response):
+    if response.streaming:
+        return 0  # unknown until the stream is consumed
+    return len(response.content)
+
+
+class MetricsMiddleware:
+    """Record per-view metrics; put it first in ``MIDDLEWARE`` so latency covers the whole stack."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        start = time.perf_counter()
+        queries, serialization = QueryRecorder(), SerializationTimer()
+        tokens = _request_queries.set(queries), _request_serialization.set(serialization)
+        try:
+            response = self.get_response(request)
+        finally:
+            _request_queries.reset(tokens[0])
+            _request_serialization.reset(tokens[1])
+        elapsed = time.perf_counter() - start
+        view = self.record(request, response, elapsed, queries, serialization)
+        if self.is_slow(elapsed):
+            log_slow_request(request, view, elapsed, queries)
+        return response
+
+    async def __acall__(self, request):
+        start = time.perf_counter()
+        queries, serialization = QueryRecorder(), SerializationTimer()
+        tokens = _request_queries.set(queries), _request_serialization.set(serialization)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _request_queries.reset(tokens[0])
+            _request_serialization.reset(tokens[1])
+        elapsed = time.perf_counter() - start
+        view = self.record(request, response, elapsed, queries, serialization)
+        if self.is_slow(elapsed):
+            await sync_to_async(log_slow_request)(request, view, elapsed, queries)
+        return response
+
+    def is_slow(self, elapsed):
+        threshold = getattr(settings, 'METRICS_SLOW_REQUEST_MS', 1000)
+        return threshold is not None and elapsed * 1000 >= threshold
+
+    def process_template_response(self, request, response):
+        # By now the view has evaluated serializer.data; this times only the renderer.
+        start = time.perf_counter()
+
+        def rendered(response):
+            registry.inc('savefood_http_render_seconds_total', _labels(view=_view_name(request)),
+                         time.perf_counter() - start)
+
+        response.add_post_render_callback(rendered)
+        return response
+
+    def record(self, request, response, elapsed, queries, serialization):
+        view = _view_name(request)
+        labels = _labels(view=view, method=request.method)
+        registry.inc('savefood_http_requests_total',
+                     _labels(view=view, method=request.method, status=response.status_code))
+        registry.observe('savefood_http_request_duration_seconds', labels, elapsed)
+        registry.inc('savefood_http_response_bytes_total', _labels(view=view),
+                     _response_size(response))
+        registry.observe('savefood_http_db_queries', labels, queries.count)
+        registry.inc('savefood_http_db_seconds_total', _labels(view=view), queries.seconds)
+        registry.inc('savefood_http_serialize_seconds_total', _labels(view=view),
+                     serialization.seconds)
+        return view
+
+
+def metrics_view(request):
+    """Prometheus scrape target.
+
+    With ``METRICS_TOKEN`` set, scrapers must send ``Authorization: Bearer
+    <token>``; otherwise only loopback clients may scrape.
+    """
+    token = getattr(settings, 'METRICS_TOKEN', '')
+    if token:
+        supplied = request.headers.get('Authorization', '').removeprefix('Bearer ')
+        allowed = secrets.compare_digest(supplied.encode(), token.encode())
+    else:
+        allowed = request.META.get('REMOTE_ADDR') in ('127.0.0.1', '::1')
+    if not allowed:
+        return HttpResponseForbidden()
+    return HttpResponse(exposition(), content_type='text/plain; version=0.0.4; charset=utf-8')
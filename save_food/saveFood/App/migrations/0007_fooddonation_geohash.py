@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-17 01:01
+
+from django.db import migrations, models
+
+
+def backfill_geohash(apps, schema_editor):
+    from App import geo
+
+    FoodDonation = apps.get_model('App', 'FoodDonation')
+    batch = []
+    for donation in FoodDonation.objects.only('id', 'latitude', 'longitude').iterator():
+        donation.geohash = geo.encode(donation.latitude, donation.longitude)
+        batch.append(donation)
+        if len(batch) >= 1000:
+            FoodDonation.objects.bulk_update(batch, ['geohash'])
+            batch = []
+    if batch:
+        FoodDonation.objects.bulk_update(batch, ['geohash'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('App', '0005_buyrequest_delivery_status_buyrequest_receiver_otp_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='fooddonation',
+            name='geohash',
+            field=models.BigIntegerField(blank=True, db_index=True, editable=False, help_text='Interleaved lat/lng cell code used for radius searches', null=True),
+        ),
+        migrations.RunPython(backfill_geohash, migrations.RunPython.noop),
+    ]
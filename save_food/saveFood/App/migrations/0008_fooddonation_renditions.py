@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 01:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('App', '0007_fooddonation_geohash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='fooddonation',
+            name='renditions',
+            field=models.JSONField(blank=True, default=dict, editable=False, help_text='Downscaled copies of the image, keyed by rendition name'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-17 01:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('App', '0009_job'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FoodAnalysis',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('content_hash', models.CharField(max_length=64, unique=True)),
+                ('food_type', models.CharField(choices=[('packed', 'Packed / Sealed Food'), ('homecooked', 'Home-Cooked Food'), ('organic', 'Organic / Raw Produce')], max_length=20)),
+                ('result', models.JSONField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name_plural': 'food analyses',
+            },
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.18 on 2026-10-17 01:18
+
+from django.db import migrations, models
+
+
+def seed_changelog(apps, schema_editor):
+    """Log every existing row so a client syncing from token 0 receives it."""
+    ChangeLog = apps.get_model('App', 'ChangeLog')
+    for model_name, label in (('FoodDonation', 'donation'), ('BuyRequest', 'buy_request')):
+        Model = apps.get_model('App', model_name)
+        ids = Model.objects.order_by('id').values_list('id', flat=True).iterator()
+        batch = []
+        for pk in ids:
+            batch.append(ChangeLog(model=label, object_id=pk, action='upsert'))
+            if len(batch) >= 1000:
+                ChangeLog.objects.bulk_create(batch)
+                batch = []
+        ChangeLog.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('App', '0010_foodanalysis'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChangeLog',
+            fields=[
+                ('seq', models.BigAutoField(primary_key=True, serialize=False)),
+                ('model', models.CharField(choices=[('donation', 'Food Donation'), ('buy_request', 'Buy Request')], max_length=20)),
+                ('object_id', models.BigIntegerField()),
+                ('action', models.CharField(choices=[('upsert', 'Created / Updated'), ('delete', 'Deleted')], default='upsert', max_length=10)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['seq'],
+            },
+        ),
+        migrations.RunPython(seed_changelog, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-17 01:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('App', '0011_changelog'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='buyrequest',
+            name='dropoff_latitude',
+            field=models.FloatField(blank=True, help_text="Requester's delivery location; the district centre is used when unset", null=True),
+        ),
+        migrations.AddField(
+            model_name='buyrequest',
+            name='dropoff_longitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 5.2.18 on 2026-10-17 01:25
+
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def backfill_collectors(apps, schema_editor):
+    """Copy each collector's district from its user and count its open assignments."""
+    FoodWasteCollector = apps.get_model('App', 'FoodWasteCollector')
+    open_requests = Q(assigned_requests__status='accepted') & ~Q(
+        assigned_requests__delivery_status='delivered')
+    collectors = FoodWasteCollector.objects.select_related('user').annotate(
+        load=Count('assigned_requests', filter=open_requests),
+    )
+    for collector in collectors:
+        FoodWasteCollector.objects.filter(pk=collector.pk).update(
+            district=collector.district or collector.user.district, active_load=collector.load,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('App', '0012_buyrequest_dropoff'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='foodwastecollector',
+            name='active_load',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Accepted, undelivered requests currently assigned'),
+        ),
+        migrations.AddField(
+            model_name='foodwastecollector',
+            name='district',
+            field=models.CharField(blank=True, choices=[('thiruvananthapuram', 'Thiruvananthapuram'), ('kollam', 'Kollam'), ('pathanamthitta', 'Pathanamthitta'), ('alappuzha', 'Alappuzha'), ('kottayam', 'Kottayam'), ('idukki', 'Idukki'), ('ernakulam', 'Ernakulam'), ('thrissur', 'Thrissur'), ('palakkad', 'Palakkad'), ('malappuram', 'Malappuram'), ('kozhikode', 'Kozhikode'), ('wayanad', 'Wayanad'), ('kannur', 'Kannur'), ('kasaragod', 'Kasaragod')], help_text="District served; defaults to the user's district", max_length=50),
+        ),
+        migrations.AddField(
+            model_name='foodwastecollector',
+            name='latitude',
+            field=models.FloatField(blank=True, help_text='Base location for automatic assignment; the district centre is used when unset', null=True),
+        ),
+        migrations.AddField(
+            model_name='foodwastecollector',
+            name='longitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='foodwastecollector',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['district', 'active_load', 'id'], name='collector_district_load_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='foodwastecollector',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['active_load', 'id'], name='collector_load_idx'),
+        ),
+        migrations.RunPython(backfill_collectors, migrations.RunPython.noop),
+    ]
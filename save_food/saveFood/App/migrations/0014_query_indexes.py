@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-17 01:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('App', '0013_collector_assignment'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='buyrequest',
+            index=models.Index(fields=['requester', '-created_at'], name='buyrequest_requester_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='buyrequest',
+            index=models.Index(fields=['donation', 'status'], name='buyrequest_donation_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='buyrequest',
+            index=models.Index(fields=['assigned_collector', 'status', '-created_at'], name='buyrequest_collector_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='fooddonation',
+            index=models.Index(fields=['donor', '-created_at'], name='donation_donor_idx'),
+        ),
+    ]
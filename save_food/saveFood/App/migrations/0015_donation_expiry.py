@@ -0,0 +1,60 @@
+# Generated by Django 5.2.18 on 2026-10-17 01:33
+
+from datetime import datetime, time, timedelta
+from zoneinfo import ZoneInfo
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_expires_at(apps, schema_editor):
+    """Mirror FoodDonation.compute_expires_at; the sweeper expires anything already past."""
+    FoodDonation = apps.get_model('App', 'FoodDonation')
+    local = ZoneInfo(getattr(settings, 'LOCAL_TIME_ZONE', settings.TIME_ZONE))
+    rows = FoodDonation.objects.filter(
+        models.Q(expiry_date__isnull=False) | models.Q(safety_hours__isnull=False),
+    ).only('id', 'expiry_date', 'safety_hours', 'created_at')
+    batch = []
+    for donation in rows.iterator(chunk_size=1000):
+        if donation.expiry_date:
+            donation.expires_at = datetime.combine(
+                donation.expiry_date + timedelta(days=1), time.min, tzinfo=local)
+        elif donation.safety_hours:
+            donation.expires_at = donation.created_at + timedelta(hours=donation.safety_hours)
+        else:
+            continue
+        batch.append(donation)
+        if len(batch) >= 1000:
+            FoodDonation.objects.bulk_update(batch, ['expires_at'])
+            batch = []
+    FoodDonation.objects.bulk_update(batch, ['expires_at'])
+
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('App', '0014_query_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='fooddonation',
+            name='expires_at',
+            field=models.DateTimeField(blank=True, editable=False, help_text='End of the expiry date, or creation plus safety hours', null=True),
+        ),
+        migrations.AddField(
+            model_name='fooddonation',
+            name='is_expired',
+            field=models.BooleanField(default=False, editable=False, help_text='Set by the expiry sweeper once expires_at has passed'),
+        ),
+        migrations.AddIndex(
+            model_name='fooddonation',
+            index=models.Index(condition=models.Q(('is_expired', False), ('is_safe', True)), fields=['-created_at', '-id'], name='donation_feed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='fooddonation',
+            index=models.Index(condition=models.Q(('is_expired', False)), fields=['expires_at'], name='donation_expiry_idx'),
+        ),
+        migrations.RunPython(backfill_expires_at, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,79 @@
+from django.db import OperationalError, migrations
+
+# Kept in sync by the database itself, so bulk .update() calls are indexed too.
+SQLITE_FORWARD = [
+    "CREATE VIRTUAL TABLE App_donation_fts USING fts5("
+    " title, description, address,"
+    " content='App_fooddonation', content_rowid='id',"
+    " tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+    "CREATE TRIGGER App_donation_fts_ai AFTER INSERT ON App_fooddonation BEGIN"
+    " INSERT INTO App_donation_fts(rowid, title, description, address)"
+    " VALUES (new.id, new.title, new.description, new.address); END",
+    "CREATE TRIGGER App_donation_fts_ad AFTER DELETE ON App_fooddonation BEGIN"
+    " INSERT INTO App_donation_fts(App_donation_fts, rowid, title, description, address)"
+    " VALUES ('delete', old.id, old.title, old.description, old.address); END",
+    # Only text edits touch the index; status flips such as is_sold do not.
+    "CREATE TRIGGER App_donation_fts_au AFTER UPDATE OF title, description, address"
+    " ON App_fooddonation BEGIN"
+    " INSERT INTO App_donation_fts(App_donation_fts, rowid, title, description, address)"
+    " VALUES ('delete', old.id, old.title, old.description, old.address);"
+    " INSERT INTO App_donation_fts(rowid, title, description, address)"
+    " VALUES (new.id, new.title, new.description, new.address); END",
+    "INSERT INTO App_donation_fts(App_donation_fts) VALUES ('rebuild')",
+]
+
+SQLITE_BACKWARD = [
+    'DROP TRIGGER IF EXISTS App_donation_fts_au',
+    'DROP TRIGGER IF EXISTS App_donation_fts_ad',
+    'DROP TRIGGER IF EXISTS App_donation_fts_ai',
+    'DROP TABLE IF EXISTS App_donation_fts',
+]
+
+POSTGRES_FORWARD = [
+    'ALTER TABLE "App_fooddonation" ADD COLUMN search_vector tsvector GENERATED ALWAYS AS ('
+    " setweight(to_tsvector('simple', coalesce(title, '')), 'A') ||"
+    " setweight(to_tsvector('simple', coalesce(description, '')), 'B') ||"
+    " setweight(to_tsvector('simple', coalesce(address, '')), 'C')) STORED",
+    'CREATE INDEX donation_search_idx ON "App_fooddonation" USING GIN (search_vector)',
+]
+
+POSTGRES_BACKWARD = [
+    'DROP INDEX IF EXISTS donation_search_idx',
+    'ALTER TABLE "App_fooddonation" DROP COLUMN IF EXISTS search_vector',
+]
+
+
+def run(schema_editor, statements):
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        run(schema_editor, POSTGRES_FORWARD)
+    elif vendor == 'sqlite':
+        try:
+            run(schema_editor, SQLITE_FORWARD)
+        except OperationalError:
+            # SQLite built without FTS5: App.search falls back to LIKE matching.
+            run(schema_editor, SQLITE_BACKWARD)
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        run(schema_editor, POSTGRES_BACKWARD)
+    elif vendor == 'sqlite':
+        run(schema_editor, SQLITE_BACKWARD)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('App', '0015_donation_expiry'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:18
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('App', '0017_stored_file'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Upload',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('filename', models.CharField(max_length=255)),
+                ('content_type', models.CharField(blank=True, max_length=100)),
+                ('size', models.PositiveBigIntegerField(help_text='Declared total size in bytes')),
+                ('received', models.PositiveBigIntegerField(default=0, help_text='Bytes stored contiguously from the start; the offset to resume from')),
+                ('sha256', models.CharField(blank=True, help_text='Declared by the client, or computed when the upload is finalized', max_length=64)),
+                ('status', models.CharField(choices=[('open', 'Receiving chunks'), ('complete', 'Complete')], default='open', max_length=10)),
+                ('expires_at', models.DateTimeField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('donation', models.OneToOneField(blank=True, help_text='The donation created from this upload; set once, so retries are idempotent', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='upload', to='App.fooddonation')),
+                ('owner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='uploads', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['expires_at'], name='upload_expiry_idx')],
+            },
+        ),
+    ]
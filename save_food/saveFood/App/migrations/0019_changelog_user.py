@@ -0,0 +1,55 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:28
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def readdress_entries(apps, schema_editor):
+    """Re-log existing entries once per viewer and drop the unaddressed originals.
+
+    Re-logged entries get new, higher tokens, so clients simply receive
+    those rows again. Deletions logged before this migration cannot be
+    addressed (the rows are gone) and are dropped; clients catch up by
+    syncing from 0.
+    """
+    ChangeLog = apps.get_model('App', 'ChangeLog')
+    FoodDonation = apps.get_model('App', 'FoodDonation')
+    BuyRequest = apps.get_model('App', 'BuyRequest')
+    legacy = ChangeLog.objects.filter(user__isnull=True)
+    last = legacy.order_by('-seq').values_list('seq', flat=True).first()
+    if last is None:
+        return
+    entries = []
+    donation_ids = legacy.filter(model='donation', action='upsert').values('object_id')
+    for pk, donor_id, is_safe in FoodDonation.objects.filter(pk__in=donation_ids).values_list(
+            'id', 'donor_id', 'is_safe').iterator():
+        entries.append(ChangeLog(model='donation', object_id=pk,
+                                 user_id=None if is_safe else donor_id))
+    request_ids = legacy.filter(model='buy_request', action='upsert').values('object_id')
+    for pk, *users in BuyRequest.objects.filter(pk__in=request_ids).values_list(
+            'id', 'requester_id', 'donation__donor_id', 'assigned_collector__user_id').iterator():
+        entries.extend(ChangeLog(model='buy_request', object_id=pk, user_id=user)
+                       for user in set(users) - {None})
+    ChangeLog.objects.filter(seq__lte=last).delete()
+    ChangeLog.objects.bulk_create(entries, batch_size=2000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('App', '0018_upload'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='changelog',
+            name='user',
+            field=models.ForeignKey(blank=True, db_constraint=False, help_text='Who the change is for; empty for public rows', null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='changelog',
+            index=models.Index(fields=['user', 'seq'], name='changelog_user_seq_idx'),
+        ),
+        migrations.RunPython(readdress_entries, migrations.RunPython.noop),
+    ]
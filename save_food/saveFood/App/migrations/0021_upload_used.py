@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:35
+
+from django.db import migrations, models
+
+
+def mark_used(apps, schema_editor):
+    Upload = apps.get_model('App', 'Upload')
+    Upload.objects.filter(donation__isnull=False).update(status='used')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('App', '0020_event'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='upload',
+            name='status',
+            field=models.CharField(choices=[('open', 'Receiving chunks'), ('complete', 'Complete'), ('used', 'Made a donation')], default='open', max_length=10),
+        ),
+        migrations.RunPython(mark_used, migrations.RunPython.noop),
+    ]
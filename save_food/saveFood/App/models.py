@@ -1,7 +1,16 @@
-from django.db import models
+from datetime import datetime, time, timedelta
+from zoneinfo import ZoneInfo
+
+from django.conf import settings
+from django.db import models, transaction
+from django.db.models import Count, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
 from django.contrib.auth.models import AbstractUser
 import os, uuid, random
 
+from . import geo
+
 
 DISTRICT_CHOICES = [
     ('thiruvananthapuram', 'Thiruvananthapuram'),
@@ -40,6 +49,72 @@ FOOD_CATEGORY_CHOICES = [
 ]
 
 
+class FoodDonationQuerySet(models.QuerySet):
+    """Query helpers for donation feeds; rows are always loaded with their donor."""
+
+    def with_related(self):
+        return self.select_related('donor')
+
+    def live(self):
+        """Donations not yet expired, judged by the clock rather than waiting for the sweeper."""
+        return self.filter(
+            Q(expires_at__isnull=True) | Q(expires_at__gt=timezone.now()), is_expired=False,
+        )
+
+    def feed(self):
+        return self.with_related().live().filter(is_safe=True).order_by('-created_at')
+
+    def donated_by(self, user):
+        return self.with_related().filter(donor=user).order_by('-created_at')
+
+    def visible_to(self, user):
+        """Donations a user may see: the public (safe) feed plus their own."""
+        return self.filter(Q(is_safe=True) | Q(donor=user))
+
+    def near(self, latitude, longitude, radius_km):
+        """Candidates for a radius search: indexed geohash ranges plus a bounding box.
+
+        Exact distances are left to ``geo.rank_by_distance``.
+        """
+        cells = Q()
+        for low, high in geo.covering_ranges(latitude, longitude, radius_km):
+            cells |= Q(geohash__gte=low, geohash__lt=high)
+        min_lat, max_lat, min_lng, max_lng = geo.bounding_box(latitude, longitude, radius_km)
+        return self.filter(cells, latitude__range=(min_lat, max_lat))
+
+
+class BuyRequestQuerySet(models.QuerySet):
+    """Query helpers for buy request listings.
+
+    ``BuyRequestSerializer`` walks the requester, the donation and its donor,
+    and the assigned collector's user, so every listing joins those up front.
+    """
+
+    def with_related(self):
+        return self.select_related(
+            'requester', 'donation__donor', 'assigned_collector__user',
+        )
+
+    def visible_to(self, user):
+        """Requests a user sent, received, or is assigned to collect."""
+        return self.filter(
+            Q(requester=user) | Q(donation__donor=user) | Q(assigned_collector__user=user)
+        )
+
+    def sent_by(self, user):
+        return self.with_related().filter(requester=user).order_by('-created_at')
+
+    def received_by(self, user):
+        return self.with_related().filter(
+            donation__donor=user
+        ).order_by('-created_at')
+
+    def assigned_to(self, collector):
+        return self.with_related().filter(
+            assigned_collector=collector, status='accepted',
+        ).order_by('-created_at')
+
+
 def food_image_path(instance, filename):
     ext = filename.rsplit('.', 1)[-1]
     return os.path.join('food_donations', f'{uuid.uuid4().hex}.{ext}')
@@ -52,6 +127,9 @@ class CustomUser(AbstractUser):
     district = models.CharField(max_length=50, choices=DISTRICT_CHOICES)
     full_address = models.TextField(blank=True)
     user_type = models.CharField(max_length=20, choices=USER_TYPE_CHOICES, default='citizen')
+    # Names and phone numbers are embedded in donation and request lists, so
+    # their ETags include this.
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f"{self.full_name} ({self.username})"
@@ -74,11 +152,56 @@ class FoodDonation(models.Model):
         help_text='Full Gemini AI analysis result')
     is_safe = models.BooleanField(default=True)
     is_sold = models.BooleanField(default=False)
+    renditions = models.JSONField(default=dict, blank=True, editable=False,
+        help_text='Downscaled copies of the image, keyed by rendition name')
+    geohash = models.BigIntegerField(null=True, blank=True, editable=False, db_index=True,
+        help_text='Interleaved lat/lng cell code used for radius searches')
+    expires_at = models.DateTimeField(null=True, blank=True, editable=False,
+        help_text='End of the expiry date, or creation plus safety hours')
+    is_expired = models.BooleanField(default=False, editable=False,
+        help_text='Set by the expiry sweeper once expires_at has passed')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = FoodDonationQuerySet.as_manager()
+
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Keyset pagination seek for the public feed. Partial, because SQLite
+            # compiles ``is_safe=True`` to a bare column test that cannot seek a
+            # leading boolean column.
+            models.Index(fields=['-created_at', '-id'],
+                         condition=Q(is_safe=True, is_expired=False),
+                         name='donation_feed_idx'),
+            models.Index(fields=['donor', '-created_at'], name='donation_donor_idx'),
+            # Sweeper seek: only rows still waiting to be expired.
+            models.Index(fields=['expires_at'], condition=Q(is_expired=False),
+                         name='donation_expiry_idx'),
+            # Rendition reuse: other donations sharing a content-addressed image.
+            models.Index(fields=['image'], name='donation_image_idx'),
+        ]
+
+    def compute_expires_at(self):
+        """Packed food lasts through its printed date (in ``LOCAL_TIME_ZONE``);
+        home-cooked food for ``safety_hours`` after posting. Otherwise ``None``.
+        """
+        expiry_date = self._meta.get_field('expiry_date').to_python(self.expiry_date)
+        if expiry_date:
+            local = ZoneInfo(getattr(settings, 'LOCAL_TIME_ZONE', settings.TIME_ZONE))
+            return datetime.combine(expiry_date + timedelta(days=1), time.min, tzinfo=local)
+        if self.safety_hours:
+            return (self.created_at or timezone.now()) + timedelta(hours=self.safety_hours)
+        return None
+
+    def set_derived_fields(self):
+        """Fill ``geohash`` and ``expires_at``; call before ``bulk_create``, which skips ``save()``."""
+        self.geohash = geo.encode(self.latitude, self.longitude)
+        self.expires_at = self.compute_expires_at()
+
+    def save(self, *args, **kwargs):
+        self.set_derived_fields()
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return f"{self.title} by {self.donor.full_name}"
@@ -106,11 +229,45 @@ class FoodWasteCollector(models.Model):
     vehicle_number = models.CharField(max_length=20, blank=True)
     zone = models.CharField(max_length=100, blank=True,
         help_text='Area/zone assigned for collection')
+    district = models.CharField(max_length=50, choices=DISTRICT_CHOICES, blank=True,
+        help_text="District served; defaults to the user's district")
+    latitude = models.FloatField(null=True, blank=True,
+        help_text='Base location for automatic assignment; the district centre is used when unset')
+    longitude = models.FloatField(null=True, blank=True)
+    active_load = models.PositiveIntegerField(default=0, editable=False,
+        help_text='Accepted, undelivered requests currently assigned')
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Least-loaded active collectors first, per district and overall.
+            models.Index(fields=['district', 'active_load', 'id'], condition=Q(is_active=True),
+                         name='collector_district_load_idx'),
+            models.Index(fields=['active_load', 'id'], condition=Q(is_active=True),
+                         name='collector_load_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        if not self.district:
+            self.district = self.user.district
+        super().save(*args, **kwargs)
+
+    @classmethod
+    def refresh_load(cls, collector_ids):
+        """Recount ``active_load`` for the given collectors in one UPDATE."""
+        collector_ids = [pk for pk in collector_ids if pk is not None]
+        if not collector_ids:
+            return
+        active = BuyRequest.objects.filter(
+            assigned_collector=OuterRef('pk'), status='accepted',
+        ).exclude(delivery_status='delivered').order_by().values(
+            'assigned_collector'
+        ).annotate(n=Count('id')).values('n')
+        cls.objects.filter(pk__in=collector_ids).update(
+            active_load=Coalesce(Subquery(active), 0),
+        )
 
     def __str__(self):
         return f"{self.user.full_name} ({self.employee_id})"
@@ -120,6 +277,10 @@ def _generate_otp():
     return str(random.randint(100000, 999999))
 
 
+class RequestConflict(Exception):
+    """The buy request was already answered, or its donation already sold."""
+
+
 class BuyRequest(models.Model):
     """A buy request from a user wanting to acquire a donated food item."""
     requester = models.ForeignKey(
@@ -149,13 +310,25 @@ class BuyRequest(models.Model):
         null=True, blank=True, related_name='assigned_requests',
         help_text='Collector assigned by admin'
     )
+    dropoff_latitude = models.FloatField(null=True, blank=True,
+        help_text="Requester's delivery location; the district centre is used when unset")
+    dropoff_longitude = models.FloatField(null=True, blank=True)
 
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = BuyRequestQuerySet.as_manager()
+
     class Meta:
         ordering = ['-created_at']
         unique_together = ['requester', 'donation']
+        indexes = [
+            models.Index(fields=['requester', '-created_at'], name='buyrequest_requester_idx'),
+            # Rival lookups when accepting, and per-donation status checks.
+            models.Index(fields=['donation', 'status'], name='buyrequest_donation_idx'),
+            models.Index(fields=['assigned_collector', 'status', '-created_at'],
+                         name='buyrequest_collector_idx'),
+        ]
 
     def generate_otps(self):
         """Generate random OTPs for both sender and receiver."""
@@ -163,5 +336,298 @@ class BuyRequest(models.Model):
         self.receiver_otp = _generate_otp()
         self.save()
 
+    def accept(self):
+        """Accept this request, sell its donation and reject rival requests atomically.
+
+        The request moves out of ``pending`` and the donation out of
+        ``is_sold=False`` through conditional UPDATEs, so of several
+        concurrent accepts (double taps, two devices) exactly one wins. The
+        losers raise ``RequestConflict`` and roll back. Returns the rejected
+        rivals, loaded with just what ``notify_buy_request`` needs.
+        """
+        now = timezone.now()
+        sender_otp, receiver_otp = _generate_otp(), _generate_otp()
+        with transaction.atomic():
+            answered = BuyRequest.objects.filter(pk=self.pk, status='pending').update(
+                status='accepted', delivery_status='waiting',
+                sender_otp=sender_otp, receiver_otp=receiver_otp, updated_at=now,
+            )
+            if not answered:
+                raise RequestConflict('This request has already been answered.')
+            sold = FoodDonation.objects.live().filter(
+                pk=self.donation_id, is_sold=False,
+            ).update(is_sold=True, updated_at=now)
+            if not sold:
+                raise RequestConflict(
+                    'This item has already been sold.'
+                    if FoodDonation.objects.filter(pk=self.donation_id, is_sold=True).exists()
+                    else 'This item has expired.'
+                )
+            rivals = BuyRequest.objects.filter(
+                donation_id=self.donation_id, status='pending',
+            ).exclude(pk=self.pk)
+            rejected = list(rivals.order_by().only('id', 'requester_id', 'donation_id',
+                                                   'assigned_collector_id', 'delivery_status'))
+            if rejected:
+                BuyRequest.objects.filter(pk__in=[r.pk for r in rejected]).update(
+                    status='rejected', updated_at=now,
+                )
+            # Audiences come from the loaded donation when there is one; one insert logs both.
+            donation = self._state.fields_cache.get('donation')
+            if donation is not None:
+                for rival in rejected:
+                    rival.donation = donation
+            requests = {r.pk: known_audience(r) for r in [self, *rejected]}
+            ChangeLog.objects.bulk_create([
+                *ChangeLog.entries('donation', [self.donation_id], current=(
+                    None if donation is None else {donation.pk: known_audience(donation)})),
+                *ChangeLog.entries('buy_request', requests, current=(
+                    None if None in requests.values() else requests)),
+            ])
+            FoodWasteCollector.refresh_load([self.assigned_collector_id])
+
+        self.status, self.delivery_status, self.updated_at = 'accepted', 'waiting', now
+        self.sender_otp, self.receiver_otp = sender_otp, receiver_otp
+        if 'donation' in self._state.fields_cache:
+            self.donation.is_sold, self.donation.updated_at = True, now
+        for rival in rejected:
+            rival.status, rival.updated_at = 'rejected', now
+        return rejected
+
+    def reject(self):
+        """Reject this request if it is still pending; raises ``RequestConflict`` otherwise."""
+        now = timezone.now()
+        with transaction.atomic():
+            answered = BuyRequest.objects.filter(pk=self.pk, status='pending').update(
+                status='rejected', updated_at=now,
+            )
+            if not answered:
+                raise RequestConflict('This request has already been answered.')
+            ChangeLog.record('buy_request', [self.pk])
+        self.status, self.updated_at = 'rejected', now
+
     def __str__(self):
         return f"Request by {self.requester.full_name} for {self.donation.title} ({self.status})"
+
+
+class FoodAnalysis(models.Model):
+    """Cached model verdict for an image, keyed by a hash of its bytes and food type."""
+    content_hash = models.CharField(max_length=64, unique=True)
+    food_type = models.CharField(max_length=20, choices=FOOD_TYPE_CHOICES)
+    result = models.JSONField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name_plural = 'food analyses'
+
+    def __str__(self):
+        return f"{self.food_type} analysis {self.content_hash[:12]}"
+
+
+JOB_STATUS_CHOICES = [
+    ('queued', 'Queued'),
+    ('running', 'Running'),
+    ('done', 'Done'),
+    ('failed', 'Failed'),
+]
+
+
+class Job(models.Model):
+    """A unit of background work, picked up by ``manage.py run_workers``."""
+    name = models.CharField(max_length=200, help_text='Dotted path of the task function')
+    args = models.JSONField(default=list, blank=True)
+    status = models.CharField(max_length=10, choices=JOB_STATUS_CHOICES, default='queued')
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=3)
+    run_after = models.DateTimeField(default=timezone.now)
+    locked_until = models.DateTimeField(null=True, blank=True,
+        help_text='A running job not finished by this time is handed to another worker')
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['status', 'run_after'], name='job_ready_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.name}{tuple(self.args)} ({self.status})"
+
+
+class StoredFile(models.Model):
+    """Reference count for a content-addressed media file (see ``App/media.py``)."""
+    name = models.CharField(max_length=255, unique=True)
+    size = models.PositiveBigIntegerField()
+    refs = models.PositiveIntegerField(default=0)
+    released_at = models.DateTimeField(null=True, blank=True,
+        help_text='When the last reference was dropped; swept after MEDIA_GC_GRACE')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['released_at'], condition=Q(refs=0),
+                         name='storedfile_unreferenced_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.name} ({self.refs} refs)"
+
+
+UPLOAD_STATUS_CHOICES = [
+    ('open', 'Receiving chunks'),
+    ('complete', 'Complete'),
+    ('used', 'Made a donation'),
+]
+
+
+class Upload(models.Model):
+    """A resumable upload session for a donation photo (see ``App/uploads.py``)."""
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    owner = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='uploads')
+    filename = models.CharField(max_length=255)
+    content_type = models.CharField(max_length=100, blank=True)
+    size = models.PositiveBigIntegerField(help_text='Declared total size in bytes')
+    received = models.PositiveBigIntegerField(default=0,
+        help_text='Bytes stored contiguously from the start; the offset to resume from')
+    sha256 = models.CharField(max_length=64, blank=True,
+        help_text='Declared by the client, or computed when the upload is finalized')
+    status = models.CharField(max_length=10, choices=UPLOAD_STATUS_CHOICES, default='open')
+    donation = models.OneToOneField(FoodDonation, null=True, blank=True,
+        on_delete=models.SET_NULL, related_name='upload',
+        help_text='The donation created from this upload; set once, so retries are idempotent')
+    expires_at = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['expires_at'], name='upload_expiry_idx'),
+        ]
+
+    def __str__(self):
+        return f"Upload {self.id} ({self.received}/{self.size} bytes, {self.status})"
+
+
+CHANGE_MODEL_CHOICES = [
+    ('donation', 'Food Donation'),
+    ('buy_request', 'Buy Request'),
+]
+
+CHANGE_ACTION_CHOICES = [
+    ('upsert', 'Created / Updated'),
+    ('delete', 'Deleted'),
+]
+
+
+def change_audiences(model, object_ids):
+    """``{object_id: user ids}`` for who can currently see each row; ``None`` means everyone.
+
+    Safe donations are public; other donations only their donor's. A buy
+    request is seen by its requester, the donor and the assigned collector.
+    """
+    if model == 'donation':
+        rows = FoodDonation.objects.filter(pk__in=object_ids).values_list('id', 'donor_id', 'is_safe')
+        return {pk: {None} if is_safe else {donor_id} for pk, donor_id, is_safe in rows}
+    rows = BuyRequest.objects.filter(pk__in=object_ids).values_list(
+        'id', 'requester_id', 'donation__donor_id', 'assigned_collector__user_id',
+    )
+    return {pk: set(users) - {None} for pk, *users in rows}
+
+
+# Columns ``change_audiences`` reads; saves that touch none of them keep the audience.
+AUDIENCE_FIELDS = {
+    'donation': {'donor', 'is_safe'},
+    'buy_request': {'requester', 'donation', 'assigned_collector'},
+}
+
+
+def known_audience(instance):
+    """``change_audiences`` for one loaded row, from the relations already on it.
+
+    ``None`` when that would need a query (a buy request whose donation or
+    collector is not loaded).
+    """
+    if isinstance(instance, FoodDonation):
+        return {None} if instance.is_safe else {instance.donor_id}
+    cache = instance._state.fields_cache
+    if 'donation' not in cache:
+        return None
+    users = {instance.requester_id, cache['donation'].donor_id}
+    if instance.assigned_collector_id is not None:
+        collector = cache.get('assigned_collector')
+        if collector is None:
+            return None
+        users.add(collector.user_id)
+    return users
+
+
+class ChangeLog(models.Model):
+    """Append-only log of row changes; ``seq`` is the delta-sync token.
+
+    A change is logged once per user who could see the row before or after
+    it (``user`` is null for public rows), so each user's sync reads only
+    their own entries.
+    """
+    seq = models.BigAutoField(primary_key=True)
+    model = models.CharField(max_length=20, choices=CHANGE_MODEL_CHOICES)
+    object_id = models.BigIntegerField()
+    # No constraint: deleting a user logs deletions of their rows addressed to them.
+    user = models.ForeignKey(CustomUser, null=True, blank=True, on_delete=models.DO_NOTHING,
+        db_constraint=False, related_name='+',
+        help_text='Who the change is for; empty for public rows')
+    action = models.CharField(max_length=10, choices=CHANGE_ACTION_CHOICES, default='upsert')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['seq']
+        indexes = [
+            models.Index(fields=['user', 'seq'], name='changelog_user_seq_idx'),
+        ]
+
+    @classmethod
+    def record(cls, model, object_ids, action='upsert', previous=None, current=None):
+        """Log a change to each id; use after bulk ``update()`` calls that skip signals.
+
+        ``previous`` maps ids to who could see them before the change (see
+        ``change_audiences``); rows that lost viewers need it so those users
+        learn the row is gone. Deleted rows are logged for ``previous`` only.
+        ``current`` saves the audience lookup when the caller already knows it.
+        """
+        cls.objects.bulk_create(cls.entries(model, object_ids, action, previous, current))
+
+    @classmethod
+    def entries(cls, model, object_ids, action='upsert', previous=None, current=None):
+        """The unsaved rows ``record()`` would insert, to combine several changes in one insert."""
+        object_ids = list(object_ids)
+        if action != 'upsert':
+            current = {}
+        elif current is None:
+            current = change_audiences(model, object_ids)
+        previous = previous or {}
+        return [
+            cls(model=model, object_id=pk, user_id=user, action=action)
+            for pk in object_ids
+            for user in current.get(pk, set()) | previous.get(pk, set())
+        ]
+
+    def __str__(self):
+        return f"#{self.seq} {self.action} {self.model} {self.object_id}"
+
+
+class Event(models.Model):
+    """A published real-time event, relayed between processes by ``events.DatabaseBroker``."""
+    seq = models.BigAutoField(primary_key=True)
+    channel = models.CharField(max_length=50)
+    payload = models.JSONField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['seq']
+        indexes = [
+            models.Index(fields=['created_at'], name='event_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"#{self.seq} {self.channel}"
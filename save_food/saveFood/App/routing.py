@@ -0,0 +1,142 @@
+"""Multi-stop tour planning for collectors.
+
+A collector's tour visits every pending pickup and drop-off once, and a
+drop-off may only come after its pickup. Tours are open paths: they start at
+the collector's position (when known) and end at the last stop. The planner
+builds a greedy nearest-neighbour tour over a haversine distance matrix and
+improves it with 2-opt moves that keep every pickup ahead of its drop-off.
+"""
+import math
+import time
+from collections import namedtuple
+
+from .geo import EARTH_RADIUS_KM
+
+# ``after`` is the key of the stop that must be visited first, if any.
+Stop = namedtuple('Stop', ['key', 'latitude', 'longitude', 'after'], defaults=[None])
+Route = namedtuple('Route', ['stops', 'legs', 'total_km'])
+
+
+def distance_matrix(points):
+    """Pairwise haversine distances in km for ``[(lat, lng), ...]``."""
+    rads = [(math.radians(lat), math.radians(lng)) for lat, lng in points]
+    cosines = [math.cos(phi) for phi, _ in rads]
+    sin, asin, sqrt = math.sin, math.asin, math.sqrt
+    n = len(points)
+    matrix = [[0.0] * n for _ in range(n)]
+    for i in range(n):
+        phi1, lam1 = rads[i]
+        cos1 = cosines[i]
+        row = matrix[i]
+        for j in range(i + 1, n):
+            phi2, lam2 = rads[j]
+            a = sin((phi2 - phi1) / 2) ** 2 + cos1 * cosines[j] * sin((lam2 - lam1) / 2) ** 2
+            row[j] = matrix[j][i] = 2 * EARTH_RADIUS_KM * asin(min(1.0, sqrt(a)))
+    return matrix
+
+
+def path_length(tour, dist):
+    return sum(dist[a][b] for a, b in zip(tour, tour[1:]))
+
+
+def nearest_neighbour(dist, before, start=None):
+    """Greedy tour over nodes ``0..n-1``; ``before[i]`` must precede ``i``.
+
+    ``start`` is a fixed first node (the collector's position). Without it
+    the tour opens at the first node that has no predecessor.
+    """
+    n = len(dist)
+    waiting = {}
+    for node, required in enumerate(before):
+        if required is not None:
+            waiting.setdefault(required, []).append(node)
+    available = [node for node in range(n) if before[node] is None and node != start]
+
+    tour = []
+    current = start
+    if current is not None:
+        tour.append(current)
+        available.extend(waiting.pop(current, ()))
+    while available:
+        if current is None:
+            index = 0
+        else:
+            row = dist[current]
+            index = min(range(len(available)), key=lambda k: row[available[k]])
+        current = available[index]
+        available[index] = available[-1]
+        available.pop()
+        tour.append(current)
+        available.extend(waiting.pop(current, ()))
+    return tour
+
+
+def two_opt(tour, dist, before, fixed_start=False, deadline=None):
+    """Improve ``tour`` in place with precedence-preserving segment reversals.
+
+    Reversing ``tour[i:j + 1]`` flips the order of every pair inside it, so
+    the move is only legal while the segment holds no node together with
+    its predecessor. Scanning ``j`` upwards, the first node whose
+    predecessor sits at or after ``i`` ends the scan for that ``i``.
+    """
+    n = len(tour)
+    position = [0] * len(dist)
+    for k, node in enumerate(tour):
+        position[node] = k
+    first = 1 if fixed_start else 0
+
+    improved = True
+    while improved:
+        improved = False
+        for i in range(first, n - 1):
+            if deadline is not None and time.perf_counter() > deadline:
+                return tour
+            a = tour[i - 1] if i > 0 else None
+            b = tour[i]
+            for j in range(i + 1, n):
+                c = tour[j]
+                required = before[c]
+                if required is not None and position[required] >= i:
+                    break
+                d = tour[j + 1] if j + 1 < n else None
+                old = (dist[a][b] if a is not None else 0.0) + (dist[c][d] if d is not None else 0.0)
+                new = (dist[a][c] if a is not None else 0.0) + (dist[b][d] if d is not None else 0.0)
+                if new < old - 1e-9:
+                    tour[i:j + 1] = tour[i:j + 1][::-1]
+                    for k in range(i, j + 1):
+                        position[tour[k]] = k
+                    improved = True
+                    break
+    return tour
+
+
+def plan_route(stops, origin=None, time_budget=None):
+    """Order ``stops`` into a short feasible tour.
+
+    ``origin`` is an optional ``(lat, lng)`` the tour starts from.
+    ``time_budget`` caps the 2-opt phase in seconds; the greedy tour is
+    always completed. Returns a ``Route`` whose ``legs[k]`` is the distance
+    into ``stops[k]`` (from the origin for the first stop, when given).
+    """
+    if not stops:
+        return Route([], [], 0.0)
+    index = {stop.key: k for k, stop in enumerate(stops)}
+    before = [index.get(stop.after) for stop in stops]
+    points = [(stop.latitude, stop.longitude) for stop in stops]
+    start = None
+    if origin is not None:
+        start = len(points)
+        points.append(origin)
+        before.append(None)
+
+    deadline = time.perf_counter() + time_budget if time_budget is not None else None
+    dist = distance_matrix(points)
+    tour = nearest_neighbour(dist, before, start)
+    two_opt(tour, dist, before, fixed_start=start is not None, deadline=deadline)
+
+    legs = [dist[a][b] for a, b in zip(tour, tour[1:])]
+    if start is None:
+        legs.insert(0, 0.0)
+    else:
+        tour = tour[1:]
+    return Route([stops[k] for k in tour], legs, sum(legs))
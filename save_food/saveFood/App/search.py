@@ -0,0 +1,156 @@
+"""Full-text search over donations.
+
+SQLite keeps an FTS5 external-content table, ``App_donation_fts``, and
+PostgreSQL a stored generated ``search_vector`` column with a GIN index.
+Both are created by migration 0016 and maintained by the database itself
+(triggers / the generated column), so every write path, bulk updates
+included, keeps the index in sync. Other databases, and SQLite builds
+without FTS5, fall back to unranked ``icontains`` matching.
+
+A query is split into words; every word must match, each as a prefix
+("bir" finds "biryani"). Title hits weigh more than description hits,
+which weigh more than the address. Backends rank a caller's queryset, so
+feed filters are checked per match inside the same query.
+
+SQLite drops triggers along with their table, and Django rebuilds the
+donation table for many schema changes, so ``repair_sqlite_index`` runs
+after every migrate to reinstall missing triggers and reindex.
+"""
+import re
+import threading
+
+from django.db import connection, connections
+from django.db.models import FloatField, Q, Value
+
+FTS_TABLE = 'App_donation_fts'
+MAX_QUERY_WORDS = 8
+
+_WORD = re.compile(r'\w+')
+
+SQLITE_TRIGGERS = {
+    'App_donation_fts_ai':
+        'CREATE TRIGGER IF NOT EXISTS App_donation_fts_ai AFTER INSERT ON App_fooddonation BEGIN'
+        ' INSERT INTO App_donation_fts(rowid, title, description, address)'
+        ' VALUES (new.id, new.title, new.description, new.address); END',
+    'App_donation_fts_ad':
+        'CREATE TRIGGER IF NOT EXISTS App_donation_fts_ad AFTER DELETE ON App_fooddonation BEGIN'
+        ' INSERT INTO App_donation_fts(App_donation_fts, rowid, title, description, address)'
+        " VALUES ('delete', old.id, old.title, old.description, old.address); END",
+    'App_donation_fts_au':
+        'CREATE TRIGGER IF NOT EXISTS App_donation_fts_au'
+        ' AFTER UPDATE OF title, description, address ON App_fooddonation BEGIN'
+        ' INSERT INTO App_donation_fts(App_donation_fts, rowid, title, description, address)'
+        " VALUES ('delete', old.id, old.title, old.description, old.address);"
+        ' INSERT INTO App_donation_fts(rowid, title, description, address)'
+        ' VALUES (new.id, new.title, new.description, new.address); END',
+}
+
+
+def terms(query):
+    """Lower-cased words of ``query``; punctuation and operators are dropped."""
+    return _WORD.findall(query.lower())[:MAX_QUERY_WORDS]
+
+
+class SearchBackend:
+    """Interface for search backends."""
+
+    def rank(self, queryset, words):
+        """``queryset`` narrowed to rows matching all ``words``, annotated with
+        ``score`` (higher is better) and ordered best first."""
+        raise NotImplementedError
+
+
+class SQLiteFTSBackend(SearchBackend):
+    # bm25 column weights: title, description, address.
+    weights = (10.0, 3.0, 1.0)
+
+    def rank(self, queryset, words):
+        expression = ' AND '.join(f'"{word}"*' for word in words)
+        weights = ', '.join(str(w) for w in self.weights)
+        # Joining the index lets SQLite walk the matches and check the
+        # caller's filters per hit. bm25 is negative, lower is better.
+        return queryset.extra(
+            tables=[FTS_TABLE],
+            where=[f'{FTS_TABLE}.rowid = App_fooddonation.id', f'{FTS_TABLE} MATCH %s'],
+            params=[expression],
+            select={'score': f'-bm25({FTS_TABLE}, {weights})'},
+        ).order_by('-score', '-id')
+
+
+class PostgresBackend(SearchBackend):
+    def rank(self, queryset, words):
+        expression = ' & '.join(f'{word}:*' for word in words)
+        query = "to_tsquery('simple', %s)"
+        return queryset.extra(
+            where=[f'"App_fooddonation".search_vector @@ {query}'],
+            params=[expression],
+            select={'score': f'ts_rank_cd("App_fooddonation".search_vector, {query})'},
+            select_params=[expression],
+        ).order_by('-score', '-id')
+
+
+class LikeBackend(SearchBackend):
+    """Unranked fallback; newest matches first."""
+
+    def rank(self, queryset, words):
+        condition = Q()
+        for word in words:
+            condition &= (Q(title__icontains=word) | Q(description__icontains=word)
+                          | Q(address__icontains=word))
+        return queryset.filter(condition).annotate(
+            score=Value(0.0, output_field=FloatField()),
+        ).order_by('-created_at', '-id')
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_backend():
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            _backend = _detect_backend()
+        return _backend
+
+
+def reset_backend():
+    global _backend
+    with _backend_lock:
+        _backend = None
+
+
+def _detect_backend():
+    if connection.vendor == 'postgresql':
+        return PostgresBackend()
+    if connection.vendor == 'sqlite' and FTS_TABLE in connection.introspection.table_names():
+        return SQLiteFTSBackend()
+    return LikeBackend()
+
+
+def repair_sqlite_index(using='default'):
+    """Reinstall missing FTS triggers and rebuild the index; returns whether it did."""
+    conn = connections[using]
+    if conn.vendor != 'sqlite':
+        return False
+    names = [FTS_TABLE, *SQLITE_TRIGGERS]
+    with conn.cursor() as cursor:
+        cursor.execute(
+            f"SELECT name FROM sqlite_master WHERE name IN ({', '.join(['%s'] * len(names))})",
+            names,
+        )
+        present = {name for (name,) in cursor.fetchall()}
+        if FTS_TABLE not in present:
+            return False
+        missing = [name for name in SQLITE_TRIGGERS if name not in present]
+        if not missing:
+            return False
+        for name in missing:
+            cursor.execute(SQLITE_TRIGGERS[name])
+        cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+    return True
+
+
+def ranked(queryset, query):
+    """Donations in ``queryset`` matching a user query, best first, with ``score``."""
+    return get_backend().rank(queryset, terms(query))
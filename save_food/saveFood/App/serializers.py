@@ -1,8 +1,23 @@
+from django.core.files.storage import default_storage
 from rest_framework import serializers
+from .images import RENDITIONS
+from .metrics import timing_serialization
 from .models import CustomUser, FoodDonation, BuyRequest, FoodWasteCollector
 import re
 
 
+def rendition_urls(donation, request):
+    """Absolute URL per rendition, falling back to the original until it is generated."""
+    if not (donation.image and request):
+        return None
+    original = request.build_absolute_uri(donation.image.url)
+    return {
+        name: request.build_absolute_uri(default_storage.url(donation.renditions[name]))
+        if name in donation.renditions else original
+        for name in RENDITIONS
+    }
+
+
 class SignupSerializer(serializers.ModelSerializer):
     password = serializers.CharField(write_only=True, min_length=8)
     confirm_password = serializers.CharField(write_only=True)
@@ -77,20 +92,80 @@ class UserSerializer(serializers.ModelSerializer):
         ]
 
 
-class FoodDonationSerializer(serializers.ModelSerializer):
+class SerializationTimingMixin:
+    """Count ``.data`` towards the request's serialization time (see ``metrics.py``)."""
+
+    @property
+    def data(self):
+        with timing_serialization():
+            return super().data
+
+
+class TimedListSerializer(SerializationTimingMixin, serializers.ListSerializer):
+    pass
+
+
+class FieldSelectionMixin:
+    """List/detail representations with ``?fields=`` and ``?expand=`` sparse fieldsets.
+
+    Views opt in by passing ``representation`` in the context. ``'list'``
+    keeps ``Meta.list_fields``, plus any other field named in ``?expand=``;
+    ``'detail'`` keeps every field. ``?fields=a,b`` then narrows the result.
+    Serializers nested inside another one take their representation from
+    the context and ignore the query string.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        representation = self.context.get('representation')
+        if representation is None:
+            return
+
+        keep = set(self.fields)
+        params = {}
+        request = self.context.get('request')
+        if request is not None and not self.context.get('nested'):
+            params = request.query_params
+        if representation == 'list':
+            keep = set(self.Meta.list_fields) | (self._param_set(params, 'expand') & keep)
+        requested = self._param_set(params, 'fields')
+        if requested:
+            keep &= requested
+        for name in list(self.fields):
+            if name not in keep:
+                self.fields.pop(name)
+
+    @staticmethod
+    def _param_set(params, name):
+        raw = params.get(name, '')
+        return {part.strip() for part in raw.split(',') if part.strip()}
+
+
+class FoodDonationSerializer(SerializationTimingMixin, FieldSelectionMixin,
+                             serializers.ModelSerializer):
     donor_name = serializers.CharField(source='donor.full_name', read_only=True)
     image_url = serializers.SerializerMethodField()
+    image_urls = serializers.SerializerMethodField()
 
     class Meta:
         model = FoodDonation
         fields = [
             'id', 'donor', 'donor_name', 'title', 'description',
-            'food_type', 'category', 'image', 'image_url',
+            'food_type', 'category', 'image', 'image_url', 'image_urls',
+            'latitude', 'longitude', 'address',
+            'expiry_date', 'safety_hours', 'expires_at', 'gemini_analysis',
+            'is_safe', 'is_sold', 'is_expired', 'created_at',
+        ]
+        # Feed cards need neither the raw upload nor the full model verdict.
+        list_fields = [
+            'id', 'donor', 'donor_name', 'title', 'description',
+            'food_type', 'category', 'image_urls',
             'latitude', 'longitude', 'address',
-            'expiry_date', 'safety_hours', 'gemini_analysis',
-            'is_safe', 'is_sold', 'created_at',
+            'expiry_date', 'safety_hours', 'expires_at',
+            'is_safe', 'is_sold', 'is_expired', 'created_at',
         ]
         read_only_fields = ['donor', 'donor_name', 'created_at']
+        list_serializer_class = TimedListSerializer
 
     def get_image_url(self, obj):
         request = self.context.get('request')
@@ -98,14 +173,19 @@ class FoodDonationSerializer(serializers.ModelSerializer):
             return request.build_absolute_uri(obj.image.url)
         return None
 
+    def get_image_urls(self, obj):
+        return rendition_urls(obj, self.context.get('request'))
 
-class BuyRequestSerializer(serializers.ModelSerializer):
+
+class BuyRequestSerializer(SerializationTimingMixin, FieldSelectionMixin,
+                           serializers.ModelSerializer):
     requester_name = serializers.CharField(source='requester.full_name', read_only=True)
     requester_phone = serializers.CharField(source='requester.phone', read_only=True)
     requester_address = serializers.CharField(source='requester.full_address', read_only=True)
     requester_district = serializers.CharField(source='requester.district', read_only=True)
     donation_title = serializers.CharField(source='donation.title', read_only=True)
     donation_image_url = serializers.SerializerMethodField()
+    donation_image_urls = serializers.SerializerMethodField()
     donor_id = serializers.IntegerField(source='donation.donor.id', read_only=True)
     donor_name = serializers.CharField(source='donation.donor.full_name', read_only=True)
     donation_data = serializers.SerializerMethodField()
@@ -116,14 +196,27 @@ class BuyRequestSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'requester', 'requester_name', 'requester_phone',
             'requester_address', 'requester_district',
-            'donation', 'donation_title', 'donation_image_url',
+            'donation', 'donation_title', 'donation_image_url', 'donation_image_urls',
             'donor_id', 'donor_name', 'donation_data',
             'status', 'message',
             'sender_otp', 'receiver_otp',
             'delivery_status', 'collector_name',
+            'dropoff_latitude', 'dropoff_longitude',
+            'created_at', 'updated_at',
+        ]
+        # The donation travels once, as ``donation_data`` (itself compact in list
+        # mode); the flattened ``donation_title``/``donor_*``/``donation_image_*``
+        # copies are detail-only or ``?expand=``.
+        list_fields = [
+            'id', 'requester', 'requester_name', 'requester_phone',
+            'requester_address', 'requester_district',
+            'donation', 'donation_data',
+            'status', 'sender_otp', 'receiver_otp',
+            'delivery_status', 'collector_name',
             'created_at', 'updated_at',
         ]
         read_only_fields = ['requester', 'status', 'created_at', 'updated_at']
+        list_serializer_class = TimedListSerializer
 
     def get_donation_image_url(self, obj):
         request = self.context.get('request')
@@ -131,9 +224,18 @@ class BuyRequestSerializer(serializers.ModelSerializer):
             return request.build_absolute_uri(obj.donation.image.url)
         return None
 
+    def get_donation_image_urls(self, obj):
+        return rendition_urls(obj.donation, self.context.get('request'))
+
     def get_donation_data(self, obj):
-        request = self.context.get('request')
-        return FoodDonationSerializer(obj.donation, context={'request': request}).data
+        # One nested serializer per list, not per row; field setup is not free.
+        if not hasattr(self, '_donation_serializer'):
+            self._donation_serializer = FoodDonationSerializer(context={
+                'request': self.context.get('request'),
+                'representation': self.context.get('representation'),
+                'nested': True,
+            })
+        return self._donation_serializer.to_representation(obj.donation)
 
     def get_collector_name(self, obj):
         if obj.assigned_collector:
@@ -151,5 +253,5 @@ class CollectorSerializer(serializers.ModelSerializer):
         model = FoodWasteCollector
         fields = [
             'id', 'user_id', 'full_name', 'phone', 'district',
-            'employee_id', 'vehicle_number', 'zone', 'is_active',
+            'employee_id', 'vehicle_number', 'zone', 'is_active', 'active_load',
         ]
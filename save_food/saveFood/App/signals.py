@@ -0,0 +1,146 @@
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_migrate, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from . import metrics, search, tasks
+from .authentication import invalidate_token, invalidate_user
+from .images import generate_donation_renditions
+from .models import (
+    AUDIENCE_FIELDS, BuyRequest, ChangeLog, CustomUser, FoodDonation, FoodWasteCollector,
+    change_audiences, known_audience,
+)
+
+_CHANGE_MODELS = {FoodDonation: 'donation', BuyRequest: 'buy_request'}
+# Columns whose change moves a request in or out of its collector's active load.
+_LOAD_FIELDS = {'status', 'delivery_status', 'assigned_collector'}
+
+
+def _touches(update_fields, fields):
+    """Whether a save with ``update_fields`` can change any of ``fields``."""
+    return update_fields is None or not fields.isdisjoint(update_fields)
+
+
+@receiver(pre_save, sender=FoodDonation)
+@receiver(pre_save, sender=BuyRequest)
+@receiver(pre_delete, sender=FoodDonation)
+@receiver(pre_delete, sender=BuyRequest)
+def remember_audience(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Note who can see the row before it changes, so users who lose sight of it hear about it.
+
+    Saves limited to other columns keep the audience, so they skip the lookup.
+    """
+    model = _CHANGE_MODELS[sender]
+    instance._previous_audience = {}
+    if instance.pk and not raw and _touches(update_fields, AUDIENCE_FIELDS[model]):
+        instance._previous_audience = change_audiences(model, [instance.pk])
+
+
+@receiver(post_save, sender=FoodDonation)
+@receiver(post_save, sender=BuyRequest)
+def log_save(sender, instance, raw=False, **kwargs):
+    if not raw:
+        audience = known_audience(instance)
+        ChangeLog.record(_CHANGE_MODELS[sender], [instance.pk],
+                         previous=getattr(instance, '_previous_audience', None),
+                         current=None if audience is None else {instance.pk: audience})
+
+
+@receiver(post_delete, sender=FoodDonation)
+@receiver(post_delete, sender=BuyRequest)
+def log_delete(sender, instance, **kwargs):
+    ChangeLog.record(_CHANGE_MODELS[sender], [instance.pk], action='delete',
+                     previous=getattr(instance, '_previous_audience', None))
+
+
+def _release_on_commit(names):
+    def release():
+        for name in names:
+            default_storage.delete(name)
+
+    transaction.on_commit(release)
+
+
+@receiver(post_delete, sender=FoodDonation)
+def release_donation_files(sender, instance, **kwargs):
+    """Drop the deleted donation's references to its photo and renditions."""
+    _release_on_commit([instance.image.name, *instance.renditions.values()] if instance.image else [])
+
+
+@receiver(pre_save, sender=FoodDonation)
+def remember_files(sender, instance, raw=False, update_fields=None, **kwargs):
+    instance._previous_files = None
+    if instance.pk and not raw and (update_fields is None or 'image' in update_fields):
+        instance._previous_files = FoodDonation.objects.filter(
+            pk=instance.pk,
+        ).values_list('image', 'renditions').first()
+
+
+@receiver(post_save, sender=FoodDonation)
+def release_replaced_files(sender, instance, raw=False, **kwargs):
+    """When the photo is replaced (e.g. in the admin), drop the old one and its renditions."""
+    previous = getattr(instance, '_previous_files', None)
+    if raw or previous is None or previous[0] == instance.image.name:
+        return
+    old_image, old_renditions = previous
+    _release_on_commit([old_image, *old_renditions.values()] if old_image else [])
+    FoodDonation.objects.filter(pk=instance.pk).update(renditions={})
+    instance.renditions = {}
+    if instance.image:
+        tasks.enqueue(generate_donation_renditions, instance.pk)
+
+
+@receiver(pre_save, sender=BuyRequest)
+def remember_collector(sender, instance, raw=False, update_fields=None, **kwargs):
+    instance._previous_collector_id = None
+    if instance.pk and not raw and _touches(update_fields, {'assigned_collector'}):
+        instance._previous_collector_id = BuyRequest.objects.filter(
+            pk=instance.pk,
+        ).values_list('assigned_collector_id', flat=True).first()
+
+
+@receiver(post_save, sender=BuyRequest)
+def refresh_collector_load(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Keep ``FoodWasteCollector.active_load`` in step with assigned requests."""
+    if not raw and _touches(update_fields, _LOAD_FIELDS):
+        FoodWasteCollector.refresh_load({
+            getattr(instance, '_previous_collector_id', None), instance.assigned_collector_id,
+        })
+
+
+@receiver(post_delete, sender=BuyRequest)
+def release_collector_load(sender, instance, **kwargs):
+    FoodWasteCollector.refresh_load([instance.assigned_collector_id])
+
+
+@receiver(post_migrate)
+def repair_search_index(sender, using='default', **kwargs):
+    if sender.name == 'App':
+        search.repair_sqlite_index(using)
+        search.reset_backend()
+
+
+@receiver(post_delete, sender=Token)
+def forget_token(sender, instance, **kwargs):
+    invalidate_token(instance.key)
+
+
+@receiver(post_save, sender=CustomUser)
+def forget_user(sender, instance, created=False, raw=False, **kwargs):
+    # Password changes, deactivation and profile edits must not be served stale.
+    if not (raw or created):
+        invalidate_user(instance.pk)
+
+
+@receiver(post_save, sender=FoodWasteCollector)
+@receiver(post_delete, sender=FoodWasteCollector)
+def forget_collector_user(sender, instance, raw=False, **kwargs):
+    if not raw:
+        invalidate_user(instance.user_id)
+
+
+@receiver(connection_created)
+def count_request_queries(sender, connection, **kwargs):
+    metrics.install(connection)
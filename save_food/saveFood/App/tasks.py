@@ -0,0 +1,140 @@
+"""Database-backed background job queue.
+
+``enqueue`` writes a ``Job`` row in the caller's transaction, so a job exists
+exactly when the data it refers to does. ``manage.py run_workers`` claims
+jobs with a conditional UPDATE, which needs no broker and works on SQLite
+and Postgres alike. A claimed job carries a visibility deadline: if its
+worker dies, the job becomes claimable again once ``locked_until`` passes.
+Failed jobs are retried with exponential backoff up to ``max_attempts``.
+Each claim bumps ``attempts``, so a worker records its outcome only while
+``attempts`` still matches its claim; a worker that overran its deadline
+and lost the job to another writes nothing.
+
+``TASKS_EAGER`` skips the table and runs jobs inline after commit, which
+keeps tests deterministic.
+"""
+import logging
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_VISIBILITY_TIMEOUT = 300
+
+
+def task(func=None, *, max_attempts=3):
+    """Mark ``func`` as a background task. Arguments must be JSON-serialisable."""
+    def register(f):
+        f.task_name = f'{f.__module__}.{f.__name__}'
+        f.max_attempts = max_attempts
+        return f
+    return register(func) if func is not None else register
+
+
+def enqueue(func, *args, delay=0):
+    """Queue ``func(*args)``; returns the ``Job``, or ``None`` when eager."""
+    from .models import Job
+
+    if not hasattr(func, 'task_name'):
+        raise TypeError(f'{func!r} is not decorated with @task')
+    if getattr(settings, 'TASKS_EAGER', False):
+        transaction.on_commit(lambda: func(*args))
+        return None
+    return Job.objects.create(
+        name=func.task_name, args=list(args), max_attempts=func.max_attempts,
+        run_after=timezone.now() + timedelta(seconds=delay),
+    )
+
+
+def enqueue_many(func, args_list):
+    """Queue ``func(*args)`` for each entry with a single insert; returns the jobs."""
+    from .models import Job
+
+    if not hasattr(func, 'task_name'):
+        raise TypeError(f'{func!r} is not decorated with @task')
+    if getattr(settings, 'TASKS_EAGER', False):
+        for args in args_list:
+            transaction.on_commit(lambda args=args: func(*args))
+        return []
+    now = timezone.now()
+    return Job.objects.bulk_create([
+        Job(name=func.task_name, args=list(args), max_attempts=func.max_attempts, run_after=now)
+        for args in args_list
+    ])
+
+
+def _claimable(now):
+    return Q(status='queued', run_after__lte=now) | Q(status='running', locked_until__lt=now)
+
+
+def claim_next():
+    """Atomically take the oldest runnable job, or return ``None``."""
+    from .models import Job
+
+    timeout = getattr(settings, 'TASK_VISIBILITY_TIMEOUT', DEFAULT_VISIBILITY_TIMEOUT)
+    while True:
+        now = timezone.now()
+        pk = Job.objects.filter(_claimable(now)).order_by('id').values_list('id', flat=True).first()
+        if pk is None:
+            return None
+        claimed = Job.objects.filter(_claimable(now), pk=pk).update(
+            status='running', attempts=F('attempts') + 1,
+            locked_until=now + timedelta(seconds=timeout), updated_at=now,
+        )
+        if claimed:
+            return Job.objects.get(pk=pk)
+        # Another worker won the race for this row; try the next one.
+
+
+def _finish(job, **fields):
+    """Record the outcome of ``job``'s claim; ``False`` if another worker has since reclaimed it."""
+    from .models import Job
+
+    # ``update()`` skips auto_now, so the timestamp is set here.
+    finished = Job.objects.filter(pk=job.pk, status='running', attempts=job.attempts).update(
+        updated_at=timezone.now(), **fields,
+    )
+    if not finished:
+        logger.warning('Job %s (%s) was reclaimed before attempt %d finished; '
+                       'leaving it to the new worker', job.pk, job.name, job.attempts)
+    return bool(finished)
+
+
+def run_job(job):
+    """Execute a claimed job and record the outcome; ``True`` if it is now done."""
+    if job.attempts > job.max_attempts:
+        _finish(job, status='failed', last_error='Visibility timeout exceeded on final attempt.')
+        return False
+    try:
+        func = import_string(job.name)
+        if not hasattr(func, 'task_name'):
+            raise TypeError(f'{job.name} is not a registered task')
+        func(*job.args)
+    except Exception:
+        error = traceback.format_exc()
+        logger.exception('Job %s (%s) failed on attempt %d', job.pk, job.name, job.attempts)
+        if job.attempts < job.max_attempts:
+            _finish(job, status='queued', locked_until=None, last_error=error,
+                    run_after=timezone.now() + timedelta(seconds=2 ** job.attempts))
+        else:
+            _finish(job, status='failed', last_error=error)
+        return False
+    return _finish(job, status='done', locked_until=None)
+
+
+def run_pending(limit=None):
+    """Run runnable jobs until the queue is empty or ``limit`` is reached."""
+    processed = 0
+    while limit is None or processed < limit:
+        job = claim_next()
+        if job is None:
+            break
+        run_job(job)
+        processed += 1
+    return processed
@@ -0,0 +1,194 @@
+"""Token-bucket throttles for expensive and guessable endpoints.
+
+Every throttle scope has a rate in ``THROTTLE_RATES`` such as ``'10/min'``
+or ``'5/10min'``. That means a bucket of that many tokens, refilled evenly
+over the period. Each call takes one token, and an empty bucket rejects the
+call with ``429`` and a ``Retry-After``. DRF checks throttles before the
+view body runs, so rejected logins never reach the password hasher and
+rejected OTP guesses never touch the buy request.
+
+Buckets live in a pluggable store (``THROTTLE_STORE``).
+``LocalBucketStore`` keeps them in process memory, which is the fastest
+option but is per worker. ``CacheBucketStore`` shares them through a Django
+cache so limits hold across workers.
+"""
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+from django.utils.module_loading import import_string
+from rest_framework.throttling import BaseThrottle
+
+_PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+_RATE = re.compile(r'^(\d+)/(\d*)(s|sec|m|min|h|hour|d|day)$')
+
+
+def parse_rate(rate):
+    """``'5/10min'`` -> ``(capacity, seconds)``, i.e. ``(5, 600)``."""
+    match = _RATE.match(rate.replace(' ', ''))
+    if not match:
+        raise ImproperlyConfigured(f'Invalid throttle rate {rate!r}.')
+    count, multiplier, unit = match.groups()
+    return int(count), int(multiplier or 1) * _PERIODS[unit[0]]
+
+
+def refill(tokens, elapsed, capacity, period):
+    """Bucket level after ``elapsed`` seconds of refilling."""
+    return min(capacity, tokens + elapsed * capacity / period)
+
+
+def take(tokens, capacity, period):
+    """``(tokens_left, wait)`` after one call; ``wait`` is 0 when the call is allowed."""
+    if tokens >= 1:
+        return tokens - 1, 0.0
+    return tokens, (1 - tokens) * period / capacity
+
+
+class BucketStore:
+    """Interface for throttle bucket stores."""
+
+    def consume(self, key, capacity, period):
+        """Take a token from bucket ``key``; returns seconds to wait, 0 when allowed."""
+        raise NotImplementedError
+
+
+class LocalBucketStore(BucketStore):
+    """Per-process buckets; the least recently used are forgotten past ``THROTTLE_MAX_KEYS``."""
+
+    def __init__(self, max_keys=None):
+        self.max_keys = max_keys or getattr(settings, 'THROTTLE_MAX_KEYS', 100_000)
+        self._lock = threading.Lock()
+        self._buckets = OrderedDict()  # key -> (tokens, monotonic stamp)
+
+    def consume(self, key, capacity, period):
+        now = time.monotonic()
+        with self._lock:
+            tokens, stamp = self._buckets.get(key, (capacity, now))
+            tokens, wait = take(refill(tokens, now - stamp, capacity, period), capacity, period)
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return wait
+
+
+class CacheBucketStore(BucketStore):
+    """Buckets shared through the ``THROTTLE_CACHE_ALIAS`` Django cache.
+
+    The read-modify-write is not atomic, so concurrent calls across
+    workers can overshoot a limit by a few calls.
+    """
+
+    def __init__(self, alias=None):
+        self.cache = caches[alias or getattr(settings, 'THROTTLE_CACHE_ALIAS', 'default')]
+
+    def consume(self, key, capacity, period):
+        now = time.time()
+        cache_key = f'throttle:{key}'
+        tokens, stamp = self.cache.get(cache_key, (capacity, now))
+        tokens, wait = take(refill(tokens, max(0.0, now - stamp), capacity, period),
+                            capacity, period)
+        # A bucket idle for a whole period is full again; let it expire.
+        self.cache.set(cache_key, (tokens, now), int(period) + 1)
+        return wait
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = import_string(
+                getattr(settings, 'THROTTLE_STORE', 'App.throttling.LocalBucketStore')
+            )()
+        return _store
+
+
+def reset_store():
+    global _store
+    with _store_lock:
+        _store = None
+
+
+class BucketThrottle(BaseThrottle):
+    """A token bucket per ``get_key()``; ``scope`` selects the rate."""
+    scope = None
+
+    def get_key(self, request, view):
+        """Bucket identity for this call, or ``None`` to skip throttling it."""
+        raise NotImplementedError
+
+    def allow_request(self, request, view):
+        rates = getattr(settings, 'THROTTLE_RATES', {})
+        if self.scope not in rates:
+            return True
+        key = self.get_key(request, view)
+        if key is None:
+            return True
+        capacity, period = parse_rate(rates[self.scope])
+        self.retry_after = get_store().consume(f'{self.scope}:{key}', capacity, period)
+        return self.retry_after == 0
+
+    def wait(self):
+        return self.retry_after
+
+
+class IPThrottle(BucketThrottle):
+    """Per client address. ``X-Forwarded-For`` is trusted only for the
+    ``NUM_PROXIES`` hops in ``REST_FRAMEWORK``; by default the peer address is used.
+    """
+
+    def get_key(self, request, view):
+        return self.get_ident(request)
+
+
+class UserThrottle(BucketThrottle):
+    def get_key(self, request, view):
+        if request.user.is_authenticated:
+            return request.user.pk
+        return None
+
+
+class LoginIPThrottle(IPThrottle):
+    scope = 'login'
+
+
+class LoginAccountThrottle(BucketThrottle):
+    """Per username, so guessing one account from many addresses is limited too."""
+    scope = 'login_account'
+
+    def get_key(self, request, view):
+        username = request.data.get('username')
+        if not isinstance(username, str) or not username:
+            return None
+        return username.strip().lower()[:150]
+
+
+class SignupIPThrottle(IPThrottle):
+    scope = 'signup'
+
+
+class OTPUserThrottle(UserThrottle):
+    scope = 'otp_user'
+
+
+class OTPRequestThrottle(BucketThrottle):
+    """Per buy request and user: caps one user's guesses at a request's OTPs.
+
+    Throttles run before the view checks the assignment, so a bucket shared
+    by everyone would let any user lock the assigned collector out of a
+    pickup by spending it on junk guesses.
+    """
+    scope = 'otp_request'
+
+    def get_key(self, request, view):
+        if not request.user.is_authenticated:
+            return None
+        return f"{view.kwargs.get('pk')}:{request.user.pk}"
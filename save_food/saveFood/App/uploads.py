@@ -0,0 +1,239 @@
+"""Resumable chunked uploads for donation photos.
+
+A donor on a flaky connection uploads the photo in pieces, then creates
+the donation by referring to the finished upload:
+
+1. ``POST /api/uploads/`` with ``filename``, ``size`` and optionally
+   ``sha256`` opens a session. The response gives its ``id``, the
+   ``offset`` to send from (0) and a suggested ``chunk_size``.
+2. ``PUT /api/uploads/<id>/`` sends a raw chunk with
+   ``Content-Range: bytes <start>-<end>/<size>``. The chunk is streamed
+   into a part file under ``UPLOAD_TEMP_DIR`` at ``start`` and never held
+   in memory. Re-sending bytes the server already has is harmless, so a
+   chunk whose response was lost can simply be retried. A chunk starting
+   beyond the current offset is refused with 409 and the offset.
+3. ``GET /api/uploads/<id>/`` reports the ``offset`` to resume from after
+   a dropped connection. A chunk cut off mid-way still counts for the
+   bytes that arrived.
+4. ``POST /api/uploads/<id>/finalize/`` checks that every byte arrived,
+   that it matches the declared ``sha256`` and that it decodes as an
+   image.
+5. ``POST /api/donate/`` with ``upload=<id>`` instead of an ``image`` file
+   creates the donation and marks the upload ``used``. An upload makes one
+   donation. Repeating the request returns that donation instead of
+   creating another, or 410 if it has since been deleted.
+
+Sessions expire ``UPLOAD_EXPIRY`` seconds after they are opened.
+``expire_uploads()``, run by ``manage.py sweep_media``, deletes expired
+sessions and their part files.
+"""
+import hashlib
+import os
+import re
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.uploadedfile import UploadedFile
+from django.db import transaction
+from django.utils import timezone
+from PIL import Image, UnidentifiedImageError
+
+from .models import Upload
+
+READ_BLOCK_SIZE = 64 * 1024
+IMAGE_EXTENSIONS = {'jpg', 'jpeg', 'png', 'webp'}
+
+_CONTENT_RANGE = re.compile(r'^bytes (\d+)-(\d+)/(\d+)$')
+
+
+class UploadError(Exception):
+    """The request cannot be applied to the upload."""
+    status_code = 400
+
+
+class UploadConflict(UploadError):
+    """The upload is not in the state the request assumes; the client should resync its offset."""
+    status_code = 409
+
+
+def part_path(upload):
+    return os.path.join(settings.UPLOAD_TEMP_DIR, f'{upload.id.hex}.part')
+
+
+def state(upload):
+    return {
+        'id': str(upload.id),
+        'offset': upload.received,
+        'size': upload.size,
+        'status': upload.status,
+        'expires_at': upload.expires_at,
+        'chunk_size': getattr(settings, 'UPLOAD_CHUNK_SIZE', 256 * 1024),
+        'donation': upload.donation_id,
+    }
+
+
+def create(owner, filename, size, content_type='', sha256=''):
+    filename = os.path.basename(str(filename or ''))
+    ext = os.path.splitext(filename)[1][1:].lower()
+    if ext not in IMAGE_EXTENSIONS:
+        raise UploadError(f'filename must end in one of: {", ".join(sorted(IMAGE_EXTENSIONS))}.')
+    try:
+        size = int(size)
+    except (TypeError, ValueError):
+        raise UploadError('size must be an integer.')
+    max_size = getattr(settings, 'UPLOAD_MAX_SIZE', 20 * 1024 * 1024)
+    if not 0 < size <= max_size:
+        raise UploadError(f'size must be between 1 and {max_size} bytes.')
+    sha256 = str(sha256 or '').lower()
+    if sha256 and not re.fullmatch(r'[0-9a-f]{64}', sha256):
+        raise UploadError('sha256 must be 64 hex digits.')
+
+    expiry = getattr(settings, 'UPLOAD_EXPIRY', 24 * 3600)
+    upload = Upload.objects.create(
+        owner=owner, filename=filename, content_type=str(content_type or '')[:100], size=size,
+        sha256=sha256, expires_at=timezone.now() + timedelta(seconds=expiry),
+    )
+    os.makedirs(settings.UPLOAD_TEMP_DIR, exist_ok=True)
+    open(part_path(upload), 'wb').close()
+    return upload
+
+
+def parse_content_range(header, size, length):
+    """``(start, end)`` inclusive from a ``Content-Range`` request header.
+
+    ``length`` is the request's ``Content-Length``, which must cover the range exactly.
+    """
+    match = _CONTENT_RANGE.match(header or '')
+    if match is None:
+        raise UploadError('Content-Range must be "bytes <start>-<end>/<size>".')
+    start, end, total = (int(group) for group in match.groups())
+    if total != size:
+        raise UploadError(f'Content-Range total must be the declared size, {size}.')
+    if end < start or end >= size:
+        raise UploadError('Content-Range is outside the upload.')
+    if length != end - start + 1:
+        raise UploadError('Content-Length must match Content-Range.')
+    return start, end
+
+
+def write_chunk(upload, stream, start, end):
+    """Stream ``stream`` into the part file at ``start``; returns the refreshed upload.
+
+    Overlapping retries rewrite the same bytes, so no lock is held while
+    the body arrives; only the offset update is serialized, and it only
+    moves forward.
+    """
+    if upload.status != 'open':
+        return upload  # a retried chunk whose response was lost
+    if start > upload.received:
+        raise UploadConflict(f'Chunk starts at {start}, but the upload is at {upload.received}.')
+
+    expected = end - start + 1
+    written = 0
+    with open(part_path(upload), 'r+b') as part:
+        part.seek(start)
+        while written < expected:
+            block = stream.read(min(READ_BLOCK_SIZE, expected - written))
+            if not block:
+                break
+            part.write(block)
+            written += len(block)
+
+    # Bytes that arrived count even if the chunk was cut off, so the client resumes from them.
+    if written:
+        reached = start + written
+        Upload.objects.filter(pk=upload.pk, received__gte=start, received__lt=reached).update(
+            received=reached, updated_at=timezone.now(),
+        )
+    upload.refresh_from_db()
+    if written < expected:
+        raise UploadError(f'Chunk ended after {written} of {expected} bytes.')
+    return upload
+
+
+def _digest(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as part:
+        for block in iter(lambda: part.read(READ_BLOCK_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def finalize(upload):
+    if upload.status != 'open':
+        return upload
+    if upload.received < upload.size:
+        raise UploadConflict(f'Only {upload.received} of {upload.size} bytes have arrived.')
+    path = part_path(upload)
+    digest = _digest(path)
+    if upload.sha256 and digest != upload.sha256:
+        # Some chunk was corrupted in transit; there is no telling which, so start over.
+        with open(path, 'wb'):
+            pass
+        Upload.objects.filter(pk=upload.pk).update(received=0, updated_at=timezone.now())
+        upload.refresh_from_db()
+        raise UploadConflict('The upload does not match its sha256; send it again.')
+    try:
+        with Image.open(path) as image:
+            image.verify()
+    except (OSError, UnidentifiedImageError, SyntaxError):
+        raise UploadError('The upload is not a valid image.')
+    Upload.objects.filter(pk=upload.pk).update(
+        status='complete', sha256=digest, updated_at=timezone.now(),
+    )
+    upload.refresh_from_db()
+    return upload
+
+
+class CompletedUpload(UploadedFile):
+    """A finished upload's part file, accepted wherever a multipart file is.
+
+    ``temporary_file_path()`` lets image validation read it from disk.
+    """
+
+    def __init__(self, upload):
+        super().__init__(open(part_path(upload), 'rb'), upload.filename,
+                         upload.content_type or None, upload.size)
+        self.upload = upload
+
+    def temporary_file_path(self):
+        return self.file.name
+
+
+def claim(upload):
+    """Lock ``upload`` for the current transaction; ``False`` if it already made a donation."""
+    return Upload.objects.select_for_update().filter(pk=upload.pk, status='complete').exists()
+
+
+def attach(upload, donation):
+    """Record ``donation`` as made from ``upload``, inside the transaction that created it.
+
+    The part file is removed once that commits; the donation has its own copy in storage.
+    The upload stays ``used`` even if the donation is deleted later.
+    """
+    Upload.objects.filter(pk=upload.pk).update(
+        status='used', donation=donation, updated_at=timezone.now(),
+    )
+    path = part_path(upload)
+    transaction.on_commit(lambda: _remove(path))
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def expire_uploads(batch_size=500):
+    """Delete expired sessions and their part files; returns how many."""
+    removed = 0
+    while True:
+        expired = list(Upload.objects.filter(expires_at__lte=timezone.now())
+                       .values_list('pk', flat=True)[:batch_size])
+        if not expired:
+            return removed
+        Upload.objects.filter(pk__in=expired).delete()
+        for pk in expired:
+            _remove(os.path.join(settings.UPLOAD_TEMP_DIR, f'{pk.hex}.part'))
+        removed += len(expired)
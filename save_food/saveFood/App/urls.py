@@ -4,12 +4,21 @@ from . import views
 urlpatterns = [
     path('signup/', views.signup_view, name='signup'),
     path('login/', views.login_view, name='login'),
+    path('logout/', views.logout_view, name='logout'),
     path('profile/', views.profile_view, name='profile'),
     path('districts/', views.districts_view, name='districts'),
     path('user-types/', views.user_types_view, name='user-types'),
     # Food donations
+    path('analyse/', views.analyse_food_view, name='analyse-food'),
     path('donate/', views.donate_food_view, name='donate-food'),
+    path('donate/bulk/', views.donate_bulk_view, name='donate-bulk'),
+    path('uploads/', views.upload_create_view, name='upload-create'),
+    path('uploads/<uuid:pk>/', views.upload_detail_view, name='upload-detail'),
+    path('uploads/<uuid:pk>/finalize/', views.upload_finalize_view, name='upload-finalize'),
     path('donations/', views.donations_list_view, name='donations-list'),
+    path('donations/nearby/', views.nearby_donations_view, name='donations-nearby'),
+    path('donations/search/', views.donation_search_view, name='donations-search'),
+    path('donations/<int:pk>/', views.donation_detail_view, name='donation-detail'),
     path('my-donations/', views.my_donations_view, name='my-donations'),
     # Buy requests
     path('buy-request/', views.send_buy_request_view, name='send-buy-request'),
@@ -20,5 +29,12 @@ urlpatterns = [
     # Collector
     path('collector/login/', views.collector_login_view, name='collector-login'),
     path('collector/dashboard/', views.collector_dashboard_view, name='collector-dashboard'),
+    path('collector/route/', views.collector_route_view, name='collector-route'),
     path('collector/verify-otp/<int:pk>/', views.collector_verify_otp_view, name='collector-verify-otp'),
+    # Delta sync
+    path('sync/', views.sync_view, name='sync'),
+    # Reporting exports (staff only)
+    path('exports/<slug:report>.<slug:fmt>', views.export_view, name='export'),
+    # Real-time updates (Server-Sent Events, ASGI only)
+    path('events/', views.event_stream_view, name='event-stream'),
 ]
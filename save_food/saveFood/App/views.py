@@ -1,23 +1,54 @@
+import asyncio
+import json
+import uuid
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
 from rest_framework import status
-from rest_framework.decorators import api_view, permission_classes, parser_classes
-from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.authentication import SessionAuthentication
+from rest_framework.decorators import (
+    api_view, authentication_classes, permission_classes, parser_classes, throttle_classes,
+)
+from rest_framework.permissions import AllowAny, IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.authtoken.models import Token
 from rest_framework.parsers import MultiPartParser, FormParser
+from rest_framework.utils.urls import replace_query_param
 from django.contrib.auth import authenticate
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q
+from django.http import JsonResponse, StreamingHttpResponse
+from django.urls import reverse
+from django.utils import timezone
 
 from .serializers import (
     SignupSerializer, LoginSerializer, UserSerializer,
     FoodDonationSerializer, BuyRequestSerializer, CollectorSerializer,
 )
+from . import assignment, exports, geo, routing, search, tasks, uploads
+from .authentication import CachedTokenAuthentication, collector_for
+from .analysis import AnalysisError, analyse_image, analyse_images, read_upload
+from .caching import cached_response, queryset_version
+from .events import (
+    collector_channel, get_broker, notify_buy_request, notify_buy_requests, user_channel,
+)
+from .filters import filter_donations
+from .images import generate_donation_renditions
+from .pagination import KeysetPagination
+from .throttling import (
+    LoginAccountThrottle, LoginIPThrottle, OTPRequestThrottle, OTPUserThrottle, SignupIPThrottle,
+)
 from .models import (
-    DISTRICT_CHOICES, USER_TYPE_CHOICES, FoodDonation, BuyRequest,
-    FoodWasteCollector,
+    DISTRICT_CHOICES, USER_TYPE_CHOICES, FOOD_TYPE_CHOICES, FoodDonation, BuyRequest,
+    FoodWasteCollector, ChangeLog, RequestConflict, Upload,
 )
 
 
 @api_view(['POST'])
 @permission_classes([AllowAny])
+@throttle_classes([SignupIPThrottle])
 def signup_view(request):
     serializer = SignupSerializer(data=request.data)
     if serializer.is_valid():
@@ -33,6 +64,7 @@ def signup_view(request):
 
 @api_view(['POST'])
 @permission_classes([AllowAny])
+@throttle_classes([LoginIPThrottle, LoginAccountThrottle])
 def login_view(request):
     serializer = LoginSerializer(data=request.data)
     if serializer.is_valid():
@@ -54,6 +86,14 @@ def login_view(request):
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def logout_view(request):
+    """Revoke the caller's token; its cached authentication goes with it."""
+    Token.objects.filter(user=request.user).delete()
+    return Response({'message': 'Logged out.'})
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def profile_view(request):
@@ -78,27 +118,387 @@ def user_types_view(request):
 
 # ── Food Donation Views ──────────────────────────────────────────
 
+def list_context(request):
+    """Serializer context for list endpoints: compact rows, ``?fields=``/``?expand=`` honoured."""
+    return {'request': request, 'representation': 'list'}
+
+
+MAX_NEARBY_RADIUS_KM = 100
+MAX_NEARBY_RESULTS = 200
+
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 @parser_classes([MultiPartParser, FormParser])
 def donate_food_view(request):
-    """Create a new food donation."""
-    serializer = FoodDonationSerializer(data=request.data, context={'request': request})
-    if serializer.is_valid():
-        serializer.save(donor=request.user)
-        return Response({
-            'message': 'Food donated successfully!',
-            'donation': serializer.data,
-        }, status=status.HTTP_201_CREATED)
-    return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    """Create a new food donation, using the server's own safety analysis.
+
+    The photo is either the multipart file ``image`` or ``upload``, the id of
+    a finalized resumable upload. Repeating a request with the same
+    ``upload`` returns the donation it already made.
+    """
+    upload, data = None, request.data
+    if request.data.get('upload'):
+        upload = _own_upload(request, request.data['upload'])
+        if upload is None:
+            return Response({'error': 'Upload not found.'}, status=status.HTTP_404_NOT_FOUND)
+        if upload.status == 'used':
+            return _donation_from_upload(request, upload)
+        if upload.status != 'complete':
+            return Response({'error': 'Finalize the upload first.', 'offset': upload.received},
+                            status=status.HTTP_409_CONFLICT)
+        try:
+            image = uploads.CompletedUpload(upload)
+        except FileNotFoundError:
+            return Response({'error': 'The upload is no longer available; upload the photo again.'},
+                            status=status.HTTP_410_GONE)
+        data = {**request.data.dict(), 'image': image}
+    try:
+        serializer = FoodDonationSerializer(data=data, context={'request': request})
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            result, _ = analyse_image(
+                read_upload(serializer.validated_data['image']),
+                serializer.validated_data['food_type'],
+            )
+        except AnalysisError:
+            return Response({'error': 'Food analysis is unavailable. Please try again.'},
+                            status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        with transaction.atomic():
+            if upload is not None and not uploads.claim(upload):
+                return _donation_from_upload(request, upload)  # a concurrent retry won
+            donation = serializer.save(
+                donor=request.user,
+                gemini_analysis=result,
+                is_safe=bool(result.get('is_safe')),
+                category=result.get('category') or serializer.validated_data.get('category', 'edible'),
+            )
+            if upload is not None:
+                uploads.attach(upload, donation)
+            tasks.enqueue(generate_donation_renditions, donation.id)
+    finally:
+        if upload is not None:
+            data['image'].close()
+    return Response({
+        'message': 'Food donated successfully!',
+        'donation': serializer.data,
+    }, status=status.HTTP_201_CREATED)
+
+
+def _donation_from_upload(request, upload):
+    upload.refresh_from_db()
+    if upload.donation is None:
+        return Response({'error': 'The donation made from this upload was deleted; '
+                                  'upload the photo again.'},
+                        status=status.HTTP_410_GONE)
+    serializer = FoodDonationSerializer(upload.donation, context={'request': request})
+    return Response({
+        'message': 'Food donated successfully!',
+        'donation': serializer.data,
+    })
+
+
+# ── Resumable Uploads ────────────────────────────────────────────
+
+def _own_upload(request, pk):
+    """The requester's unexpired upload ``pk``, or ``None``."""
+    try:
+        pk = uuid.UUID(str(pk))
+    except ValueError:
+        return None
+    return Upload.objects.filter(
+        pk=pk, owner=request.user, expires_at__gt=timezone.now(),
+    ).first()
+
+
+def _upload_error(upload, exc):
+    return Response({'error': str(exc), 'offset': upload.received}, status=exc.status_code)
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def upload_create_view(request):
+    """Open a resumable upload session for a donation photo (see ``uploads.py``)."""
+    try:
+        upload = uploads.create(
+            request.user, request.data.get('filename'), request.data.get('size'),
+            content_type=request.data.get('content_type'), sha256=request.data.get('sha256'),
+        )
+    except uploads.UploadError as exc:
+        return Response({'error': str(exc)}, status=exc.status_code)
+    location = request.build_absolute_uri(reverse('upload-detail', args=[upload.pk]))
+    return Response(uploads.state(upload), status=status.HTTP_201_CREATED,
+                    headers={'Location': location})
+
+
+@api_view(['GET', 'PUT'])
+@permission_classes([IsAuthenticated])
+def upload_detail_view(request, pk):
+    """``GET`` the offset to resume from; ``PUT`` a raw chunk described by ``Content-Range``."""
+    upload = _own_upload(request, pk)
+    if upload is None:
+        return Response({'error': 'Upload not found.'}, status=status.HTTP_404_NOT_FOUND)
+    if request.method == 'PUT':
+        try:
+            start, end = uploads.parse_content_range(
+                request.headers.get('Content-Range'), upload.size,
+                int(request.META.get('CONTENT_LENGTH') or 0),
+            )
+            # The body is read straight from the socket; request.data is never touched.
+            upload = uploads.write_chunk(upload, request.stream, start, end)
+        except uploads.UploadError as exc:
+            return _upload_error(upload, exc)
+    return Response(uploads.state(upload))
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def upload_finalize_view(request, pk):
+    """Check that the upload is whole and a valid image; then it can make a donation."""
+    upload = _own_upload(request, pk)
+    if upload is None:
+        return Response({'error': 'Upload not found.'}, status=status.HTTP_404_NOT_FOUND)
+    try:
+        upload = uploads.finalize(upload)
+    except uploads.UploadError as exc:
+        return _upload_error(upload, exc)
+    return Response(uploads.state(upload))
+
+
+BULK_DONATION_MAX_ITEMS = 50
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+@parser_classes([MultiPartParser, FormParser])
+def donate_bulk_view(request):
+    """Create many donations from one multipart request.
+
+    ``items`` is a JSON array of donation fields; item ``i``'s photo is the
+    file ``image_<i>``. Valid items are analysed as one batch and inserted
+    in one transaction. Each result carries the item's ``index`` and either
+    the created ``donation`` or its ``errors``.
+    """
+    try:
+        items = json.loads(request.data.get('items') or '')
+    except ValueError:
+        items = None
+    if not isinstance(items, list) or not items:
+        return Response({'error': 'items must be a non-empty JSON array.'},
+                        status=status.HTTP_400_BAD_REQUEST)
+    if len(items) > BULK_DONATION_MAX_ITEMS:
+        return Response({'error': f'At most {BULK_DONATION_MAX_ITEMS} items per request.'},
+                        status=status.HTTP_400_BAD_REQUEST)
+
+    results, valid = [None] * len(items), []
+    for index, item in enumerate(items):
+        if not isinstance(item, dict):
+            results[index] = {'index': index, 'errors': {'non_field_errors': ['Expected an object.']}}
+            continue
+        data = {**item, 'image': request.FILES.get(f'image_{index}')}
+        serializer = FoodDonationSerializer(data=data, context={'request': request})
+        if serializer.is_valid():
+            valid.append((index, serializer.validated_data))
+        else:
+            results[index] = {'index': index, 'errors': serializer.errors}
+
+    if valid:
+        try:
+            analyses = analyse_images([
+                (read_upload(data['image']), data['food_type']) for _, data in valid
+            ])
+        except AnalysisError:
+            return Response({'error': 'Food analysis is unavailable. Please try again.'},
+                            status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        donations = []
+        for (_, data), (result, _) in zip(valid, analyses):
+            donation = FoodDonation(donor=request.user, **data)
+            donation.gemini_analysis = result
+            donation.is_safe = bool(result.get('is_safe'))
+            donation.category = result.get('category') or donation.category
+            donation.set_derived_fields()
+            donations.append(donation)
+        with transaction.atomic():
+            FoodDonation.objects.bulk_create(donations)
+            # bulk_create skips the post_save signal that feeds delta sync.
+            ChangeLog.record('donation', [d.id for d in donations])
+            tasks.enqueue_many(generate_donation_renditions, [(d.id,) for d in donations])
+        serialized = FoodDonationSerializer(
+            donations, many=True, context={'request': request},
+        ).data
+        for (index, _), donation in zip(valid, serialized):
+            results[index] = {'index': index, 'donation': donation}
+
+    if not valid:
+        code = status.HTTP_400_BAD_REQUEST
+    elif len(valid) < len(items):
+        code = status.HTTP_207_MULTI_STATUS
+    else:
+        code = status.HTTP_201_CREATED
+    return Response({'created': len(valid), 'results': results}, status=code)
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+@parser_classes([MultiPartParser, FormParser])
+def analyse_food_view(request):
+    """Run (or reuse a cached) food safety analysis for an uploaded photo."""
+    image = request.FILES.get('image')
+    food_type = request.data.get('food_type')
+    if not image:
+        return Response({'error': 'image is required.'}, status=status.HTTP_400_BAD_REQUEST)
+    if food_type not in dict(FOOD_TYPE_CHOICES):
+        return Response({'error': 'food_type must be packed, homecooked or organic.'},
+                        status=status.HTTP_400_BAD_REQUEST)
+    try:
+        result, cached = analyse_image(read_upload(image), food_type)
+    except AnalysisError:
+        return Response({'error': 'Food analysis is unavailable. Please try again.'},
+                        status=status.HTTP_503_SERVICE_UNAVAILABLE)
+    return Response({'analysis': result, 'cached': cached})
 
 
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def donations_list_view(request):
-    """List all safe donations (for the explore/homepage feed)."""
-    donations = FoodDonation.objects.filter(is_safe=True).order_by('-created_at')
-    serializer = FoodDonationSerializer(donations, many=True, context={'request': request})
+    """Cursor-paginated, filterable feed of safe donations (explore/homepage)."""
+    donations = filter_donations(FoodDonation.objects.feed(), request.query_params)
+    paginator = KeysetPagination()
+    page = paginator.paginate_queryset(donations, request)
+    version = (
+        max((d.updated_at for d in page), default=None),
+        paginator.next_cursor,
+        tuple((d.id, d.updated_at, d.donor.updated_at) for d in page),
+    )
+
+    def render():
+        serializer = FoodDonationSerializer(page, many=True, context=list_context(request))
+        return paginator.get_paginated_data(serializer.data)
+
+    return cached_response(request, 'donations', version, render)
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def nearby_donations_view(request):
+    """Safe donations within ``radius_km`` of ``lat``/``lng``, nearest first."""
+    try:
+        lat = float(request.query_params['lat'])
+        lng = float(request.query_params['lng'])
+        radius_km = float(request.query_params.get('radius_km', 5))
+        limit = int(request.query_params.get('limit', 50))
+    except KeyError:
+        return Response({'error': 'lat and lng are required.'}, status=status.HTTP_400_BAD_REQUEST)
+    except ValueError:
+        return Response({'error': 'lat, lng, radius_km and limit must be numbers.'},
+                        status=status.HTTP_400_BAD_REQUEST)
+
+    if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+        return Response({'error': 'lat/lng out of range.'}, status=status.HTTP_400_BAD_REQUEST)
+    if not 0 < radius_km <= MAX_NEARBY_RADIUS_KM:
+        return Response({'error': f'radius_km must be between 0 and {MAX_NEARBY_RADIUS_KM}.'},
+                        status=status.HTTP_400_BAD_REQUEST)
+    limit = min(max(limit, 1), MAX_NEARBY_RESULTS)
+
+    candidates = filter_donations(
+        FoodDonation.objects.live().filter(is_safe=True), request.query_params,
+    ).near(lat, lng, radius_km).values_list('id', 'latitude', 'longitude')
+    ranked = geo.rank_by_distance(candidates, lat, lng, radius_km, limit)
+
+    by_id = FoodDonation.objects.with_related().in_bulk([pk for pk, _ in ranked])
+    results = FoodDonationSerializer(
+        [by_id[pk] for pk, _ in ranked], many=True, context=list_context(request),
+    ).data
+    for item, (_, distance) in zip(results, ranked):
+        item['distance_km'] = round(distance, 3)
+    return Response({'results': results})
+
+
+MAX_SEARCH_RESULTS = 100
+MAX_SEARCH_CANDIDATES = 5000
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def donation_search_view(request):
+    """Ranked full-text search over safe donations.
+
+    ``q`` is required; every word must match as a prefix. The feed filters
+    apply, and ``lat``/``lng`` with ``radius_km`` restrict results to an area.
+    Paged with ``limit``/``offset``, best match first; ``next`` links the next page.
+    """
+    query = request.query_params.get('q', '').strip()
+    if not search.terms(query):
+        return Response({'error': 'q is required.'}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        point = optional_point(request.query_params, 'lat', 'lng')
+    except ValueError as exc:
+        return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        radius_km = float(request.query_params.get('radius_km', 5))
+        limit = int(request.query_params.get('limit', 20))
+        offset = int(request.query_params.get('offset', 0))
+    except ValueError:
+        return Response({'error': 'radius_km, limit and offset must be numbers.'},
+                        status=status.HTTP_400_BAD_REQUEST)
+    if point is not None and not 0 < radius_km <= MAX_NEARBY_RADIUS_KM:
+        return Response({'error': f'radius_km must be between 0 and {MAX_NEARBY_RADIUS_KM}.'},
+                        status=status.HTTP_400_BAD_REQUEST)
+    limit = min(max(limit, 1), MAX_SEARCH_RESULTS)
+    offset = max(offset, 0)
+
+    ranked = search.ranked(filter_donations(
+        FoodDonation.objects.live().filter(is_safe=True), request.query_params,
+    ), query)
+    distances = {}
+    if point is None:
+        rows = list(ranked.values_list('id', 'score')[offset:offset + limit + 1])
+    else:
+        # The geohash cover overshoots the circle; keep exact hits, still in rank order.
+        lat, lng = point
+        area = ranked.near(lat, lng, radius_km).values_list('id', 'score', 'latitude', 'longitude')
+        rows = []
+        for pk, score, row_lat, row_lng in area[:MAX_SEARCH_CANDIDATES]:
+            distance = geo.haversine_km(lat, lng, row_lat, row_lng)
+            if distance <= radius_km:
+                rows.append((pk, score))
+                distances[pk] = distance
+        rows = rows[offset:offset + limit + 1]
+    has_next = len(rows) > limit
+    rows = rows[:limit]
+
+    by_id = FoodDonation.objects.with_related().in_bulk([pk for pk, _ in rows])
+    results = FoodDonationSerializer(
+        [by_id[pk] for pk, _ in rows], many=True, context=list_context(request),
+    ).data
+    for item, (pk, score) in zip(results, rows):
+        item['score'] = round(score, 4)
+        if point is not None:
+            item['distance_km'] = round(distances[pk], 3)
+    next_link = None
+    if has_next:
+        next_link = replace_query_param(
+            request.build_absolute_uri(), 'offset', offset + limit,
+        )
+    return Response({'next': next_link, 'results': results})
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def donation_detail_view(request, pk):
+    """Full representation of one donation, including the safety analysis."""
+    donations = FoodDonation.objects.with_related()
+    if request.user.is_authenticated:
+        donations = donations.visible_to(request.user)
+    else:
+        donations = donations.filter(is_safe=True)
+    donation = donations.filter(pk=pk).first()
+    if donation is None:
+        return Response({'error': 'Donation not found.'}, status=status.HTTP_404_NOT_FOUND)
+    serializer = FoodDonationSerializer(
+        donation, context={'request': request, 'representation': 'detail'},
+    )
     return Response(serializer.data)
 
 
@@ -106,13 +506,48 @@ def donations_list_view(request):
 @permission_classes([IsAuthenticated])
 def my_donations_view(request):
     """List the authenticated user's donations."""
-    donations = FoodDonation.objects.filter(donor=request.user).order_by('-created_at')
-    serializer = FoodDonationSerializer(donations, many=True, context={'request': request})
-    return Response(serializer.data)
+    donations = FoodDonation.objects.donated_by(request.user)
+    return cached_response(
+        request, 'my-donations', queryset_version(donations, 'donor__updated_at'),
+        lambda: FoodDonationSerializer(donations, many=True, context=list_context(request)).data,
+    )
 
 
 # ── Buy Request Views ────────────────────────────────────────────
 
+def buy_request_list_response(request, scope, requests_qs):
+    """Conditional, cached response for a list of buy requests.
+
+    The payload embeds each donation and the requester's, donor's and
+    collector's profiles, so their ``updated_at`` are part of the version.
+    """
+    version = queryset_version(
+        requests_qs, 'donation__updated_at', 'requester__updated_at',
+        'donation__donor__updated_at', 'assigned_collector__user__updated_at',
+    )
+    return cached_response(
+        request, scope, version,
+        lambda: BuyRequestSerializer(requests_qs, many=True, context=list_context(request)).data,
+    )
+
+
+def optional_point(data, lat_key, lng_key):
+    """``(lat, lng)`` from ``data``, or ``None`` when both are absent.
+
+    Raises ``ValueError`` with a client-facing message for partial or bad input.
+    """
+    raw_lat, raw_lng = data.get(lat_key), data.get(lng_key)
+    if raw_lat in (None, '') and raw_lng in (None, ''):
+        return None
+    try:
+        lat, lng = float(raw_lat), float(raw_lng)
+    except (TypeError, ValueError):
+        raise ValueError(f'{lat_key} and {lng_key} must both be numbers.')
+    if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+        raise ValueError(f'{lat_key}/{lng_key} out of range.')
+    return lat, lng
+
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def send_buy_request_view(request):
@@ -132,14 +567,25 @@ def send_buy_request_view(request):
     if donation.is_sold:
         return Response({'error': 'This item has already been sold.'}, status=status.HTTP_400_BAD_REQUEST)
 
+    if donation.is_expired or (donation.expires_at and donation.expires_at <= timezone.now()):
+        return Response({'error': 'This item has expired.'}, status=status.HTTP_400_BAD_REQUEST)
+
     if BuyRequest.objects.filter(requester=request.user, donation=donation).exists():
         return Response({'error': 'You have already sent a request for this item.'}, status=status.HTTP_400_BAD_REQUEST)
 
+    try:
+        dropoff = optional_point(request.data, 'dropoff_latitude', 'dropoff_longitude')
+    except ValueError as exc:
+        return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
     buy_request = BuyRequest.objects.create(
         requester=request.user,
         donation=donation,
         message=request.data.get('message', ''),
+        dropoff_latitude=dropoff[0] if dropoff else None,
+        dropoff_longitude=dropoff[1] if dropoff else None,
     )
+    notify_buy_request(buy_request, donor_id=donation.donor_id)
     serializer = BuyRequestSerializer(buy_request, context={'request': request})
     return Response({
         'message': 'Buy request sent successfully!',
@@ -151,20 +597,16 @@ def send_buy_request_view(request):
 @permission_classes([IsAuthenticated])
 def sent_requests_view(request):
     """List buy requests sent by the current user."""
-    requests_qs = BuyRequest.objects.filter(requester=request.user).order_by('-created_at')
-    serializer = BuyRequestSerializer(requests_qs, many=True, context={'request': request})
-    return Response(serializer.data)
+    requests_qs = BuyRequest.objects.sent_by(request.user)
+    return buy_request_list_response(request, 'sent-requests', requests_qs)
 
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def received_requests_view(request):
     """List buy requests received for the current user's donations."""
-    requests_qs = BuyRequest.objects.filter(
-        donation__donor=request.user
-    ).order_by('-created_at')
-    serializer = BuyRequestSerializer(requests_qs, many=True, context={'request': request})
-    return Response(serializer.data)
+    requests_qs = BuyRequest.objects.received_by(request.user)
+    return buy_request_list_response(request, 'received-requests', requests_qs)
 
 
 @api_view(['POST'])
@@ -172,7 +614,7 @@ def received_requests_view(request):
 def respond_buy_request_view(request, pk):
     """Accept or reject a buy request. Only the donation owner can respond."""
     try:
-        buy_request = BuyRequest.objects.get(id=pk)
+        buy_request = BuyRequest.objects.with_related().get(id=pk)
     except BuyRequest.DoesNotExist:
         return Response({'error': 'Request not found.'}, status=status.HTTP_404_NOT_FOUND)
 
@@ -183,22 +625,19 @@ def respond_buy_request_view(request, pk):
     if action not in ('accept', 'reject'):
         return Response({'error': "action must be 'accept' or 'reject'."}, status=status.HTTP_400_BAD_REQUEST)
 
-    if action == 'accept':
-        buy_request.status = 'accepted'
-        buy_request.delivery_status = 'waiting'
-        buy_request.save()
-        # Generate OTPs for sender and receiver
-        buy_request.generate_otps()
-        # Mark the donation as sold
-        buy_request.donation.is_sold = True
-        buy_request.donation.save()
-        # Reject all other pending requests for this donation
-        BuyRequest.objects.filter(
-            donation=buy_request.donation, status='pending'
-        ).exclude(id=buy_request.id).update(status='rejected')
-    else:
-        buy_request.status = 'rejected'
-        buy_request.save()
+    try:
+        if action == 'accept':
+            rejected = buy_request.accept()
+        else:
+            rejected = []
+            buy_request.reject()
+    except RequestConflict as exc:
+        return Response({'error': str(exc)}, status=status.HTTP_409_CONFLICT)
+
+    if (action == 'accept' and assignment.enabled()
+            and buy_request.assigned_collector_id is None):
+        tasks.enqueue(assignment.auto_assign_collector, buy_request.id)
+    notify_buy_requests([*rejected, buy_request], {buy_request.donation_id: request.user.id})
 
     serializer = BuyRequestSerializer(buy_request, context={'request': request})
     return Response({
@@ -230,6 +669,7 @@ def check_buy_request_view(request, donation_id):
 
 @api_view(['POST'])
 @permission_classes([AllowAny])
+@throttle_classes([LoginIPThrottle, LoginAccountThrottle])
 def collector_login_view(request):
     """Login endpoint for food waste collectors."""
     username = request.data.get('username')
@@ -267,31 +707,104 @@ def collector_login_view(request):
 @permission_classes([IsAuthenticated])
 def collector_dashboard_view(request):
     """Get accepted requests assigned to the current collector."""
-    try:
-        collector = FoodWasteCollector.objects.get(user=request.user)
-    except FoodWasteCollector.DoesNotExist:
+    collector = collector_for(request.user)
+    if collector is None:
         return Response({'error': 'Not a collector.'}, status=status.HTTP_403_FORBIDDEN)
 
-    assigned = BuyRequest.objects.filter(
-        assigned_collector=collector,
-        status='accepted',
-    ).order_by('-created_at')
+    assigned = BuyRequest.objects.assigned_to(collector)
+    return buy_request_list_response(request, 'collector-dashboard', assigned)
+
+
+def route_stops(buy_requests):
+    """Pickup and drop-off ``routing.Stop``s for undelivered requests.
+
+    Requests already collected only need their drop-off. Drop-offs without
+    coordinates fall back to the requester's district centre.
+    """
+    stops, details = [], {}
+    for br in buy_requests:
+        donation, requester = br.donation, br.requester
+        pickup_key = ('pickup', br.id)
+        if br.delivery_status == 'waiting':
+            stops.append(routing.Stop(pickup_key, donation.latitude, donation.longitude))
+            details[pickup_key] = {
+                'address': donation.address, 'contact': donation.donor.full_name,
+                'approximate': False,
+            }
+        if br.dropoff_latitude is not None and br.dropoff_longitude is not None:
+            point, approximate = (br.dropoff_latitude, br.dropoff_longitude), False
+        else:
+            point = geo.DISTRICT_CENTRES.get(requester.district)
+            approximate = True
+            if point is None:
+                continue
+        dropoff_key = ('dropoff', br.id)
+        stops.append(routing.Stop(
+            dropoff_key, *point, after=pickup_key if br.delivery_status == 'waiting' else None,
+        ))
+        details[dropoff_key] = {
+            'address': requester.full_address, 'contact': requester.full_name,
+            'approximate': approximate,
+        }
+    return stops, details
 
-    serializer = BuyRequestSerializer(assigned, many=True, context={'request': request})
-    return Response(serializer.data)
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def collector_route_view(request):
+    """Ordered pickup/drop-off tour over the collector's undelivered requests."""
+    collector = collector_for(request.user)
+    if collector is None:
+        return Response({'error': 'Not a collector.'}, status=status.HTTP_403_FORBIDDEN)
+    try:
+        origin = optional_point(request.query_params, 'lat', 'lng')
+    except ValueError as exc:
+        return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+    pending = BuyRequest.objects.assigned_to(collector).exclude(delivery_status='delivered')
+    by_id = {br.id: br for br in pending}
+    stops, details = route_stops(by_id.values())
+    route = routing.plan_route(
+        stops, origin, time_budget=getattr(settings, 'ROUTE_TIME_BUDGET', 1.0),
+    )
+
+    results, cumulative = [], 0.0
+    for sequence, (stop, leg) in enumerate(zip(route.stops, route.legs), start=1):
+        action, request_id = stop.key
+        br = by_id[request_id]
+        cumulative += leg
+        results.append({
+            'sequence': sequence,
+            'action': action,
+            'request': request_id,
+            'donation': br.donation_id,
+            'title': br.donation.title,
+            'latitude': stop.latitude,
+            'longitude': stop.longitude,
+            **details[stop.key],
+            'leg_km': round(leg, 3),
+            'cumulative_km': round(cumulative, 3),
+        })
+    return Response({
+        'origin': {'latitude': origin[0], 'longitude': origin[1]} if origin else None,
+        'total_km': round(route.total_km, 3),
+        'stops': results,
+    })
 
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
+@throttle_classes([OTPUserThrottle, OTPRequestThrottle])
 def collector_verify_otp_view(request, pk):
     """Collector verifies OTP: sender_otp → collected, receiver_otp → delivered."""
-    try:
-        collector = FoodWasteCollector.objects.get(user=request.user)
-    except FoodWasteCollector.DoesNotExist:
+    collector = collector_for(request.user)
+    if collector is None:
         return Response({'error': 'Not a collector.'}, status=status.HTTP_403_FORBIDDEN)
 
     try:
-        buy_request = BuyRequest.objects.get(id=pk, assigned_collector=collector)
+        buy_request = BuyRequest.objects.with_related().get(
+            id=pk, assigned_collector=collector
+        )
     except BuyRequest.DoesNotExist:
         return Response({'error': 'Request not found or not assigned to you.'},
                         status=status.HTTP_404_NOT_FOUND)
@@ -306,7 +819,8 @@ def collector_verify_otp_view(request, pk):
 
     if buy_request.delivery_status == 'waiting' and otp == buy_request.sender_otp:
         buy_request.delivery_status = 'collected'
-        buy_request.save()
+        buy_request.save(update_fields=['delivery_status', 'updated_at'])
+        notify_buy_request(buy_request)
         serializer = BuyRequestSerializer(buy_request, context={'request': request})
         return Response({
             'message': 'Food collected from donor! OTP verified.',
@@ -315,7 +829,8 @@ def collector_verify_otp_view(request, pk):
         })
     elif buy_request.delivery_status == 'collected' and otp == buy_request.receiver_otp:
         buy_request.delivery_status = 'delivered'
-        buy_request.save()
+        buy_request.save(update_fields=['delivery_status', 'updated_at'])
+        notify_buy_request(buy_request)
         serializer = BuyRequestSerializer(buy_request, context={'request': request})
         return Response({
             'message': 'Food delivered to requester! OTP verified.',
@@ -327,3 +842,138 @@ def collector_verify_otp_view(request, pk):
         return Response({
             'error': f'Invalid OTP. Please enter the {expected} OTP.',
         }, status=status.HTTP_400_BAD_REQUEST)
+
+
+# ── Delta Sync ───────────────────────────────────────────────────
+
+SYNC_BATCH_SIZE = 500
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def sync_view(request):
+    """Donations and buy requests changed since the ``since`` token.
+
+    Only the user's own log entries are read (see ``ChangeLog``), so rows
+    listed under ``deleted`` are ones the user could see before and no
+    longer can, or that were deleted. Pass the returned ``token`` as
+    ``since`` next time; keep calling while ``has_more`` is true.
+
+    Tokens are insert-ordered. SQLite commits one writer at a time, so that
+    is commit order too. Where writers run concurrently (PostgreSQL),
+    entries younger than ``SYNC_COMMIT_LAG`` seconds are held back, so an
+    earlier transaction still committing is not skipped; transactions
+    open longer than that can still be missed.
+    """
+    try:
+        since = int(request.query_params.get('since', 0))
+    except ValueError:
+        return Response({'error': 'since must be a sync token.'}, status=status.HTTP_400_BAD_REQUEST)
+
+    log = ChangeLog.objects.filter(Q(user=request.user) | Q(user__isnull=True), seq__gt=since)
+    if connection.vendor != 'sqlite':
+        lag = getattr(settings, 'SYNC_COMMIT_LAG', 10)
+        log = log.filter(created_at__lte=timezone.now() - timedelta(seconds=lag))
+    entries = list(
+        log.order_by('seq').values_list('seq', 'model', 'object_id')[:SYNC_BATCH_SIZE + 1]
+    )
+    has_more = len(entries) > SYNC_BATCH_SIZE
+    entries = entries[:SYNC_BATCH_SIZE]
+    token = entries[-1][0] if entries else since
+
+    changed = {'donation': set(), 'buy_request': set()}
+    for _, model, object_id in entries:
+        changed[model].add(object_id)
+
+    donations = FoodDonation.objects.with_related().visible_to(
+        request.user).filter(id__in=changed['donation'])
+    buy_requests = BuyRequest.objects.with_related().visible_to(
+        request.user).filter(id__in=changed['buy_request'])
+    donation_data = FoodDonationSerializer(donations, many=True, context=list_context(request)).data
+    request_data = BuyRequestSerializer(buy_requests, many=True, context=list_context(request)).data
+
+    return Response({
+        'token': str(token),
+        'has_more': has_more,
+        'donations': donation_data,
+        'buy_requests': request_data,
+        'deleted': {
+            'donations': sorted(changed['donation'] - {d['id'] for d in donation_data}),
+            'buy_requests': sorted(changed['buy_request'] - {r['id'] for r in request_data}),
+        },
+    })
+
+
+# ── Reporting exports ────────────────────────────────────────────
+
+@api_view(['GET'])
+@authentication_classes([CachedTokenAuthentication, SessionAuthentication])
+@permission_classes([IsAdminUser])
+def export_view(request, report, fmt):
+    """Stream a report (see ``App/exports.py``) as CSV or JSON Lines; staff only.
+
+    Session auth is accepted so the links work from the admin.
+    """
+    if report not in exports.REPORTS or fmt not in exports.FORMATS:
+        return Response({'error': 'Unknown export.'}, status=status.HTTP_404_NOT_FOUND)
+    header, rows = exports.report(report, request.query_params)
+    response = StreamingHttpResponse(
+        exports.render(fmt, header, rows), content_type=exports.FORMATS[fmt],
+    )
+    stamp = timezone.localdate().strftime('%Y%m%d')
+    response['Content-Disposition'] = f'attachment; filename="{report}-{stamp}.{fmt}"'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+# ── Event Stream ─────────────────────────────────────────────────
+
+EVENT_STREAM_KEEPALIVE = 15  # seconds
+
+
+def _stream_identity(request):
+    """Resolve the token user and their collector id (if any) for the event stream."""
+    try:
+        auth = CachedTokenAuthentication().authenticate(request)
+    except AuthenticationFailed:
+        return None, None
+    if auth is None:
+        return None, None
+    user = auth[0]
+    collector = collector_for(user)
+    return user, collector.id if collector is not None and collector.is_active else None
+
+
+async def event_stream_view(request):
+    """Server-Sent Events stream of buy request changes for the current user.
+
+    Collectors also receive events for requests assigned to them. Requires
+    an ASGI server; clients should re-fetch their lists after reconnecting.
+    """
+    user, collector_id = await sync_to_async(_stream_identity)(request)
+    if user is None:
+        return JsonResponse({'detail': 'Authentication credentials were not provided.'},
+                            status=status.HTTP_401_UNAUTHORIZED)
+
+    channels = [user_channel(user.id)]
+    if collector_id:
+        channels.append(collector_channel(collector_id))
+    subscription = get_broker().subscribe(channels)
+
+    async def stream():
+        try:
+            yield 'retry: 5000\n\n'
+            while True:
+                try:
+                    event = await subscription.get(timeout=EVENT_STREAM_KEEPALIVE)
+                except asyncio.TimeoutError:
+                    yield ': keepalive\n\n'
+                    continue
+                yield f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+        finally:
+            subscription.close()
+
+    response = StreamingHttpResponse(stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -2,6 +2,9 @@
 ASGI config for saveFood project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Serve it with an ASGI server (e.g. ``uvicorn saveFood.asgi:application``) so
+the Server-Sent Events stream at /api/events/ can hold connections open
+without tying up a worker thread.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/